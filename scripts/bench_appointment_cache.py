@@ -0,0 +1,88 @@
+"""Benchmark agents polling their appointments: one query per call vs the appointment cache.
+
+Each poll lists a user's latest appointments and checks the status of the
+newest one, as list_rdvs and get_appointment_status do, either
+
+    query   each call opens a read-only session and queries "Appointment",
+            as the tools did before
+    cached  calls go through the appointment cache (db_service.appointment_cache)
+
+for users that have appointments, and reports the time per poll and the
+primary pool's checkouts per poll.
+
+Usage:
+    python scripts/bench_appointment_cache.py --users 50 --polls 20
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from pathlib import Path
+
+# Add src to Python path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from sqlalchemy import func, select
+
+from database import get_db, get_engine, pool_stats
+from models import orm_models
+from services import db_service
+
+
+async def query(user_id: str):
+    async with get_db(readonly=True, user_id=user_id) as session:
+        appointments, _ = await db_service.get_user_appointments_page(session, user_id, None, 10)
+    async with get_db(readonly=True, user_id=user_id) as session:
+        await db_service.get_appointment_by_id(session, appointments[0].id)
+
+
+async def cached(user_id: str):
+    appointments, _ = await db_service.get_cached_user_appointments_page(user_id, None, 10)
+    await db_service.find_user_appointments(user_id, [appointments[0].id])
+
+
+MODES = {"query": query, "cached": cached}
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--polls", type=int, default=20, help="polls per user")
+    args = parser.parse_args()
+
+    async with get_db(readonly=True) as session:
+        users = list(await session.scalars(
+            select(orm_models.Appointment.userId)
+            .group_by(orm_models.Appointment.userId)
+            .having(func.count() <= db_service.appointment_cache.max_per_user)
+            .limit(args.users)
+        ))
+    if not users:
+        print("No appointment in the database, nothing to poll")
+        return
+
+    print("\n" + "=" * 60)
+    print(f"BENCHMARK: {len(users)} users polling {args.polls} times each")
+    print("=" * 60)
+    print(f"\n{'mode':>6} | {'ms/poll':>7} | {'p95 ms':>6} | {'checkouts/poll':>14}")
+
+    for mode, poll in MODES.items():
+        db_service.appointment_cache.clear()
+        before = pool_stats()["primary"]["checkouts"]
+        samples = []
+        for _ in range(args.polls):
+            for user_id in users:
+                start = time.perf_counter()
+                await poll(user_id)
+                samples.append((time.perf_counter() - start) * 1000)
+        checkouts = (pool_stats()["primary"]["checkouts"] - before) / len(samples)
+        p95 = statistics.quantiles(samples, n=20)[-1]
+        print(f"{mode:>6} | {statistics.mean(samples):>7.3f} | {p95:>6.3f} | {checkouts:>14.2f}")
+
+    await get_engine().dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,104 @@
+"""Benchmark checking the status of several appointments: one call per id vs one batch.
+
+Checks K appointment ids on behalf of a user, half of them theirs, the
+other half other users' appointments and ids that do not exist, either
+
+    sequential  one session and lookup per id, ownership compared in Python,
+                as get_appointment_status did before
+    batched     one query for all the ids with the ownership check in SQL
+                (db_service.get_user_appointments_by_ids), as
+                get_appointment_statuses does on an appointment cache miss
+
+and reports the time per batch of K ids.
+
+Usage:
+    python scripts/bench_appointment_statuses.py --ids 1,10,50 --rounds 20
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import List
+
+# Add src to Python path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from sqlalchemy import func, select
+
+from database import get_db, get_engine
+from models import orm_models
+from services import db_service
+
+
+async def sequential(user_id: str, ids: List[str]):
+    statuses = {}
+    for appointment_id in ids:
+        async with get_db(readonly=True, user_id=user_id) as session:
+            appointment = await db_service.get_appointment_by_id(session, appointment_id)
+        if appointment is not None:
+            statuses[appointment_id] = appointment if appointment.userId == user_id else None
+    return statuses
+
+
+async def batched(user_id: str, ids: List[str]):
+    async with get_db(readonly=True, user_id=user_id) as session:
+        return await db_service.get_user_appointments_by_ids(session, user_id, ids)
+
+
+MODES = {"sequential": sequential, "batched": batched}
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--ids", default="1,10,50", help="ids checked per batch")
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+    sizes = [int(n) for n in args.ids.split(",")]
+
+    async with get_db(readonly=True) as session:
+        user_id = await session.scalar(
+            select(orm_models.Appointment.userId)
+            .group_by(orm_models.Appointment.userId)
+            .order_by(func.count().desc())
+            .limit(1)
+        )
+        if user_id is None:
+            print("No appointment in the database, nothing to check")
+            return
+        own = list(await session.scalars(
+            select(orm_models.Appointment.id)
+            .where(orm_models.Appointment.userId == user_id)
+            .limit(max(sizes))
+        ))
+        others = list(await session.scalars(
+            select(orm_models.Appointment.id)
+            .where(orm_models.Appointment.userId != user_id)
+            .limit(max(sizes))
+        ))
+
+    print("\n" + "=" * 60)
+    print(f"BENCHMARK: appointment status checks (ms per batch, median of {args.rounds})")
+    print("=" * 60)
+    print(f"\n{'ids':>5} | " + " | ".join(f"{mode:>10}" for mode in MODES))
+
+    for size in sizes:
+        mine = own[:(size + 1) // 2]
+        ids = (mine + others[:size // 4] + [f"missing-{i}" for i in range(size)])[:size]
+        cells = []
+        for check in MODES.values():
+            samples = []
+            for _ in range(args.rounds):
+                start = time.perf_counter()
+                await check(user_id, ids)
+                samples.append((time.perf_counter() - start) * 1000)
+            cells.append(statistics.median(samples))
+        print(f"{size:>5} | " + " | ".join(f"{ms:>10.2f}" for ms in cells))
+
+    await get_engine().dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,101 @@
+"""Benchmark serving catalog tool responses: models vs pre-serialized payloads.
+
+Serves a list of N hospitals through the MCP server's tools/call handler
+and encodes the result as the transport does, four ways:
+
+    models     the tool returns the response models: FastMCP converts them,
+               and the MCP server validates them against the output schema
+               (how search_hospitals and list_hospitals answered before)
+    build      a Payload is built on every call (a payload cache miss)
+    cached     the cached Payload is returned
+    unchanged  the client passed the cached Payload's version
+
+No database is needed: the hospitals are synthetic.
+
+Usage:
+    python scripts/bench_catalog_payloads.py --hospitals 200,2000,20000
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import List
+
+# Add src to Python path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+import mcp.types
+from fastmcp import FastMCP
+
+from models.db_models import Hospital
+from services.payloads import Payload
+
+MODES = ["models", "build", "cached", "unchanged"]
+
+
+def catalog_server(hospitals: List[Hospital]) -> FastMCP:
+    """A server with one tool per mode, all answering with ``hospitals``."""
+    server = FastMCP("bench-catalog")
+    unchanged = Payload.of([], wrap=True)
+    payload = Payload.of(hospitals, wrap=True)
+
+    @server.tool
+    async def models() -> List[Hospital]:
+        return hospitals
+
+    @server.tool
+    async def build() -> List[Hospital]:
+        return Payload.of(hospitals, wrap=True).result(unchanged)  # type: ignore[return-value]
+
+    @server.tool
+    async def cached() -> List[Hospital]:
+        return payload.result(unchanged)  # type: ignore[return-value]
+
+    @server.tool(name="unchanged")
+    async def unchanged_tool() -> List[Hospital]:
+        return payload.result(unchanged, payload.version)  # type: ignore[return-value]
+
+    return server
+
+
+async def call(server: FastMCP, tool: str) -> tuple:
+    """Milliseconds to answer one tools/call request and encode it, and its size."""
+    handler = server._mcp_server.request_handlers[mcp.types.CallToolRequest]
+    request = mcp.types.CallToolRequest(
+        method="tools/call", params=mcp.types.CallToolRequestParams(name=tool, arguments={}),
+    )
+    start = time.perf_counter()
+    result = await handler(request)
+    encoded = result.model_dump_json(by_alias=True, exclude_none=True)
+    return (time.perf_counter() - start) * 1000, len(encoded)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--hospitals", default="200,2000,20000")
+    parser.add_argument("--calls", type=int, default=5)
+    args = parser.parse_args()
+
+    print("\n" + "=" * 60)
+    print(f"BENCHMARK: catalog tool responses (ms per call, median of {args.calls})")
+    print("=" * 60)
+    print(f"\n{'hospitals':>9} | {'MB':>6} | " + " | ".join(f"{mode:>9}" for mode in MODES))
+
+    for count in [int(n) for n in args.hospitals.split(",")]:
+        server = catalog_server([
+            Hospital(id=f"bench-{i}", name=f"Hôpital {i}", city="Paris", distanceKm=i / 10)
+            for i in range(count)
+        ])
+        cells, size = [], 0
+        for mode in MODES:
+            samples = [await call(server, mode) for _ in range(args.calls)]
+            size = max(size, *(encoded for _, encoded in samples))
+            cells.append(statistics.median(ms for ms, _ in samples))
+        print(f"{count:>9} | {size / 1e6:>6.2f} | " + " | ".join(f"{ms:>9.2f}" for ms in cells))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
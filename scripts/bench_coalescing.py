@@ -0,0 +1,94 @@
+"""Benchmark bursts of identical reads: one query per call vs coalesced calls.
+
+Fires bursts of concurrent get_hospital_data-style reads of the same
+hospital, with the hospital caches emptied before each burst, either
+
+    separate  each call opens its own read-only session (pool connection)
+              and runs the query, as the tools did before
+    shared    calls go through db_service.shared_read, so the burst shares
+              one query and one connection
+
+and reports the burst duration and, per burst, the primary pool's
+checkouts, the time spent waiting for them, and timeouts (see
+DATABASE_POOL_* for the pool size).
+
+Usage:
+    python scripts/bench_coalescing.py --burst 300 --bursts 5
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from pathlib import Path
+
+# Add src to Python path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from sqlalchemy import select
+
+from database import get_db, get_engine, pool_stats
+from models import orm_models
+from services import db_service
+
+
+async def separate(hospital_id: str):
+    async with get_db(readonly=True) as session:
+        return await db_service.get_hospitals_with_status(session, [hospital_id])
+
+
+async def shared(hospital_id: str):
+    return await db_service.shared_read(db_service.get_hospitals_with_status, [hospital_id])
+
+
+MODES = {"separate": separate, "shared": shared}
+
+
+async def burst(mode: str, hospital_id: str, size: int) -> float:
+    """Seconds for ``size`` concurrent identical reads to complete."""
+    db_service.invalidate_hospital_cache()
+    start = time.perf_counter()
+    results = await asyncio.gather(
+        *(MODES[mode](hospital_id) for _ in range(size)), return_exceptions=True
+    )
+    errors = [r for r in results if isinstance(r, Exception)]
+    if errors:
+        print(f"  {len(errors)} {mode} calls failed, e.g. {errors[0]!r}")
+    return time.perf_counter() - start
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--burst", type=int, default=300, help="concurrent calls per burst")
+    parser.add_argument("--bursts", type=int, default=5)
+    args = parser.parse_args()
+
+    async with get_db(readonly=True) as session:
+        hospital_id = await session.scalar(select(orm_models.Hospital.id).limit(1))
+    if hospital_id is None:
+        print("No hospital in the database, nothing to read")
+        return
+
+    print("\n" + "=" * 60)
+    print(f"BENCHMARK: bursts of {args.burst} identical reads, median of {args.bursts}")
+    print("=" * 60)
+    print(f"\n{'mode':>8} | {'burst ms':>8} | {'checkouts':>9} {'waited ms':>9} {'timeouts':>8}")
+
+    for mode in MODES:
+        before = pool_stats()["primary"]
+        durations = [await burst(mode, hospital_id, args.burst) for _ in range(args.bursts)]
+        after = pool_stats()["primary"]
+        per_burst = {
+            key: (after[key] - before[key]) / args.bursts
+            for key in ("checkouts", "checkout_wait_total", "timeouts")
+        }
+        print(f"{mode:>8} | {statistics.median(durations) * 1000:>8.1f} | "
+              f"{per_burst['checkouts']:>9.0f} {per_burst['checkout_wait_total'] * 1000:>9.0f} "
+              f"{per_burst['timeouts']:>8.0f}")
+
+    await get_engine().dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,147 @@
+"""Benchmark fuzzy hospital search: full-scan levenshtein vs trigram pre-filter.
+
+Fills a TEMP table shaped like "Hospital" at increasing sizes and times the
+query used by db_service before (levenshtein only) and after (pg_trgm ``%``
+candidate pre-filter backed by a GIN index), at pg_trgm's default similarity
+threshold and at the one db_service connections use. Misses (names matching
+nothing, as unknown or garbage input) are timed on their own, against a
+pre-filtered query rerun as a full scan when it finds nothing. Real tables
+are not touched.
+
+Usage:
+    python scripts/bench_fuzzy_search.py --sizes 1000,10000,100000,1000000 --repeat 20
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from pathlib import Path
+
+# Add src to Python path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from sqlalchemy import text
+
+from database import TRGM_SIMILARITY_THRESHOLD, engine
+
+CITIES = [
+    "Paris", "Marseille", "Lyon", "Toulouse", "Nice", "Nantes", "Montpellier",
+    "Strasbourg", "Bordeaux", "Lille", "Rennes", "Reims", "Toulon", "Grenoble",
+    "Dijon", "Angers", "Nimes", "Villeurbanne", "Clermont-Ferrand", "Le Mans",
+]
+
+# (query, max distance) pairs, with typos, as agents send them
+CITY_QUERIES = [("Pari", 5), ("Marseile", 5), ("Bordeau", 5), ("Grenobel", 5)]
+NAME_QUERIES = [("Hopital Saint Louis 42", 10), ("Clinique Lyon 1337", 10)]
+# Input matching nothing
+CITY_MISSES = [("Xqzw", 5), ("Kvvrbn", 5)]
+NAME_MISSES = [("Zzyzx Kplmq", 10), ("asdfgh qwerty", 10)]
+
+FULL_SCAN = """
+    SELECT id FROM bench_hospital
+    WHERE levenshtein(lower({col}), lower(:q)) <= :d
+    ORDER BY levenshtein(lower({col}), lower(:q))
+"""
+
+TRIGRAM = """
+    SELECT id FROM bench_hospital
+    WHERE lower({col}) % lower(:q) AND levenshtein(lower({col}), lower(:q)) <= :d
+    ORDER BY levenshtein(lower({col}), lower(:q))
+"""
+
+
+async def fill(conn, size: int):
+    """Replace the bench table content with ``size`` synthetic hospitals."""
+    await conn.execute(text("TRUNCATE bench_hospital"))
+    await conn.execute(
+        text("""
+            INSERT INTO bench_hospital (id, name, city)
+            SELECT
+                'h' || i,
+                (ARRAY['Hopital', 'Clinique', 'Centre Hospitalier', 'CHU'])[1 + i % 4]
+                    || ' ' || (CAST(:cities AS text[]))[1 + (i / 4) % :n_cities] || ' ' || i,
+                (CAST(:cities AS text[]))[1 + i % :n_cities]
+                    || CASE WHEN i % 7 = 0 THEN '-' || (i % 97) ELSE '' END
+            FROM generate_series(1, :size) AS i
+        """),
+        {"cities": CITIES, "n_cities": len(CITIES), "size": size},
+    )
+    await conn.execute(text("ANALYZE bench_hospital"))
+
+
+async def time_query(conn, sqls, queries, repeat: int, threshold: float) -> float:
+    """Median latency in milliseconds over ``repeat`` runs of every query.
+
+    Each run executes the statements of ``sqls`` in turn, until one returns rows.
+    """
+    await conn.execute(
+        text("SELECT set_config('pg_trgm.similarity_threshold', :t, false)"),
+        {"t": str(threshold)},
+    )
+    samples = []
+    for _ in range(repeat):
+        for q, d in queries:
+            start = time.perf_counter()
+            for sql in sqls:
+                if (await conn.execute(text(sql), {"q": q, "d": d})).first() is not None:
+                    break
+            samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="1000,10000,100000,1000000")
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+    sizes = [int(s) for s in args.sizes.split(",")]
+
+    print("\n" + "=" * 60)
+    print("BENCHMARK: fuzzy hospital search (median ms)")
+    print("=" * 60)
+    print(f"\n{'':>10} | {'':>4} | {'hits':^32} | {'misses':^21}")
+    print(f"{'rows':>10} | {'col':>4} | {'scan':>10} {'trgm 0.3':>10} "
+          f"{f'trgm {TRGM_SIMILARITY_THRESHOLD}':>10} | "
+          f"{f'trgm {TRGM_SIMILARITY_THRESHOLD}':>10} {'fallback':>10}")
+
+    async with engine.connect() as conn:
+        await conn.execute(text("CREATE EXTENSION IF NOT EXISTS fuzzystrmatch"))
+        await conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+        await conn.execute(text(
+            "CREATE TEMP TABLE bench_hospital (id text PRIMARY KEY, name text NOT NULL, city text)"
+        ))
+        await conn.execute(text(
+            "CREATE INDEX ON bench_hospital USING gin (lower(name) gin_trgm_ops)"
+        ))
+        await conn.execute(text(
+            "CREATE INDEX ON bench_hospital USING gin (lower(city) gin_trgm_ops)"
+        ))
+
+        for size in sizes:
+            await fill(conn, size)
+            for col, hits, misses in (
+                ("city", CITY_QUERIES, CITY_MISSES), ("name", NAME_QUERIES, NAME_MISSES),
+            ):
+                scan, trigram = FULL_SCAN.format(col=col), TRIGRAM.format(col=col)
+                results = [
+                    await time_query(conn, [scan], hits, args.repeat, 0.3),
+                    await time_query(conn, [trigram], hits, args.repeat, 0.3),
+                    await time_query(conn, [trigram], hits, args.repeat,
+                                     TRGM_SIMILARITY_THRESHOLD),
+                    await time_query(conn, [trigram], misses, args.repeat,
+                                     TRGM_SIMILARITY_THRESHOLD),
+                    # Rerunning misses without the pre-filter, as a scan
+                    await time_query(conn, [trigram, scan], misses, args.repeat, 0.3),
+                ]
+                print(f"{size:>10} | {col:>4} | {results[0]:>10.2f} {results[1]:>10.2f} "
+                      f"{results[2]:>10.2f} | {results[3]:>10.2f} {results[4]:>10.2f}")
+
+        await conn.rollback()
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,109 @@
+"""Benchmark list_hospitals' read path: ORM entities vs column rows.
+
+Pages through every hospital (200 per page, the largest page) the way
+list_hospitals does, with the hospital cache emptied first:
+
+    orm    loads full Hospital entities, detaches them and copies four
+           fields into the response models (the previous path)
+    rows   db_service.get_hospitals_page: selects the four columns and
+           builds the response models from the rows
+
+and reports the client CPU and wall time of the whole listing, and the
+memory still allocated afterwards (every page, all kept) and at peak. Seed a
+large catalog first, e.g. ``seed_database.py --hospitals 100000``.
+
+Usage:
+    python scripts/bench_hospital_rows.py --runs 3
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+# Add src to Python path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from sqlalchemy import func, select
+
+from database import get_db, get_engine
+from models import db_models, orm_models
+from services import db_service
+
+
+async def orm_page(session, cursor, limit):
+    """get_hospitals_page as it was, loading ORM entities."""
+    query = select(orm_models.Hospital).order_by(orm_models.Hospital.id).limit(limit + 1)
+    if cursor is not None:
+        (after_id,) = db_service.decode_cursor(cursor, str)
+        query = query.where(orm_models.Hospital.id > after_id)
+    hospitals = list((await session.execute(query)).scalars().all())
+    next_cursor = None
+    if len(hospitals) > limit:
+        hospitals = hospitals[:limit]
+        next_cursor = db_service.encode_cursor(hospitals[-1].id)
+    db_service._detach(session, hospitals)
+    return [
+        db_models.Hospital(
+            id=h.id, name=h.name, city=h.city or "", distanceKm=h.distanceKm or 0.0,
+        )
+        for h in hospitals
+    ], next_cursor
+
+
+PATHS = {"orm": orm_page, "rows": db_service.get_hospitals_page}
+
+
+async def list_all(path: str) -> list:
+    """List every hospital page by page; returns the pages."""
+    pages, cursor = [], None
+    async with get_db(readonly=True) as session:
+        while True:
+            page, cursor = await PATHS[path](session, cursor, db_service.MAX_PAGE_SIZE)
+            pages.append(page)
+            if cursor is None:
+                return pages
+
+
+async def measure(path: str) -> dict:
+    """CPU and wall seconds of one listing, then its memory in a traced listing."""
+    cpu, wall = time.process_time(), time.perf_counter()
+    await list_all(path)
+    cpu, wall = time.process_time() - cpu, time.perf_counter() - wall
+
+    tracemalloc.start()
+    pages = await list_all(path)
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del pages
+    return {"cpu": cpu, "wall": wall, "retained": retained / 2**20, "peak": peak / 2**20}
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    async with get_db(readonly=True) as session:
+        total = await session.scalar(select(func.count()).select_from(orm_models.Hospital))
+    print("\n" + "=" * 60)
+    print(f"BENCHMARK: listing {total:,} hospitals, median of {args.runs} runs")
+    print("=" * 60)
+    print(f"\n{'path':>5} | {'cpu s':>7} {'wall s':>7} | {'retained MiB':>12} {'peak MiB':>9}")
+
+    await list_all("rows")  # Warm up the pool and the compiled statements
+    await list_all("orm")
+    for path in PATHS:
+        runs = [await measure(path) for _ in range(args.runs)]
+        m = {key: statistics.median(run[key] for run in runs) for key in runs[0]}
+        print(f"{path:>5} | {m['cpu']:>7.2f} {m['wall']:>7.2f} | "
+              f"{m['retained']:>12.1f} {m['peak']:>9.1f}")
+
+    await get_engine().dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
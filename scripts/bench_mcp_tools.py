@@ -0,0 +1,336 @@
+"""Load-test the MCP tools in-process and save per-tool latency percentiles as JSON.
+
+Drives the real ``server.mcp`` through ``FastMCPTransport`` (no HTTP, no
+auth: the access token is replaced by one of the seeded users) against the
+database in DATABASE_URL, which must already hold users and hospitals
+(see scripts/seed_database.py). For every concurrency level, that many
+workers call tools picked at random from the mix for ``--duration`` seconds.
+
+Bookings go to far-future slots and are deleted at the end (``--keep`` to
+keep them). Runs are reproducible for a given ``--seed`` and data set.
+
+Usage:
+    python scripts/bench_mcp_tools.py --concurrency 1,10,50 --duration 20
+    python scripts/bench_mcp_tools.py --mix list_hospitals=1,create_rdv=1 --output run.json
+    python scripts/bench_mcp_tools.py --compare bench_results/<previous run>.json
+"""
+
+import argparse
+import asyncio
+import contextvars
+import json
+import logging
+import platform
+import random
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Add src to Python path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+import fastmcp.server.dependencies
+from fastmcp.client import Client, FastMCPTransport
+from sqlalchemy import delete, func, select
+
+from database import engine, get_db
+from models import orm_models
+from server import mcp
+
+DEFAULT_MIX = (
+    "list_hospitals=25,search_hospitals=15,get_hospital_data=20,get_hospitals_data=5,"
+    "find_nearest_hospitals=10,list_rdvs=10,get_appointment_status=5,create_rdv=10"
+)
+# A tool is reported as regressed when its p95 grows by more than this
+REGRESSION_THRESHOLD = 0.20
+
+CITIES_SAMPLE = 200
+HOSPITALS_SAMPLE = 2000
+
+current_user: contextvars.ContextVar[str] = contextvars.ContextVar("current_user")
+
+
+class Token:
+    """Access token standing in for the bearer token of a seeded user."""
+
+    def __init__(self, client_id: str):
+        self.client_id = client_id
+        self.claims = {"sub": client_id}
+
+
+def percentile(samples: list, q: float) -> float:
+    """Nearest-rank percentile of sorted ``samples``."""
+    if not samples:
+        return 0.0
+    return samples[min(len(samples) - 1, max(0, int(round(q * len(samples))) - 1))]
+
+
+class Workload:
+    """Catalog sample the tool arguments are drawn from."""
+
+    def __init__(self, rng: random.Random, users, hospitals, cities):
+        self.rng = rng
+        self.users = users
+        self.hospitals = hospitals
+        self.cities = cities
+        self.appointments = {}  # user id -> appointment ids booked during the run
+        self._slot = 0
+
+    @classmethod
+    async def load(cls, rng: random.Random, users: int) -> "Workload":
+        async with get_db(readonly=True) as session:
+            user_ids = (await session.scalars(
+                select(orm_models.User.id).order_by(orm_models.User.id).limit(users)
+            )).all()
+            hospitals = (await session.execute(
+                select(orm_models.Hospital.id, orm_models.Hospital.name,
+                       orm_models.Hospital.latitude, orm_models.Hospital.longitude)
+                .order_by(orm_models.Hospital.id)
+                .limit(HOSPITALS_SAMPLE)
+            )).all()
+            cities = (await session.scalars(
+                select(orm_models.Hospital.city)
+                .where(orm_models.Hospital.city.is_not(None))
+                .group_by(orm_models.Hospital.city)
+                .order_by(func.count().desc())
+                .limit(CITIES_SAMPLE)
+            )).all()
+        if not user_ids or not hospitals:
+            raise SystemExit("The database has no users or hospitals: seed it first")
+        return cls(rng, list(user_ids), list(hospitals), list(cities))
+
+    def typo(self, text: str) -> str:
+        """Drop one character, as agents relaying user input sometimes do."""
+        if len(text) < 6 or self.rng.random() < 0.5:
+            return text
+        i = self.rng.randrange(len(text))
+        return text[:i] + text[i + 1:]
+
+    def arguments(self, tool: str) -> dict:
+        rng = self.rng
+        hospital = rng.choice(self.hospitals)
+        if tool == "list_hospitals":
+            return {"limit": 50}
+        if tool == "search_hospitals":
+            return {"city": self.typo(rng.choice(self.cities))}
+        if tool == "get_hospital_data":
+            return {"hospital_id": hospital.id}
+        if tool == "get_hospitals_data":
+            sample = rng.sample(self.hospitals, min(20, len(self.hospitals)))
+            return {"hospital_ids": [h.id for h in sample]}
+        if tool == "find_nearest_hospitals":
+            latitude = hospital.latitude if hospital.latitude is not None else 46.6
+            longitude = hospital.longitude if hospital.longitude is not None else 2.4
+            return {"latitude": latitude, "longitude": longitude, "k": 5}
+        if tool == "list_rdvs":
+            return {"limit": 20}
+        if tool == "get_appointment_status":
+            booked = self.appointments.get(current_user.get())
+            return {"appointment_id": rng.choice(booked) if booked else "unknown"}
+        if tool == "create_rdv":
+            # A fresh slot every call, far from real bookings
+            self._slot += 1
+            when = datetime(2040, 1, 1) + timedelta(minutes=30 * self._slot)
+            return {"request": {
+                "hospital_name": self.typo(hospital.name),
+                "appointmentDateTime": when.isoformat(),
+            }}
+        raise SystemExit(f"Unknown tool in mix: {tool}")
+
+
+async def run_level(workload: Workload, mix: dict, concurrency: int, duration: float) -> dict:
+    """Run ``concurrency`` workers for ``duration`` seconds; return per-tool results.
+
+    Every worker is an MCP client session of its own, as one agent would
+    be. It is opened after the worker picks its user, so the server side of
+    the session (a task created by the transport) sees that user.
+    """
+    tools = list(mix)
+    weights = [mix[t] for t in tools]
+    latencies = {tool: [] for tool in tools}
+    errors = {tool: 0 for tool in tools}
+    connected = asyncio.Queue()
+    ready = asyncio.Event()
+    deadline = 0.0
+
+    async def worker(user_id: str):
+        current_user.set(user_id)
+        async with Client(FastMCPTransport(mcp)) as client:
+            connected.put_nowait(user_id)
+            await ready.wait()
+            while time.perf_counter() < deadline:
+                tool = workload.rng.choices(tools, weights)[0]
+                arguments = workload.arguments(tool)
+                start = time.perf_counter()
+                result = await client.call_tool(tool, arguments, raise_on_error=False)
+                latencies[tool].append((time.perf_counter() - start) * 1000)
+                if result.is_error:
+                    errors[tool] += 1
+                elif tool == "create_rdv":
+                    appointment_id = result.content[0].text.rsplit(": ", 1)[-1]
+                    workload.appointments.setdefault(user_id, []).append(appointment_id)
+
+    workers = [
+        asyncio.create_task(worker(workload.users[i % len(workload.users)]))
+        for i in range(concurrency)
+    ]
+    # Start the clock once every session is initialized
+    for _ in workers:
+        await connected.get()
+    start = time.perf_counter()
+    deadline = start + duration
+    ready.set()
+    await asyncio.gather(*workers)
+    elapsed = time.perf_counter() - start
+
+    results = {}
+    for tool in tools:
+        samples = sorted(latencies[tool])
+        results[tool] = {
+            "calls": len(samples),
+            "errors": errors[tool],
+            "throughput": len(samples) / elapsed,
+            "mean_ms": sum(samples) / len(samples) if samples else 0.0,
+            "p50_ms": percentile(samples, 0.50),
+            "p95_ms": percentile(samples, 0.95),
+            "p99_ms": percentile(samples, 0.99),
+            "max_ms": samples[-1] if samples else 0.0,
+        }
+    return {
+        "concurrency": concurrency,
+        "duration": elapsed,
+        "calls": sum(r["calls"] for r in results.values()),
+        "throughput": sum(r["calls"] for r in results.values()) / elapsed,
+        "tools": results,
+    }
+
+
+def print_level(level: dict) -> None:
+    print(f"\nconcurrency {level['concurrency']}: {level['throughput']:.0f} calls/s")
+    print(f"{'tool':>24} | {'calls':>7} {'errors':>6} | {'p50':>8} {'p95':>8} {'p99':>8} (ms)")
+    for tool, r in level["tools"].items():
+        print(f"{tool:>24} | {r['calls']:>7} {r['errors']:>6} | "
+              f"{r['p50_ms']:>8.2f} {r['p95_ms']:>8.2f} {r['p99_ms']:>8.2f}")
+
+
+def compare(current: dict, baseline: dict) -> bool:
+    """Print p95 changes against a previous run; return True if a tool regressed."""
+    print("\n" + "=" * 60)
+    print(f"COMPARISON with {baseline['meta'].get('commit', '?')} (p95 ms)")
+    print("=" * 60)
+    regressed = False
+    previous = {level["concurrency"]: level for level in baseline["runs"]}
+    for level in current["runs"]:
+        base = previous.get(level["concurrency"])
+        if base is None:
+            continue
+        for tool, r in level["tools"].items():
+            old = base["tools"].get(tool)
+            if not old or not old["p95_ms"] or not r["calls"]:
+                continue
+            change = r["p95_ms"] / old["p95_ms"] - 1
+            flag = ""
+            if change > REGRESSION_THRESHOLD:
+                flag = "  REGRESSION"
+                regressed = True
+            print(f"{level['concurrency']:>4} {tool:>24} | {old['p95_ms']:>8.2f} -> "
+                  f"{r['p95_ms']:>8.2f} ({change:+.0%}){flag}")
+    return regressed
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=Path(__file__).parent,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+async def cleanup(workload: Workload) -> None:
+    """Delete the appointments booked by the run."""
+    ids = [i for booked in workload.appointments.values() for i in booked]
+    async with get_db() as session:
+        for start in range(0, len(ids), 1000):
+            batch = ids[start:start + 1000]
+            await session.execute(
+                delete(orm_models.Appointment).where(orm_models.Appointment.id.in_(batch))
+            )
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--concurrency", default="1,10,50")
+    parser.add_argument("--duration", type=float, default=20, help="seconds per concurrency level")
+    parser.add_argument("--warmup", type=float, default=3, help="seconds of warm-up, not recorded")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="tool=weight,... (default: %(default)s)")
+    parser.add_argument("--users", type=int, default=100,
+                        help="seeded users the calls are spread over")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output",
+                        help="JSON file (default: bench_results/mcp-tools-<commit>.json)")
+    parser.add_argument("--compare", help="previous JSON run to compare p95 against")
+    parser.add_argument("--keep", action="store_true", help="keep the appointments booked")
+    args = parser.parse_args()
+
+    mix = {}
+    for item in args.mix.split(","):
+        tool, _, weight = item.partition("=")
+        mix[tool.strip()] = float(weight or 1)
+    levels = [int(c) for c in args.concurrency.split(",")]
+
+    workload = await Workload.load(random.Random(args.seed), args.users)
+    fastmcp.server.dependencies.get_access_token = lambda: Token(current_user.get())
+
+    commit = git_commit()
+    report = {
+        "meta": {
+            "commit": commit,
+            "started_at": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "mix": mix,
+            "duration": args.duration,
+            "seed": args.seed,
+            "users": len(workload.users),
+            "hospitals_sampled": len(workload.hospitals),
+        },
+        "runs": [],
+    }
+
+    print("\n" + "=" * 60)
+    print(f"BENCHMARK: MCP tools in-process ({commit})")
+    print("=" * 60)
+
+    # Failing calls are part of the mix: don't pay for formatting their tracebacks
+    logging.disable(logging.ERROR)
+    try:
+        if args.warmup:
+            await run_level(workload, mix, max(levels), args.warmup)
+        for concurrency in levels:
+            level = await run_level(workload, mix, concurrency, args.duration)
+            report["runs"].append(level)
+            print_level(level)
+    finally:
+        logging.disable(logging.NOTSET)
+        if not args.keep:
+            await cleanup(workload)
+
+    output = Path(args.output or Path("bench_results") / f"mcp-tools-{commit}.json")
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+    print(f"\nResults saved to {output}")
+
+    regressed = False
+    if args.compare:
+        regressed = compare(report, json.loads(Path(args.compare).read_text()))
+
+    await engine.dispose()
+    if regressed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
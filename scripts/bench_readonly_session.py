@@ -0,0 +1,87 @@
+"""Benchmark read-only sessions: get_db() vs get_db(readonly=True).
+
+Runs the same primary-key read (the query behind get_hospital_data, with
+the cache bypassed) through a regular session, which wraps it in
+BEGIN/COMMIT, and through a read-only autocommit session. The saving per
+call is about two network round trips, so it grows with the latency to
+the database.
+
+Usage:
+    python scripts/bench_readonly_session.py --calls 500 --concurrency 1,10
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from pathlib import Path
+
+# Add src to Python path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from sqlalchemy import select
+
+from database import engine, get_db
+from models import orm_models
+
+
+async def read_once(readonly: bool, hospital_id: str) -> float:
+    """Latency in milliseconds of one session doing one primary-key read."""
+    start = time.perf_counter()
+    async with get_db(readonly=readonly) as session:
+        await session.execute(
+            select(orm_models.Hospital, orm_models.HospitalCurrentStatus)
+            .outerjoin(orm_models.Hospital.current_status)
+            .where(orm_models.Hospital.id == hospital_id)
+        )
+    return (time.perf_counter() - start) * 1000
+
+
+async def run(readonly: bool, hospital_id: str, calls: int, concurrency: int):
+    """Per-call latencies and throughput of ``calls`` reads, ``concurrency`` at a time."""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            return await read_once(readonly, hospital_id)
+
+    start = time.perf_counter()
+    samples = await asyncio.gather(*[one() for _ in range(calls)])
+    elapsed = time.perf_counter() - start
+    return sorted(samples), calls / elapsed
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=500)
+    parser.add_argument("--concurrency", default="1,10")
+    args = parser.parse_args()
+
+    async with get_db(readonly=True) as session:
+        hospital_id = await session.scalar(select(orm_models.Hospital.id).limit(1))
+    if hospital_id is None:
+        print("No hospital in the database, nothing to read")
+        return
+
+    print("\n" + "=" * 60)
+    print("BENCHMARK: read-only sessions (ms per call)")
+    print("=" * 60)
+    print(f"\n{'concurrency':>11} | {'mode':>9} | "
+          f"{'p50':>7} {'p95':>7} {'p99':>7} | {'calls/s':>8}")
+
+    for concurrency in [int(c) for c in args.concurrency.split(",")]:
+        # Warm up the pool so connection setup is not measured
+        await run(False, hospital_id, concurrency, concurrency)
+        for readonly in (False, True):
+            samples, throughput = await run(readonly, hospital_id, args.calls, concurrency)
+            p = statistics.quantiles(samples, n=100)
+            mode = "readonly" if readonly else "regular"
+            print(f"{concurrency:>11} | {mode:>9} | {p[49]:>7.2f} {p[94]:>7.2f} {p[98]:>7.2f} | "
+                  f"{throughput:>8.0f}")
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
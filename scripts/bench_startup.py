@@ -0,0 +1,107 @@
+"""Benchmark server cold starts: time from process launch to the first tool response.
+
+Every run starts a fresh Python process that imports the server, runs its
+startup (schema check, hospital indexes loading in the background) and
+calls ``list_hospitals`` in-process through ``FastMCPTransport``. The
+launching process records when each phase ended:
+
+    imports         ``server`` imported (engines are not created yet)
+    schema          init_db done
+    first_response  first tool response received
+    indexes         hospital indexes loaded (bookings can be served)
+
+Runs alternate between a current schema (init_db skips the DDL) and an
+outdated one (init_db runs it all), against the database in DATABASE_URL.
+
+Usage:
+    python scripts/bench_startup.py --runs 5
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+SRC = Path(__file__).parent.parent / "src"
+PHASES = ["imports", "schema", "first_response", "indexes"]
+
+
+async def child() -> None:
+    """One cold start, printing the end time of every phase as JSON."""
+    sys.path.insert(0, str(SRC))
+    from fastmcp.client import Client, FastMCPTransport
+
+    import server
+
+    times = {"imports": time.time()}
+    indexes = await server.startup()
+    times["schema"] = time.time()
+    async with Client(FastMCPTransport(server.mcp)) as client:
+        await client.call_tool("list_hospitals", {"limit": 1})
+        times["first_response"] = time.time()
+    await indexes
+    times["indexes"] = time.time()
+    await server.get_engine().dispose()
+    print(json.dumps(times))
+
+
+async def outdate_schema() -> None:
+    """Make the next init_db run the whole DDL."""
+    sys.path.insert(0, str(SRC))
+    from sqlalchemy import text
+
+    import database
+
+    async with database.get_engine().begin() as conn:
+        await conn.execute(text('UPDATE "SchemaFingerprint" SET fingerprint = \'outdated\''))
+    await database.get_engine().dispose()
+
+
+def cold_start() -> dict:
+    """Launch a child process; return the seconds from launch to the end of every phase."""
+    launched = time.time()
+    result = subprocess.run(
+        [sys.executable, __file__, "--child"], capture_output=True, text=True, check=True,
+    )
+    times = json.loads(result.stdout.strip().splitlines()[-1])
+    return {phase: times[phase] - launched for phase in PHASES}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5, help="cold starts per schema state")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        asyncio.run(child())
+        return
+
+    print("\n" + "=" * 60)
+    print("BENCHMARK: server cold start")
+    print("=" * 60)
+
+    # A first start brings the schema up to date and warms the OS caches
+    cold_start()
+    results = {"current schema": [], "outdated schema": []}
+    for _ in range(args.runs):
+        results["current schema"].append(cold_start())
+        asyncio.run(outdate_schema())
+        results["outdated schema"].append(cold_start())
+
+    print(f"\nSeconds since launch, median of {args.runs} runs (min-max)")
+    print(f"{'':>16} | " + " | ".join(f"{phase:>17}" for phase in PHASES))
+    for mode, runs in results.items():
+        cells = []
+        for phase in PHASES:
+            values = [run[phase] for run in runs]
+            cells.append(f"{statistics.median(values):5.2f} ({min(values):.2f}-{max(values):.2f})")
+        print(f"{mode:>16} | " + " | ".join(f"{cell:>17}" for cell in cells))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""Benchmark statement reuse on the primary-key lookups of db_service.
+
+Runs get_user_by_id, get_hospital_by_id and get_appointment_by_id's query
+three ways:
+
+    fresh     select() built on every call (SQLAlchemy computes its cache
+              key each time before finding the compiled form)
+    lambda    lambda_stmt(), keyed on the lambda's code
+    prebuilt  the statement db_service builds once, with a bound parameter
+
+each against an engine keeping prepared statements per connection
+(DATABASE_STATEMENT_CACHE_SIZE) and one in pgbouncer mode (prepared
+statements never reused). Calls run one after the other on one session,
+and report the client CPU and the wall time per call.
+
+Usage:
+    python scripts/bench_statement_cache.py --calls 2000
+"""
+
+import argparse
+import asyncio
+import random
+import sys
+import time
+from pathlib import Path
+
+# Add src to Python path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from sqlalchemy import lambda_stmt, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+import database
+from models import orm_models
+from services import db_service
+
+LOOKUPS = {
+    "user": (orm_models.User, db_service._USER_BY_ID),
+    "hospital": (orm_models.Hospital, db_service._HOSPITAL_BY_ID),
+    "appointment": (orm_models.Appointment, db_service._APPOINTMENT_BY_ID),
+}
+
+
+def statement(mode: str, model, prebuilt, key: str):
+    """The statement and parameters one call of ``mode`` executes."""
+    if mode == "fresh":
+        return select(model).where(model.id == key), None
+    if mode == "lambda":
+        return lambda_stmt(lambda: select(model).where(model.id == key)), None
+    return prebuilt, {"id": key}
+
+
+async def run(session: AsyncSession, mode: str, lookup: str, keys: list, calls: int):
+    """Client CPU and wall microseconds per call over ``calls`` lookups."""
+    model, prebuilt = LOOKUPS[lookup]
+    rng = random.Random(0)
+    cpu, wall = time.process_time(), time.perf_counter()
+    for _ in range(calls):
+        stmt, params = statement(mode, model, prebuilt, rng.choice(keys))
+        (await session.execute(stmt, params)).scalar_one_or_none()
+        session.expunge_all()
+    cpu, wall = time.process_time() - cpu, time.perf_counter() - wall
+    return cpu / calls * 1e6, wall / calls * 1e6
+
+
+def create_engine(pgbouncer: bool):
+    database.PGBOUNCER = pgbouncer
+    return database._create_engine(database.DATABASE_URL, "pgbouncer" if pgbouncer else "cached")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=2000)
+    parser.add_argument("--keys", type=int, default=1000, help="distinct ids looked up")
+    args = parser.parse_args()
+
+    keys = {}
+    async with database.get_db(readonly=True) as session:
+        for lookup, (model, _) in LOOKUPS.items():
+            keys[lookup] = list(await session.scalars(select(model.id).limit(args.keys)))
+    missing = [lookup for lookup, ids in keys.items() if not ids]
+    if missing:
+        print(f"No {', '.join(missing)} rows in the database, nothing to look up")
+        return
+
+    print("\n" + "=" * 60)
+    print("BENCHMARK: statement reuse (microseconds per call)")
+    print("=" * 60)
+    print(f"\n{'engine':>9} | {'lookup':>11} | "
+          + " | ".join(f"{mode + ' cpu/wall':>20}" for mode in ("fresh", "lambda", "prebuilt")))
+
+    for pgbouncer in (False, True):
+        engine = create_engine(pgbouncer)
+        async with async_sessionmaker(engine, class_=AsyncSession)() as session:
+            for lookup in LOOKUPS:
+                # Warm up compiled forms and prepared statements
+                for mode in ("fresh", "lambda", "prebuilt"):
+                    await run(session, mode, lookup, keys[lookup], 50)
+                cells = []
+                for mode in ("fresh", "lambda", "prebuilt"):
+                    cpu, wall = await run(session, mode, lookup, keys[lookup], args.calls)
+                    cells.append(f"{cpu:>9.0f} / {wall:>8.0f}")
+                engine_name = "pgbouncer" if pgbouncer else "cached"
+                print(f"{engine_name:>9} | {lookup:>11} | " + " | ".join(cells))
+        await engine.dispose()
+
+    await database.get_engine().dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,460 @@
+"""Fill the database with synthetic users, hospitals, statuses and appointments.
+
+Rows are generated on the fly and streamed with asyncpg's binary COPY
+(``copy_records_to_table``), a batch at a time, on several connections per
+table, and independent tables load in parallel. Names and cities are skewed like real data:
+a few big cities hold most hospitals, a long tail of look-alike towns
+("Saint-Martin-sur-Loire", "Saint-Martin-sur-Marne", ...) and a handful of
+popular saints make fuzzy search work for its answers.
+
+Every seeded id starts with ``--prefix``, so ``--clean`` removes a previous
+run without touching other data. Runs are reproducible for a given ``--seed``.
+
+Usage:
+    python scripts/seed_database.py --users 1000 --hospitals 500 \\
+        --statuses 20000 --appointments 10000
+    python scripts/seed_database.py --users 1000000 --hospitals 100000 \\
+        --statuses 10000000 --appointments 5000000 --clean
+"""
+
+import argparse
+import asyncio
+import itertools
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+# Add src to Python path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from sqlalchemy import text
+
+import database
+from services.db_service import SLOT_CAPACITY, SLOT_MINUTES
+
+# Largest cities first: they get most of the hospitals
+CITIES = [
+    ("Paris", 48.857, 2.352), ("Marseille", 43.296, 5.370), ("Lyon", 45.764, 4.836),
+    ("Toulouse", 43.605, 1.444), ("Nice", 43.710, 7.262), ("Nantes", 47.218, -1.554),
+    ("Montpellier", 43.611, 3.877), ("Strasbourg", 48.573, 7.752), ("Bordeaux", 44.838, -0.579),
+    ("Lille", 50.629, 3.057), ("Rennes", 48.117, -1.678), ("Reims", 49.258, 4.032),
+    ("Toulon", 43.124, 5.928), ("Saint-Étienne", 45.440, 4.387), ("Le Havre", 49.494, 0.108),
+    ("Grenoble", 45.188, 5.724), ("Dijon", 47.322, 5.041), ("Angers", 47.478, -0.563),
+    ("Nîmes", 43.837, 4.360), ("Villeurbanne", 45.767, 4.880), ("Clermont-Ferrand", 45.778, 3.087),
+    ("Le Mans", 48.006, 0.199), ("Aix-en-Provence", 43.530, 5.447), ("Brest", 48.390, -4.486),
+    ("Tours", 47.394, 0.685), ("Amiens", 49.894, 2.296), ("Limoges", 45.834, 1.262),
+    ("Annecy", 45.899, 6.129), ("Perpignan", 42.699, 2.895), ("Metz", 49.119, 6.176),
+    ("Besançon", 47.238, 6.024), ("Orléans", 47.903, 1.909), ("Rouen", 49.443, 1.099),
+    ("Mulhouse", 47.750, 7.336), ("Caen", 49.182, -0.371), ("Nancy", 48.692, 6.184),
+    ("Argenteuil", 48.947, 2.248), ("Montreuil", 48.864, 2.448), ("Roubaix", 50.690, 3.181),
+    ("Avignon", 43.949, 4.806), ("Poitiers", 46.580, 0.340), ("Pau", 43.295, -0.371),
+    ("La Rochelle", 46.160, -1.151), ("Calais", 50.951, 1.858), ("Ajaccio", 41.919, 8.739),
+]
+SAINTS = [
+    "Saint-Joseph", "Saint-Jean", "Saint-Martin", "Sainte-Marie", "Saint-Louis", "Saint-Pierre",
+    "Saint-Michel", "Sainte-Anne", "Saint-Paul", "Saint-Vincent", "Sainte-Catherine",
+    "Saint-Georges", "Saint-Roch", "Sainte-Thérèse", "Saint-Luc", "Saint-François",
+    "Saint-Antoine", "Sainte-Claire", "Saint-Jacques", "Saint-Benoît",
+]
+PEOPLE = [
+    "Pasteur", "Édouard Herriot", "Pierre Paul Riquet", "Bichat", "Lariboisière", "Necker",
+    "Cochin", "Foch", "Jean Verdier", "Avicenne", "Beaujon", "Ambroise Paré", "Tenon",
+    "Bretonneau", "Purpan", "Pellegrin", "Larrey", "Laennec", "Charcot", "Curie",
+]
+TOWN_SUFFIXES = ["le-Haut", "le-Bas", "en-Forêt", "la-Vallée"]
+RIVERS = ["Loire", "Marne", "Seine", "Saône", "Rhône", "Garonne", "Oise", "Meuse", "Lot", "Cher"]
+FIRSTNAMES = [
+    "Marie", "Jean", "Pierre", "Michel", "Nathalie", "Isabelle", "Philippe", "Sophie", "Alain",
+    "Nicolas", "Camille", "Léa", "Thomas", "Julie", "Lucas", "Emma", "Hugo", "Chloé", "Louis",
+    "Manon", "Gabriel", "Inès", "Arthur", "Jade", "Nathan", "Sarah", "Paul", "Laura", "Yanis",
+    "Amira",
+]
+SURNAMES = [
+    "Martin", "Bernard", "Thomas", "Petit", "Robert", "Richard", "Durand", "Dubois", "Moreau",
+    "Laurent", "Simon", "Michel", "Lefebvre", "Leroy", "Roux", "David", "Bertrand", "Morel",
+    "Fournier", "Girard", "Bonnet", "Dupont", "Lambert", "Fontaine", "Rousseau", "Vincent",
+    "Muller", "Lefèvre", "Faure", "Nguyen",
+]
+# (pattern, weight) of hospital names
+NAME_PATTERNS = [
+    ("Centre Hospitalier de {city}", 30),
+    ("Clinique {saint}", 20),
+    ("Clinique {saint} de {city}", 15),
+    ("Hôpital {person}", 15),
+    ("Polyclinique {saint}", 10),
+    ("CHU de {city}", 5),
+    ("Hôpital Privé {person} {city}", 5),
+]
+
+USER_COLUMNS = [
+    "id", "email", "password", "firstname", "surname", "createdAt", "updatedAt", "age",
+    "phoneNumber", "reservationCount", "sex", "profileCompletedAt",
+]
+HOSPITAL_COLUMNS = [
+    "id", "name", "city", "distanceKm", "latitude", "longitude", "address", "phoneNumber",
+    "email", "createdAt", "updatedAt",
+]
+STATUS_COLUMNS = [
+    "id", "hospitalId", "availableBeds", "icuBeds", "ventilators", "createdAt", "updatedAt",
+]
+APPOINTMENT_COLUMNS = [
+    "id", "userId", "hospitalId", "description", "appointmentDateTime", "status",
+    "createdAt", "updatedAt",
+]
+SEAT_COLUMNS = ["hospitalId", "slotStart", "seatNo", "appointmentId"]
+
+# A real-looking bcrypt hash; nobody logs in as a seeded user
+PASSWORD_HASH = "$2b$12$KIXxPfnK6JQm7mW0b0P4TeqZ1Q8Q6nq1d0cOe9x5a0M8rQ7d8N6mS"
+# Share of the appointments that are upcoming (the rest is history)
+FUTURE_SHARE = 0.1
+FUTURE_DAYS = 90
+# Regular users book a fifth of the appointments, popular hospitals get half
+REGULAR_USERS = (0.2, 0.05)
+POPULAR_HOSPITALS = (0.5, 0.1)
+# Let the COPYs in flight progress every this many generated rows
+YIELD_EVERY = 5000
+
+
+def zipf_cum_weights(n: int, s: float = 1.1) -> list:
+    """Cumulative weights of ranks 1..n under a Zipf law of exponent ``s``."""
+    return list(itertools.accumulate(1 / (rank ** s) for rank in range(1, n + 1)))
+
+
+class Generator:
+    """Deterministic row generator, one instance per seeding run."""
+
+    def __init__(self, seed: int, prefix: str, towns: int, days: int):
+        self.seed = seed
+        self.prefix = prefix
+        self.days = days
+        # Dates are relative to today (midnight), the rest only depends on the seed
+        today = datetime.now(timezone.utc).replace(tzinfo=None)
+        self.now = today.replace(hour=0, minute=0, second=0, microsecond=0)
+        rng = self.rng_for("cities")
+        self.cities = list(CITIES)
+        for _ in range(towns):
+            if rng.random() < 0.5:
+                name = f"{rng.choice(SAINTS)}-sur-{rng.choice(RIVERS)}"
+            else:
+                name = f"{rng.choice(SURNAMES)}ville-{rng.choice(TOWN_SUFFIXES)}"
+            self.cities.append((name, rng.uniform(43.0, 50.5), rng.uniform(-1.5, 7.0)))
+        self.city_weights = zipf_cum_weights(len(self.cities))
+        self.saint_weights = zipf_cum_weights(len(SAINTS), 1.3)
+        self.first_weights = zipf_cum_weights(len(FIRSTNAMES), 0.8)
+        self.surname_weights = zipf_cum_weights(len(SURNAMES), 0.8)
+        self.future_slots = {}  # (hospital id, slot start) -> appointment ids holding a seat
+
+    def rng_for(self, table: str) -> random.Random:
+        """Random generator of one table, unaffected by the order the tables load in."""
+        return random.Random(f"{self.seed}:{table}")
+
+    def user_id(self, i: int) -> str:
+        return f"{self.prefix}user-{i}"
+
+    def hospital_id(self, i: int) -> str:
+        return f"{self.prefix}hospital-{i}"
+
+    @staticmethod
+    def skewed(rng: random.Random, n: int, head: tuple) -> int:
+        """Index in ``range(n)``; ``head = (share, fraction)``: that share of the picks
+        falls in the first fraction of the range."""
+        share, fraction = head
+        if rng.random() < share:
+            return rng.randrange(max(1, int(n * fraction)))
+        return rng.randrange(n)
+
+    def timestamp(self, days_ago: float) -> datetime:
+        return self.now - timedelta(days=days_ago)
+
+    def users(self, n: int):
+        rng = self.rng_for("users")
+        for i in range(n):
+            firstname = rng.choices(FIRSTNAMES, cum_weights=self.first_weights)[0]
+            surname = rng.choices(SURNAMES, cum_weights=self.surname_weights)[0]
+            created = self.timestamp(rng.uniform(0, self.days))
+            completed = None
+            if rng.random() < 0.8:
+                completed = created + timedelta(minutes=rng.uniform(1, 60))
+            yield (
+                self.user_id(i),
+                f"{firstname}.{surname}.{self.prefix}{i}@example.com".lower(),
+                PASSWORD_HASH,
+                firstname,
+                surname,
+                created,
+                completed or created,
+                rng.randint(18, 95) if completed else None,
+                f"06{rng.randrange(10 ** 8):08d}" if completed else None,
+                0,
+                rng.choice(("F", "M")) if completed else None,
+                completed,
+            )
+
+    def hospitals(self, n: int):
+        rng = self.rng_for("hospitals")
+        patterns = [p for p, _ in NAME_PATTERNS]
+        pattern_weights = [w for _, w in NAME_PATTERNS]
+        for i in range(n):
+            city, lat, lon = rng.choices(self.cities, cum_weights=self.city_weights)[0]
+            name = rng.choices(patterns, pattern_weights)[0].format(
+                city=city,
+                saint=rng.choices(SAINTS, cum_weights=self.saint_weights)[0],
+                person=rng.choice(PEOPLE),
+            )
+            created = self.timestamp(rng.uniform(self.days, 2 * self.days))
+            yield (
+                self.hospital_id(i),
+                name,
+                city,
+                round(rng.uniform(0.5, 50), 1),
+                lat + rng.gauss(0, 0.05),
+                lon + rng.gauss(0, 0.05),
+                f"{rng.randint(1, 250)} rue {rng.choice(PEOPLE)}, {city}",
+                f"0{rng.randint(1, 5)}{rng.randrange(10 ** 8):08d}",
+                f"contact@{self.prefix}hospital-{i}.example.com",
+                created,
+                created,
+            )
+
+    def statuses(self, n: int, hospitals: int):
+        """Periodic reports of every hospital in turn, oldest first."""
+        rng = self.rng_for("statuses")
+        step = self.days / n
+        for i in range(n):
+            created = self.timestamp(self.days - i * step)
+            beds = rng.randint(0, 400)
+            yield (
+                f"{self.prefix}status-{i}",
+                self.hospital_id(i % hospitals),
+                beds,
+                rng.randint(0, beds // 10),
+                rng.randint(0, 20),
+                created,
+                created,
+            )
+
+    def appointments(self, n: int, users: int, hospitals: int):
+        """Appointments of heavy and occasional users, mostly in popular hospitals.
+
+        Upcoming appointments take a seat of their slot (see ``seats``); one
+        that finds its slot full becomes a past appointment instead.
+        """
+        rng = self.rng_for("appointments")
+        slots_per_day = 10 * 60 // SLOT_MINUTES  # 8:00 to 18:00
+        for i in range(n):
+            user_id = self.user_id(self.skewed(rng, users, REGULAR_USERS))
+            hospital_id = self.hospital_id(self.skewed(rng, hospitals, POPULAR_HOSPITALS))
+            appointment_id = f"{self.prefix}appointment-{i}"
+            if rng.random() < FUTURE_SHARE:
+                day = self.now + timedelta(days=rng.randint(1, FUTURE_DAYS))
+            else:
+                day = self.now - timedelta(days=rng.randint(1, self.days))
+            slot = rng.randrange(slots_per_day)
+            when = day.replace(hour=8) + timedelta(minutes=SLOT_MINUTES * slot)
+            if when > self.now:
+                holders = self.future_slots.setdefault((hospital_id, when), [])
+                if len(holders) < SLOT_CAPACITY:
+                    holders.append(appointment_id)
+                else:
+                    when -= timedelta(days=FUTURE_DAYS + 1)
+            if when > self.now:
+                status = "pending"
+            else:
+                status = rng.choices(("completed", "cancelled", "pending"), (80, 15, 5))[0]
+            created = min(when, self.now) - timedelta(days=rng.uniform(0, 30))
+            yield (
+                appointment_id, user_id, hospital_id, "Seeded appointment",
+                when, status, created, created,
+            )
+
+    def seats(self):
+        """Every seat of the upcoming slots, the first ones held by their appointments."""
+        for (hospital_id, slot), holders in self.future_slots.items():
+            for seat_no in range(1, SLOT_CAPACITY + 1):
+                holder = holders[seat_no - 1] if seat_no <= len(holders) else None
+                yield (hospital_id, slot, seat_no, holder)
+
+
+async def copy_table(table: str, columns: list, rows, total: int, batch_size: int,
+                     jobs: int, replica: bool = False) -> None:
+    """Stream ``rows`` into ``table``, one COPY (and transaction) per batch.
+
+    Rows are generated here, in order, and copied by ``jobs`` connections at
+    once: the server side of COPY (constraints, indexes) is the bottleneck.
+    With ``replica`` the connections copy as replicas (see ``REPLICA``).
+    """
+    queue: asyncio.Queue = asyncio.Queue(maxsize=jobs)
+    start = time.perf_counter()
+    copied = 0
+
+    async def produce():
+        for _ in range(0, total, batch_size):
+            batch = []
+            for i, row in enumerate(itertools.islice(rows, batch_size)):
+                batch.append(row)
+                if i % YIELD_EVERY == 0:
+                    await asyncio.sleep(0)
+            await queue.put(batch)
+        for _ in range(jobs):
+            await queue.put(None)
+
+    async def consume():
+        nonlocal copied
+        async with database.engine.connect() as conn:
+            conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+            raw = (await conn.get_raw_connection()).driver_connection
+            if replica:
+                await conn.execute(text(REPLICA))
+            try:
+                while (batch := await queue.get()) is not None:
+                    await raw.copy_records_to_table(table, columns=columns, records=batch)
+                    copied += len(batch)
+                    rate = copied / (time.perf_counter() - start)
+                    print(f"  {table:>16}: {copied:>11,}/{total:,} rows ({rate:,.0f} rows/s)")
+            finally:
+                if replica:
+                    # Back to the pool as an ordinary session
+                    await conn.execute(text("RESET session_replication_role"))
+
+    await asyncio.gather(produce(), *(consume() for _ in range(jobs)))
+
+
+# Row triggers a bulk load or clean would fire millions of times
+# (hospital_current_status_upsert, appointment_notify) are each replaced by
+# one statement afterwards. The sessions loading or deleting those rows skip
+# them by acting as replicas; unlike ALTER TABLE ... DISABLE TRIGGER, every
+# other session keeps firing them. Replicas skip foreign key checks and
+# actions too: only rows consistent by construction go through them. Needs
+# a superuser, or the SET privilege on session_replication_role (PostgreSQL 15+).
+REPLICA = "SET session_replication_role = replica"
+
+
+async def notify_appointments_changed(conn) -> None:
+    """Tell the servers' appointment caches to forget every user, as a TRUNCATE does."""
+    await conn.execute(text(
+        "SELECT pg_notify(:channel, json_build_object("
+        "'origin', current_setting('application_name'))::text)"
+    ), {"channel": database.APPOINTMENT_CHANNEL})
+
+
+async def clean(prefix: str) -> None:
+    """Delete the rows of a previous run with the same prefix."""
+    like = f"{prefix}%"
+    async with database.engine.begin() as conn:
+        for statement in (
+            # Deleted appointments would free the seats one by one (ON DELETE SET NULL)
+            'DELETE FROM "SlotSeat" WHERE "hospitalId" LIKE :like',
+            "SET LOCAL session_replication_role = replica",
+            'DELETE FROM "Appointment" WHERE "userId" LIKE :like OR "hospitalId" LIKE :like',
+            'DELETE FROM "HospitalStatus" WHERE "hospitalId" LIKE :like',
+            # The current statuses go with their hospitals (ON DELETE CASCADE)
+            "SET LOCAL session_replication_role = origin",
+            'DELETE FROM "Hospital" WHERE id LIKE :like',
+            'DELETE FROM "User" WHERE id LIKE :like',
+        ):
+            result = await conn.execute(text(statement), {"like": like})
+            if statement.startswith("DELETE"):
+                print(f"  {statement.split(None, 3)[2]:>23}: {result.rowcount:,} rows deleted")
+        await notify_appointments_changed(conn)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=10000)
+    parser.add_argument("--hospitals", type=int, default=2000)
+    parser.add_argument("--statuses", type=int, default=100000)
+    parser.add_argument("--appointments", type=int, default=50000)
+    parser.add_argument("--towns", type=int, default=2000, help="small towns after the big cities")
+    parser.add_argument("--days", type=int, default=365, help="history covered by the data")
+    parser.add_argument("--batch-size", type=int, default=50000, help="rows per COPY")
+    parser.add_argument("--jobs", type=int, default=4, help="connections copying each table")
+    parser.add_argument("--prefix", default="seed-", help="prefix of every seeded id")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--clean", action="store_true", help="delete a previous run first")
+    args = parser.parse_args()
+
+    if args.hospitals < 1 and (args.statuses or args.appointments):
+        parser.error("statuses and appointments need at least one hospital")
+    if args.users < 1 and args.appointments:
+        parser.error("appointments need at least one user")
+
+    print("\n" + "=" * 60)
+    print("SEEDING DATABASE")
+    print("=" * 60)
+    start = time.perf_counter()
+    await database.init_db()
+    if args.clean:
+        print("\nCleaning previous run...")
+        await clean(args.prefix)
+    else:
+        async with database.engine.connect() as conn:
+            seeded = await conn.scalar(text(
+                'SELECT EXISTS (SELECT 1 FROM "Hospital" WHERE id LIKE :like)'
+                ' OR EXISTS (SELECT 1 FROM "User" WHERE id LIKE :like)'
+            ), {"like": f"{args.prefix}%"})
+        if seeded:
+            raise SystemExit(f"Rows with prefix '{args.prefix}' already exist: pass --clean")
+
+    gen = Generator(args.seed, args.prefix, args.towns, args.days)
+    print("\nUsers and hospitals...")
+    await asyncio.gather(
+        copy_table("User", USER_COLUMNS, gen.users(args.users), args.users,
+                   args.batch_size, args.jobs),
+        copy_table("Hospital", HOSPITAL_COLUMNS, gen.hospitals(args.hospitals), args.hospitals,
+                   args.batch_size, args.jobs),
+    )
+
+    print("\nStatuses and appointments...")
+    # One trigger call per row would dominate the load: HospitalCurrentStatus
+    # is rebuilt once at the end instead, and the appointment caches cleared
+    await asyncio.gather(
+        copy_table("HospitalStatus", STATUS_COLUMNS,
+                   gen.statuses(args.statuses, args.hospitals),
+                   args.statuses, args.batch_size, args.jobs, replica=True),
+        copy_table("Appointment", APPOINTMENT_COLUMNS,
+                   gen.appointments(args.appointments, args.users, args.hospitals),
+                   args.appointments, args.batch_size, args.jobs, replica=True),
+    )
+    async with database.engine.begin() as conn:
+        await notify_appointments_changed(conn)
+
+    seats = len(gen.future_slots) * SLOT_CAPACITY
+    print("\nSeats of the upcoming slots...")
+    await copy_table("SlotSeat", SEAT_COLUMNS, gen.seats(), seats, args.batch_size, args.jobs)
+
+    print("\nDerived data and statistics...")
+    async with database.engine.begin() as conn:
+        await conn.execute(text("""
+            INSERT INTO "HospitalCurrentStatus"
+                ("hospitalId", "statusId", "availableBeds", "icuBeds", ventilators,
+                 "createdAt", "updatedAt")
+            SELECT DISTINCT ON ("hospitalId")
+                "hospitalId", id, "availableBeds", "icuBeds", ventilators,
+                "createdAt", "updatedAt"
+            FROM "HospitalStatus"
+            WHERE "hospitalId" LIKE :like
+            ORDER BY "hospitalId", "createdAt" DESC NULLS LAST
+            ON CONFLICT ("hospitalId") DO NOTHING
+        """), {"like": f"{args.prefix}%"})
+        await conn.execute(text("""
+            UPDATE "User" SET "reservationCount" = counts.n
+            FROM (
+                SELECT "userId", count(*) AS n FROM "Appointment"
+                WHERE "userId" LIKE :like GROUP BY "userId"
+            ) counts
+            WHERE "User".id = counts."userId"
+        """), {"like": f"{args.prefix}%"})
+    async with database.engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        for table in ("User", "Hospital", "HospitalStatus", "HospitalCurrentStatus",
+                      "Appointment", "SlotSeat"):
+            await conn.execute(text(f'ANALYZE "{table}"'))
+
+    print(f"\nSeeded in {time.perf_counter() - start:.1f}s")
+    await database.engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
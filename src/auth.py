@@ -1,8 +1,24 @@
+import asyncio
+import base64
+import hashlib
+import json
+import logging
+import time
 from os import getenv
+from typing import Dict, Optional
+
+import httpx
+from authlib.jose import JsonWebKey
 from dotenv import load_dotenv
+from fastmcp.server.auth import AccessToken
+from fastmcp.server.auth.providers.jwt import JWTVerifier
+
+from services.cache import MISSING, TTLCache
+from services.tracing import start_span
+
 load_dotenv()
 
-from fastmcp.server.auth.providers.jwt import JWTVerifier
+logger = logging.getLogger(__name__)
 
 # Define development tokens and their associated claims
 # verifier = StaticTokenVerifier(
@@ -19,11 +35,159 @@ from fastmcp.server.auth.providers.jwt import JWTVerifier
 #     required_scopes=["read:data"]
 # )
 
-verifier = JWTVerifier(
+
+class CachingJWTVerifier(JWTVerifier):
+    """JWTVerifier that remembers verified tokens and refreshes the JWKS in the background.
+
+    Verified tokens are kept in a bounded LRU keyed by the SHA-256 of the
+    token, until their ``exp`` (and at most ``token_cache_ttl`` seconds), so
+    an agent replaying the same bearer token skips signature verification.
+
+    Keys older than ``jwks_refresh`` seconds are still used while a single
+    background fetch replaces them (stale-while-revalidate). Only a token
+    signed with an unknown key id waits for a fetch, and such forced fetches
+    happen at most every ``jwks_min_refresh`` seconds. When a refresh drops
+    a key, the verified tokens are forgotten.
+
+    Tokens are checked by a plain ``JWTVerifier`` per JWKS key, through its
+    public ``verify_token``, so no FastMCP internals are overridden.
+    """
+
+    def __init__(
+        self,
+        *,
+        token_cache_size: int = 10000,
+        token_cache_ttl: float = 300.0,
+        jwks_refresh: float = 300.0,
+        jwks_min_refresh: float = 10.0,
+        **kwargs,
+    ):
+        super().__init__(**kwargs)
+        self.token_cache = TTLCache(maxsize=token_cache_size, ttl=token_cache_ttl)
+        self.jwks_refresh = jwks_refresh
+        self.jwks_min_refresh = jwks_min_refresh
+        self._jwks_keys: Dict[str, JWTVerifier] = {}
+        self._jwks_fetched_at: Optional[float] = None
+        self._jwks_fetch: Optional["asyncio.Task[None]"] = None
+
+    async def verify_token(self, token: str) -> Optional[AccessToken]:
+        """Verify a bearer token, from the cache when it was already verified."""
+        with start_span("auth.verify_token") as span:
+            key = hashlib.sha256(token.encode()).digest()
+            access_token = self.token_cache.get(key)
+            if access_token is not MISSING:
+                if access_token.expires_at is None or access_token.expires_at > time.time():
+                    span.set_attribute("auth.cached", True)
+                    return access_token
+                self.token_cache.invalidate(key)
+
+            span.set_attribute("auth.cached", False)
+            access_token = await self._verify_signed(token)
+            span.set_attribute("auth.valid", access_token is not None)
+            if access_token is not None:
+                ttl = self.token_cache.ttl
+                if access_token.expires_at is not None:
+                    ttl = min(ttl, access_token.expires_at - time.time())
+                if ttl > 0:
+                    self.token_cache.set(key, access_token, ttl=ttl)
+            return access_token
+
+    async def _verify_signed(self, token: str) -> Optional[AccessToken]:
+        """Verify ``token`` with the JWKS key it names; None if it is invalid."""
+        if self.public_key:
+            return await super().verify_token(token)
+        try:
+            verifier = await self._key_verifier(_token_kid(token))
+        except ValueError as e:
+            logger.debug(f"Token validation failed: {e}")
+            return None
+        return await verifier.verify_token(token)
+
+    async def _key_verifier(self, kid: Optional[str]) -> JWTVerifier:
+        """Pick the verifier of key ``kid``, fetching the JWKS only if it is unknown."""
+        if self._jwks_fetched_at is not None:
+            if time.monotonic() - self._jwks_fetched_at >= self.jwks_refresh:
+                # Keep serving the current keys while they are refreshed
+                self._refresh_jwks()
+            public_key = self._select_key(kid)
+            if public_key is not None:
+                return public_key
+
+        if (
+            self._jwks_fetched_at is None
+            or time.monotonic() - self._jwks_fetched_at >= self.jwks_min_refresh
+        ):
+            await asyncio.shield(self._refresh_jwks())
+            public_key = self._select_key(kid)
+            if public_key is not None:
+                return public_key
+
+        if kid:
+            raise ValueError(f"Key ID '{kid}' not found in JWKS")
+        raise ValueError("No key ID (kid) in token and JWKS does not hold exactly one key")
+
+    def _select_key(self, kid: Optional[str]) -> Optional[JWTVerifier]:
+        if kid:
+            return self._jwks_keys.get(kid)
+        if len(self._jwks_keys) == 1:
+            return next(iter(self._jwks_keys.values()))
+        return None
+
+    def _refresh_jwks(self) -> "asyncio.Task[None]":
+        """Start fetching the JWKS unless a fetch is already running; return it."""
+        fetch = self._jwks_fetch
+        if fetch is None or fetch.done() or fetch.get_loop() is not asyncio.get_running_loop():
+            fetch = self._jwks_fetch = asyncio.ensure_future(self._fetch_jwks())
+            # Retrieve the error of fetches nobody awaits; it is already logged
+            fetch.add_done_callback(lambda task: task.cancelled() or task.exception())
+        return fetch
+
+    async def _fetch_jwks(self) -> None:
+        try:
+            async with httpx.AsyncClient() as client:
+                response = await client.get(self.jwks_uri)
+                response.raise_for_status()
+                jwks_data = response.json()
+
+            keys = {}
+            for key_data in jwks_data.get("keys", []):
+                keys[key_data.get("kid") or "_default"] = JWTVerifier(
+                    public_key=JsonWebKey.import_key(key_data).as_pem(is_private=False).decode(),
+                    issuer=self.issuer,
+                    audience=self.audience,
+                    algorithm=self.algorithm,
+                    required_scopes=self.required_scopes,
+                )
+        except Exception as e:
+            # Keep the previous keys; the next lookup tries again
+            logger.warning(f"Failed to fetch JWKS from {self.jwks_uri}: {e}")
+            self._jwks_fetched_at = time.monotonic()
+            raise ValueError(f"Failed to fetch JWKS: {e}") from e
+
+        if self._jwks_keys.keys() - keys.keys():
+            # A key was revoked: tokens it signed must be verified again
+            self.token_cache.clear()
+        self._jwks_keys = keys
+        self._jwks_fetched_at = time.monotonic()
+
+
+def _token_kid(token: str) -> Optional[str]:
+    """The key id in the (unverified) header of a JWT."""
+    header = token.split(".", 1)[0]
+    try:
+        return json.loads(base64.urlsafe_b64decode(header + "=" * (-len(header) % 4))).get("kid")
+    except (ValueError, AttributeError) as e:
+        raise ValueError(f"Malformed token header: {e}") from e
+
+
+verifier = CachingJWTVerifier(
     public_key=None,
     jwks_uri=f"{getenv('AUTH_BASE_URL', 'http://localhost:3000')}/.well-known/jwks.json",
     issuer=getenv("AUTH_JWT_ISSUER", 'hospiai-api'),
     audience=getenv("AUTH_JWT_AUDIENCE", 'hospiai-mcp'),
     algorithm="RS256",
-    required_scopes=["read:data"]
+    required_scopes=["read:data"],
+    token_cache_size=int(getenv("AUTH_TOKEN_CACHE_SIZE", "10000")),
+    token_cache_ttl=float(getenv("AUTH_TOKEN_CACHE_TTL", "300")),
+    jwks_refresh=float(getenv("AUTH_JWKS_REFRESH", "300")),
 )
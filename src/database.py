@@ -1,85 +1,296 @@
 """Database configuration and session management."""
 
+import hashlib
+import itertools
+import logging
 import os
+import uuid
 from contextlib import asynccontextmanager
-from typing import AsyncGenerator
+from typing import AsyncGenerator, Dict, List, Optional
 from urllib.parse import parse_qs, urlencode, urlparse, urlunparse
 
 from dotenv import load_dotenv
 from sqlalchemy import text
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.exc import ProgrammingError
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
 from sqlalchemy.orm import declarative_base
+from sqlalchemy.schema import CreateIndex, CreateTable
+
+from services import metrics, tracing
+from services.cache import MISSING, TTLCache
+from services.db_pool import InstrumentedPool, instrument
+
+logger = logging.getLogger(__name__)
 
 # Load environment variables
 load_dotenv()
 
-# Get database URL from environment
+# Get database URL from environment (checked when the engine is created)
 DATABASE_URL = os.getenv("DATABASE_URL")
 
-if not DATABASE_URL:
-    raise ValueError("DATABASE_URL environment variable is not set")
-
-# Parse and clean the URL for asyncpg compatibility
-parsed = urlparse(DATABASE_URL)
-query_params = parse_qs(parsed.query)
-
-# Remove sslmode and channel_binding from query params (not compatible with asyncpg)
-query_params.pop('sslmode', None)
-query_params.pop('channel_binding', None)
-
-# Flatten query params (parse_qs returns lists)
-clean_query = urlencode({k: v[0] for k, v in query_params.items()})
-
-# Reconstruct URL
-clean_url = urlunparse((
-    parsed.scheme,
-    parsed.netloc,
-    parsed.path,
-    parsed.params,
-    clean_query,
-    parsed.fragment
-))
-
-# Convert postgresql:// to postgresql+asyncpg:// if needed
-if clean_url.startswith("postgresql://"):
-    DATABASE_URL = clean_url.replace("postgresql://", "postgresql+asyncpg://", 1)
-elif not clean_url.startswith("postgresql+asyncpg://"):
-    DATABASE_URL = f"postgresql+asyncpg://{clean_url}"
-else:
-    DATABASE_URL = clean_url
-
-# Create async engine with SSL enabled
-engine = create_async_engine(
-    DATABASE_URL,
-    echo=False,  # Set to True for SQL query logging
-    pool_pre_ping=True,  # Verify connections before using them
-    pool_size=10,
-    max_overflow=20,
-    connect_args={
-        "ssl": "require",  # Enable SSL for NeonDB
-    }
+# Optional comma-separated read replica URLs, used by read-only sessions
+DATABASE_READ_URLS = [
+    url.strip() for url in os.getenv("DATABASE_READ_URL", "").split(",") if url.strip()
+]
+
+# After writing, a user's reads stay on the primary for this long (replication lag)
+READ_STICKY_SECONDS = float(os.getenv("DATABASE_READ_STICKY_SECONDS", "10"))
+
+# Connection pool of each engine
+POOL_SIZE = int(os.getenv("DATABASE_POOL_SIZE", "10"))
+POOL_MAX_OVERFLOW = int(os.getenv("DATABASE_MAX_OVERFLOW", "20"))
+POOL_TIMEOUT = float(os.getenv("DATABASE_POOL_TIMEOUT", "30"))
+POOL_RECYCLE = int(os.getenv("DATABASE_POOL_RECYCLE", "-1"))
+POOL_PRE_PING = os.getenv("DATABASE_POOL_PRE_PING", "true").lower() == "true"
+POOL_USE_LIFO = os.getenv("DATABASE_POOL_USE_LIFO", "false").lower() == "true"
+# Adaptive mode resizes each pool to the concurrency observed every interval
+POOL_ADAPTIVE = os.getenv("DATABASE_POOL_ADAPTIVE", "false").lower() == "true"
+POOL_MIN_SIZE = int(os.getenv("DATABASE_POOL_MIN_SIZE", "2"))
+POOL_MAX_SIZE = int(os.getenv("DATABASE_POOL_MAX_SIZE", "50"))
+POOL_ADAPT_INTERVAL = float(os.getenv("DATABASE_POOL_ADAPT_INTERVAL", "30"))
+
+# Prepared statements kept per connection, so repeated queries skip the PREPARE round trip
+STATEMENT_CACHE_SIZE = int(os.getenv("DATABASE_STATEMENT_CACHE_SIZE", "100"))
+# Behind pgbouncer in transaction mode a server connection can change between
+# statements: prepared statements get unique names and are never reused
+PGBOUNCER = os.getenv("DATABASE_PGBOUNCER", "false").lower() == "true"
+
+# Similarity the pg_trgm % pre-filter of the fuzzy lookups requires (pg_trgm's
+# default 0.3 misses one typo in a four-letter name, which scores 0.25)
+TRGM_SIMILARITY_THRESHOLD = float(os.getenv("DATABASE_TRGM_SIMILARITY_THRESHOLD", "0.25"))
+
+# Unique per process, so NOTIFY listeners can tell their own process's writes apart
+APPLICATION_NAME = (
+    f"{os.getenv('DATABASE_APPLICATION_NAME', 'carestral-mcp')}:{uuid.uuid4().hex[:12]}"
 )
 
-# Create async session factory
+
+def _asyncpg_url(url: str) -> str:
+    """Clean a postgres URL for asyncpg."""
+    # Parse and clean the URL for asyncpg compatibility
+    parsed = urlparse(url)
+    query_params = parse_qs(parsed.query)
+
+    # Remove sslmode and channel_binding from query params (not compatible with asyncpg)
+    query_params.pop('sslmode', None)
+    query_params.pop('channel_binding', None)
+
+    # Flatten query params (parse_qs returns lists)
+    clean_query = urlencode({k: v[0] for k, v in query_params.items()})
+
+    # Reconstruct URL
+    clean_url = urlunparse((
+        parsed.scheme,
+        parsed.netloc,
+        parsed.path,
+        parsed.params,
+        clean_query,
+        parsed.fragment
+    ))
+
+    # Convert postgresql:// to postgresql+asyncpg:// if needed
+    if clean_url.startswith("postgresql://"):
+        return clean_url.replace("postgresql://", "postgresql+asyncpg://", 1)
+    elif not clean_url.startswith("postgresql+asyncpg://"):
+        return f"postgresql+asyncpg://{clean_url}"
+    return clean_url
+
+
+def _statement_cache_args() -> dict:
+    """asyncpg connect arguments configuring the prepared statement caches."""
+    if PGBOUNCER:
+        return {
+            "statement_cache_size": 0,
+            "prepared_statement_cache_size": 0,
+            "prepared_statement_name_func": lambda: f"__asyncpg_{uuid.uuid4()}__",
+        }
+    return {
+        # asyncpg's own cache, used by the driver's fetch/execute calls
+        "statement_cache_size": STATEMENT_CACHE_SIZE,
+        # SQLAlchemy's cache, used by every statement it executes
+        "prepared_statement_cache_size": STATEMENT_CACHE_SIZE,
+    }
+
+
+def _create_engine(url: str, name: str) -> AsyncEngine:
+    """Create an async engine with SSL enabled and an instrumented pool."""
+    new_engine = create_async_engine(
+        url,
+        echo=False,  # Set to True for SQL query logging
+        poolclass=InstrumentedPool,
+        pool_pre_ping=POOL_PRE_PING,  # Verify connections before using them
+        pool_size=POOL_SIZE,
+        max_overflow=POOL_MAX_OVERFLOW,
+        pool_timeout=POOL_TIMEOUT,
+        pool_recycle=POOL_RECYCLE,
+        pool_use_lifo=POOL_USE_LIFO,
+        connect_args={
+            "ssl": "require",  # Enable SSL for NeonDB
+            "server_settings": {
+                "application_name": APPLICATION_NAME,
+                "pg_trgm.similarity_threshold": str(TRGM_SIMILARITY_THRESHOLD),
+            },
+            **_statement_cache_args(),
+        }
+    )
+    instrument(new_engine, name)
+    metrics.instrument_engine(new_engine)
+    tracing.instrument_engine(new_engine)
+    return new_engine
+
+
+if DATABASE_URL:
+    DATABASE_URL = _asyncpg_url(DATABASE_URL)
+
+
+def _create_primary_engine() -> AsyncEngine:
+    if not DATABASE_URL:
+        raise ValueError("DATABASE_URL environment variable is not set")
+    return _create_engine(DATABASE_URL, "primary")
+
+
+def _create_read_engines() -> List[AsyncEngine]:
+    return [
+        _create_engine(_asyncpg_url(url), f"replica{i}")
+        for i, url in enumerate(DATABASE_READ_URLS)
+    ]
+
+
+# Engines are created on first use rather than on import (see __getattr__):
+#   engine        primary engine, for every write and reads that must see the latest data
+#   read_engines  replica engines, empty when no DATABASE_READ_URL is configured
+_LAZY_ENGINES = {
+    "engine": _create_primary_engine,
+    "read_engines": _create_read_engines,
+}
+
+
+def __getattr__(name: str):
+    factory = _LAZY_ENGINES.get(name)
+    if factory is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = globals()[name] = factory()
+    return value
+
+
+def get_engine() -> AsyncEngine:
+    """The primary engine, created on first use."""
+    primary = globals().get("engine")
+    return primary if primary is not None else __getattr__("engine")
+
+
+def get_read_engines() -> List[AsyncEngine]:
+    """The replica engines, created on first use."""
+    engines = globals().get("read_engines")
+    return engines if engines is not None else __getattr__("read_engines")
+
+
+# Create async session factory; get_db binds each session to its engine
 AsyncSessionLocal = async_sessionmaker(
-    engine,
     class_=AsyncSession,
     expire_on_commit=False,
     autocommit=False,
     autoflush=False,
 )
 
+# Users who wrote recently, whose reads must not go to a lagging replica
+_recent_writers = TTLCache(maxsize=100000, ttl=READ_STICKY_SECONDS)
+_read_turn = itertools.count()
+
 # Create declarative base for models
 Base = declarative_base()
 
+# Postgres NOTIFY channel raised whenever the "Hospital" table changes
+HOSPITAL_CATALOG_CHANNEL = "hospital_catalog"
+# Postgres NOTIFY channel raised with the user and application_name of every
+# "Appointment" row change
+APPOINTMENT_CHANNEL = "appointment_changes"
+
+# Appointments are booked in fixed time slots holding a limited number of seats
+SLOT_MINUTES = int(os.getenv("APPOINTMENT_SLOT_MINUTES", "30"))
+SLOT_CAPACITY = int(os.getenv("APPOINTMENT_SLOT_CAPACITY", "4"))
+
+
+def pool_stats() -> dict:
+    """Metrics of the connection pool of every engine, by engine name."""
+    return {
+        e.pool.metrics.name: e.pool.metrics.snapshot()
+        for e in [get_engine(), *get_read_engines()]
+        if getattr(e.pool, "metrics", None) is not None
+    }
+
+
+def stick_to_primary(user_id: str) -> None:
+    """Send the reads of ``user_id`` to the primary for the next ``READ_STICKY_SECONDS``."""
+    if get_read_engines():
+        _recent_writers.set(user_id, True)
+
+
+def route_engine(readonly: bool = False, user_id: Optional[str] = None) -> AsyncEngine:
+    """Pick the engine a session should use.
+
+    Writes go to the primary. Reads go to the replica with the fewest
+    connections checked out (round-robin among equals), unless ``user_id``
+    wrote in the last ``READ_STICKY_SECONDS``, so users always read their
+    own writes.
+    """
+    replicas = get_read_engines()
+    if not readonly or not replicas:
+        return get_engine()
+    if user_id is not None and _recent_writers.get(user_id) is not MISSING:
+        return get_engine()
+
+    turn = next(_read_turn) % len(replicas)
+    candidates = replicas[turn:] + replicas[:turn]
+    return min(candidates, key=lambda e: e.pool.checkedout())
+
+
+# Autocommit views of the engines, sharing their pools, for read-only sessions
+_autocommit_engines: Dict[AsyncEngine, AsyncEngine] = {}
+
+
+def _autocommit(engine: AsyncEngine) -> AsyncEngine:
+    autocommit = _autocommit_engines.get(engine)
+    if autocommit is None:
+        autocommit = engine.execution_options(isolation_level="AUTOCOMMIT")
+        _autocommit_engines[engine] = autocommit
+    return autocommit
+
 
 @asynccontextmanager
-async def get_db() -> AsyncGenerator[AsyncSession, None]:
-    """Get database session."""
-    async with AsyncSessionLocal() as session:
+async def get_db(
+    readonly: bool = False, user_id: Optional[str] = None
+) -> AsyncGenerator[AsyncSession, None]:
+    """Get database session.
+
+    A ``readonly`` session may be served by a read replica (see
+    ``route_engine``) and runs every statement in autocommit mode: no
+    BEGIN/COMMIT round trips, and nothing to commit or roll back when it is
+    closed. Each statement sees its own snapshot, and writes made through it
+    are not transactional, so only use it for reads. Like any session, it
+    only takes a pool connection when it runs its first statement.
+
+    ``user_id`` is the user the session acts for: committing a regular
+    session keeps that user's next reads on the primary.
+    """
+    if readonly:
+        async with AsyncSessionLocal(bind=_autocommit(route_engine(True, user_id))) as session:
+            yield session
+        return
+
+    async with AsyncSessionLocal(bind=get_engine()) as session:
         try:
             yield session
-            await session.commit()
+            with tracing.start_span("db.commit"):
+                await session.commit()
+            if user_id is not None:
+                stick_to_primary(user_id)
         except Exception:
             await session.rollback()
             raise
@@ -87,8 +298,250 @@ async def get_db() -> AsyncGenerator[AsyncSession, None]:
             await session.close()
 
 
-async def init_db():
-    """Initialize database tables and extensions."""
-    async with engine.begin() as conn:
-        await conn.execute(text("CREATE EXTENSION IF NOT EXISTS fuzzystrmatch"))
+# Schema objects the ORM models do not describe, created by init_db after the
+# tables. Every statement is idempotent.
+SCHEMA_DDL = [
+    "CREATE EXTENSION IF NOT EXISTS fuzzystrmatch",
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+
+    # Coordinates used by the nearest-hospital search, on tables created before them
+    'ALTER TABLE "Hospital" ADD COLUMN IF NOT EXISTS latitude double precision',
+    'ALTER TABLE "Hospital" ADD COLUMN IF NOT EXISTS longitude double precision',
+
+    # Trigram indexes backing the fuzzy name/city pre-filter in db_service
+    'CREATE INDEX IF NOT EXISTS "ix_Hospital_name_trgm" '
+    'ON "Hospital" USING gin (lower(name) gin_trgm_ops)',
+    'CREATE INDEX IF NOT EXISTS "ix_Hospital_city_trgm" '
+    'ON "Hospital" USING gin (lower(city) gin_trgm_ops)',
+
+    # Keyset pagination of a user's appointments (newest first)
+    'CREATE INDEX IF NOT EXISTS "ix_Appointment_userId_createdAt" '
+    'ON "Appointment" ("userId", "createdAt" DESC, id DESC)',
+
+    # Deleting an appointment frees its seat (ON DELETE SET NULL): without
+    # this index, every deleted appointment scans the whole seat table
+    'CREATE INDEX IF NOT EXISTS "ix_SlotSeat_appointmentId" ON "SlotSeat" ("appointmentId")',
+    # Appointments booked before their slot had seats, while seats were created
+    # empty, hold none: give them the free seats of their slot, oldest first
+    f"""
+        WITH unseated AS (
+            SELECT id, "hospitalId", "slotStart",
+                   row_number() OVER (
+                       PARTITION BY "hospitalId", "slotStart" ORDER BY "createdAt", id
+                   ) AS n
+            FROM (
+                SELECT a.id, a."hospitalId", a."createdAt",
+                       date_trunc('day', a."appointmentDateTime") + floor(
+                           extract(epoch FROM a."appointmentDateTime"
+                                   - date_trunc('day', a."appointmentDateTime"))
+                           / {SLOT_MINUTES * 60}
+                       ) * interval '{SLOT_MINUTES} minutes' AS "slotStart"
+                FROM "Appointment" a
+                WHERE NOT EXISTS (SELECT 1 FROM "SlotSeat" s WHERE s."appointmentId" = a.id)
+            ) appointments
+        ), free AS (
+            SELECT "hospitalId", "slotStart", "seatNo",
+                   row_number() OVER (
+                       PARTITION BY "hospitalId", "slotStart" ORDER BY "seatNo"
+                   ) AS n
+            FROM "SlotSeat"
+            WHERE "appointmentId" IS NULL
+        )
+        UPDATE "SlotSeat" s SET "appointmentId" = unseated.id
+        FROM free JOIN unseated USING ("hospitalId", "slotStart", n)
+        WHERE s."hospitalId" = free."hospitalId"
+          AND s."slotStart" = free."slotStart"
+          AND s."seatNo" = free."seatNo"
+    """,
+
+    # One row per hospital with its latest status, kept current by a trigger.
+    # Removing the status a row shows (DELETE, or an UPDATE moving it to
+    # another hospital) falls back to the latest remaining one, if any.
+    'CREATE INDEX IF NOT EXISTS "ix_HospitalStatus_hospitalId_createdAt" '
+    'ON "HospitalStatus" ("hospitalId", "createdAt" DESC)',
+    """
+        CREATE OR REPLACE FUNCTION hospital_current_status_upsert() RETURNS trigger AS $$
+        DECLARE
+            removed boolean := TG_OP = 'DELETE';
+        BEGIN
+            IF TG_OP = 'UPDATE' THEN
+                removed := OLD."hospitalId" IS DISTINCT FROM NEW."hospitalId";
+            END IF;
+            IF removed THEN
+                DELETE FROM "HospitalCurrentStatus"
+                WHERE "hospitalId" = OLD."hospitalId" AND "statusId" = OLD.id;
+                IF FOUND THEN
+                    INSERT INTO "HospitalCurrentStatus"
+                        ("hospitalId", "statusId", "availableBeds", "icuBeds", ventilators,
+                         "createdAt", "updatedAt")
+                    SELECT "hospitalId", id, "availableBeds", "icuBeds", ventilators,
+                           "createdAt", "updatedAt"
+                    FROM "HospitalStatus"
+                    WHERE "hospitalId" = OLD."hospitalId"
+                    ORDER BY "createdAt" DESC NULLS LAST
+                    LIMIT 1
+                    ON CONFLICT ("hospitalId") DO NOTHING;
+                END IF;
+            END IF;
+            IF TG_OP = 'DELETE' THEN
+                RETURN NULL;
+            END IF;
+
+            INSERT INTO "HospitalCurrentStatus" AS current
+                ("hospitalId", "statusId", "availableBeds", "icuBeds", ventilators,
+                 "createdAt", "updatedAt")
+            VALUES (NEW."hospitalId", NEW.id, NEW."availableBeds", NEW."icuBeds",
+                    NEW.ventilators, NEW."createdAt", NEW."updatedAt")
+            ON CONFLICT ("hospitalId") DO UPDATE SET
+                "statusId" = EXCLUDED."statusId",
+                "availableBeds" = EXCLUDED."availableBeds",
+                "icuBeds" = EXCLUDED."icuBeds",
+                ventilators = EXCLUDED.ventilators,
+                "createdAt" = EXCLUDED."createdAt",
+                "updatedAt" = EXCLUDED."updatedAt"
+            WHERE current."statusId" = EXCLUDED."statusId"
+               OR current."createdAt" IS NULL
+               OR EXCLUDED."createdAt" >= current."createdAt";
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """,
+    'DROP TRIGGER IF EXISTS hospital_current_status_upsert ON "HospitalStatus"',
+    """
+        CREATE TRIGGER hospital_current_status_upsert
+        AFTER INSERT OR UPDATE OR DELETE ON "HospitalStatus"
+        FOR EACH ROW EXECUTE FUNCTION hospital_current_status_upsert()
+    """,
+    """
+        INSERT INTO "HospitalCurrentStatus"
+            ("hospitalId", "statusId", "availableBeds", "icuBeds", ventilators,
+             "createdAt", "updatedAt")
+        SELECT DISTINCT ON ("hospitalId")
+            "hospitalId", id, "availableBeds", "icuBeds", ventilators,
+            "createdAt", "updatedAt"
+        FROM "HospitalStatus"
+        ORDER BY "hospitalId", "createdAt" DESC NULLS LAST
+        ON CONFLICT ("hospitalId") DO NOTHING
+    """,
+
+    # Notify cache listeners (see db_service.listen_for_catalog_changes)
+    f"""
+        CREATE OR REPLACE FUNCTION hospital_catalog_notify() RETURNS trigger AS $$
+        BEGIN
+            PERFORM pg_notify('{HOSPITAL_CATALOG_CHANNEL}', TG_OP);
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """,
+    'DROP TRIGGER IF EXISTS hospital_catalog_notify ON "Hospital"',
+    """
+        CREATE TRIGGER hospital_catalog_notify
+        AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON "Hospital"
+        FOR EACH STATEMENT EXECUTE FUNCTION hospital_catalog_notify()
+    """,
+
+    # Notify appointment cache listeners (see db_service.listen_for_appointment_changes);
+    # a TRUNCATE names no user. Identical notifications of a transaction are sent once.
+    f"""
+        CREATE OR REPLACE FUNCTION appointment_notify() RETURNS trigger AS $$
+        DECLARE
+            origin text := current_setting('application_name');
+        BEGIN
+            IF TG_OP = 'TRUNCATE' THEN
+                PERFORM pg_notify('{APPOINTMENT_CHANNEL}',
+                                  json_build_object('origin', origin)::text);
+                RETURN NULL;
+            END IF;
+            IF TG_OP <> 'INSERT' THEN
+                PERFORM pg_notify('{APPOINTMENT_CHANNEL}',
+                                  json_build_object('user', OLD."userId", 'origin', origin)::text);
+            END IF;
+            IF TG_OP <> 'DELETE' THEN
+                PERFORM pg_notify('{APPOINTMENT_CHANNEL}',
+                                  json_build_object('user', NEW."userId", 'origin', origin)::text);
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """,
+    'DROP TRIGGER IF EXISTS appointment_notify ON "Appointment"',
+    """
+        CREATE TRIGGER appointment_notify
+        AFTER INSERT OR UPDATE OR DELETE ON "Appointment"
+        FOR EACH ROW EXECUTE FUNCTION appointment_notify()
+    """,
+    'DROP TRIGGER IF EXISTS appointment_truncate_notify ON "Appointment"',
+    """
+        CREATE TRIGGER appointment_truncate_notify
+        AFTER TRUNCATE ON "Appointment"
+        FOR EACH STATEMENT EXECUTE FUNCTION appointment_notify()
+    """,
+]
+
+# Fingerprint of the schema init_db last applied, in a one-row table
+SCHEMA_FINGERPRINT_DDL = (
+    'CREATE TABLE IF NOT EXISTS "SchemaFingerprint" '
+    '(fingerprint text NOT NULL, "appliedAt" timestamp NOT NULL DEFAULT now())'
+)
+# pg_advisory_xact_lock key serializing init_db across server instances
+SCHEMA_LOCK_KEY = 0x636172657374  # "carest"
+
+
+def schema_fingerprint() -> str:
+    """Hash of the schema init_db creates: the ORM tables and indexes, and SCHEMA_DDL."""
+    dialect = postgresql.dialect()
+    parts = []
+    for table in Base.metadata.sorted_tables:
+        parts.append(str(CreateTable(table).compile(dialect=dialect)))
+        for index in sorted(table.indexes, key=lambda i: i.name or ""):
+            parts.append(str(CreateIndex(index).compile(dialect=dialect)))
+    parts.extend(SCHEMA_DDL)
+    return hashlib.sha256("\n".join(parts).encode()).hexdigest()
+
+
+async def applied_schema_fingerprint() -> Optional[str]:
+    """Fingerprint stored by the last init_db, None if it never ran."""
+    async with get_engine().connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        try:
+            return await conn.scalar(text('SELECT fingerprint FROM "SchemaFingerprint"'))
+        except ProgrammingError:
+            # No "SchemaFingerprint" table yet
+            return None
+
+
+async def init_db(force: bool = False) -> bool:
+    """Initialize database tables and extensions; return whether any DDL ran.
+
+    Nothing is done when the schema is already current, i.e. its stored
+    fingerprint matches ``schema_fingerprint()``: one query on a warm
+    database instead of a few dozen DDL round trips on every boot. Pass
+    ``force`` to run the DDL anyway, e.g. after changing the schema by hand.
+    """
+    # Registers the tables on Base (the models import this module)
+    import models.orm_models  # noqa: F401
+
+    fingerprint = schema_fingerprint()
+    if not force and await applied_schema_fingerprint() == fingerprint:
+        logger.info("Database schema is current")
+        return False
+
+    async with get_engine().begin() as conn:
+        # Instances booting together wait for the first one, then find the schema current
+        await conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": SCHEMA_LOCK_KEY})
+        await conn.execute(text(SCHEMA_FINGERPRINT_DDL))
+        applied = await conn.scalar(text('SELECT fingerprint FROM "SchemaFingerprint"'))
+        if not force and applied == fingerprint:
+            return False
+
         await conn.run_sync(Base.metadata.create_all)
+        for statement in SCHEMA_DDL:
+            await conn.execute(text(statement))
+
+        await conn.execute(text('DELETE FROM "SchemaFingerprint"'))
+        await conn.execute(
+            text('INSERT INTO "SchemaFingerprint" (fingerprint) VALUES (:fingerprint)'),
+            {"fingerprint": fingerprint},
+        )
+    logger.info("Database schema created or updated")
+    return True
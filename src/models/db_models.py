@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 
 from pydantic import BaseModel
 
@@ -24,6 +24,8 @@ class Hospital(BaseModel):
     name: str
     city: Optional[str] = None
     distanceKm: Optional[float] = None
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
     address: Optional[str] = None
     phoneNumber: Optional[str] = None
     email: Optional[str] = None
@@ -34,6 +36,18 @@ class Hospital(BaseModel):
     updatedAt: Optional[datetime] = None
 
 
+class HospitalPage(BaseModel):
+    """One page of hospitals, with the cursor of the next page if any"""
+    hospitals: List[Hospital]
+    next_cursor: Optional[str] = None
+
+
+class HospitalBatch(BaseModel):
+    """Hospitals found for a list of ids, and the ids that do not exist"""
+    hospitals: List[Hospital]
+    not_found: List[str] = []
+
+
 class AppointmentRequest(BaseModel):
     """Request model for creating appointments"""
     hospital_name: str
@@ -51,6 +51,8 @@ class Hospital(Base):
     name = Column(Text, nullable=False)
     city = Column(Text)
     distanceKm = Column(Double)
+    latitude = Column(Double)
+    longitude = Column(Double)
     address = Column(Text)
     phoneNumber = Column(Text)
     email = Column(Text)
@@ -60,6 +62,9 @@ class Hospital(Base):
     # Relationships
     appointments = relationship("Appointment", back_populates="hospital")
     hospital_statuses = relationship("HospitalStatus", back_populates="hospital")
+    current_status = relationship(
+        "HospitalCurrentStatus", back_populates="hospital", uselist=False
+    )
 
 
 class Appointment(Base):
@@ -100,6 +105,47 @@ class HospitalStatus(Base):
     hospital = relationship("Hospital", back_populates="hospital_statuses")
 
 
+class HospitalCurrentStatus(Base):
+    """Latest HospitalStatus of each hospital.
+
+    Maintained by a trigger on "HospitalStatus" (see database.init_db).
+    """
+
+    __tablename__ = "HospitalCurrentStatus"
+    __table_args__ = {'extend_existing': True}
+
+    hospitalId = Column(  # noqa: N815
+        Text, ForeignKey("Hospital.id", ondelete="CASCADE"), primary_key=True
+    )
+    statusId = Column(Text, nullable=False)  # noqa: N815
+    availableBeds = Column(Integer)  # noqa: N815
+    icuBeds = Column(Integer)  # noqa: N815
+    ventilators = Column(Integer)
+    createdAt = Column(DateTime)  # noqa: N815
+    updatedAt = Column(DateTime)  # noqa: N815
+
+    # Relationships
+    hospital = relationship("Hospital", back_populates="current_status")
+
+
+class SlotSeat(Base):
+    """One bookable seat of a hospital time slot.
+
+    A slot has as many seats as appointments it can take; booking claims a
+    free seat with SELECT ... FOR UPDATE SKIP LOCKED (see db_service).
+    """
+
+    __tablename__ = "SlotSeat"
+    __table_args__ = {'extend_existing': True}
+
+    hospitalId = Column(  # noqa: N815
+        Text, ForeignKey("Hospital.id", ondelete="CASCADE"), primary_key=True
+    )
+    slotStart = Column(DateTime, primary_key=True)  # noqa: N815
+    seatNo = Column(Integer, primary_key=True)  # noqa: N815
+    appointmentId = Column(Text, ForeignKey("Appointment.id", ondelete="SET NULL"))  # noqa: N815
+
+
 class MCP(Base):
     """MCP model."""
 
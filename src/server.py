@@ -1,74 +1,202 @@
 """Carestral MCP Server - Main server implementation."""
 
+import asyncio
 import logging
-from typing import List
+import os
+from contextlib import asynccontextmanager
+from typing import Any, Awaitable, Callable, List, Optional
 
 import fastmcp.server.dependencies
 from fastmcp import Context, FastMCP
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+from starlette.requests import Request
+from starlette.responses import Response
 
 from auth import verifier
-from database import engine, get_db, init_db
-from models.db_models import AppointmentRequest, Hospital
+from database import (
+    POOL_ADAPT_INTERVAL,
+    POOL_ADAPTIVE,
+    POOL_MAX_SIZE,
+    POOL_MIN_SIZE,
+    get_db,
+    get_engine,
+    get_read_engines,
+    init_db,
+    pool_stats,
+)
+from models.db_models import AppointmentRequest, Hospital, HospitalBatch, HospitalPage
 from services import db_service
+from services.admission import AdmissionMiddleware
+from services.cache import MISSING
+from services.db_pool import adapt_pool_size
+from services.metrics import StatsCollector, ToolMetricsMiddleware, registry
+from services.payloads import Payload
+from services.tracing import ToolTracingMiddleware, configure_tracing_from_env, shutdown_tracing
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 logging.getLogger("fastmcp.server.auth").setLevel(logging.DEBUG)
-mcp = FastMCP("mcp-carestral", auth=verifier)
 
+configure_tracing_from_env()
+
+
+@asynccontextmanager
+async def lifespan(server: FastMCP):
+    """Run background tasks for the lifetime of the server."""
+    tasks = [
+        asyncio.create_task(db_service.refresh_hospital_indexes_periodically(
+            float(os.getenv("HOSPITAL_NAME_INDEX_REFRESH", "60"))
+        )),
+    ]
+    if os.getenv("HOSPITAL_CACHE_LISTEN", "false").lower() == "true":
+        # Push invalidation of the hospital cache through LISTEN/NOTIFY
+        tasks.append(asyncio.create_task(db_service.listen_for_catalog_changes()))
+    if os.getenv("APPOINTMENT_CACHE_LISTEN", "true").lower() == "true":
+        # Drop cached appointments changed by other processes (LISTEN/NOTIFY)
+        tasks.append(asyncio.create_task(db_service.listen_for_appointment_changes()))
+    if POOL_ADAPTIVE:
+        # Size every connection pool from the observed concurrency
+        tasks.extend(
+            asyncio.create_task(adapt_pool_size(
+                e, POOL_ADAPT_INTERVAL, POOL_MIN_SIZE, POOL_MAX_SIZE
+            ))
+            for e in [get_engine(), *get_read_engines()]
+        )
 
-@mcp.tool
-async def list_hospitals() -> List[Hospital]:
-    """List all hospitals available."""
+    try:
+        yield {}
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        shutdown_tracing()
+
+
+mcp = FastMCP("mcp-carestral", auth=verifier, lifespan=lifespan)
+mcp.add_middleware(ToolTracingMiddleware())
+mcp.add_middleware(ToolMetricsMiddleware())
+
+
+def _primary_checkout_wait() -> float:
+    metrics = getattr(get_engine().pool, "metrics", None)
+    return metrics.recent_wait() if metrics is not None else 0.0
+
+
+# Per-client budgets of calls (a rate of 0 disables the limit); reads are shed
+# while checkouts of the primary pool wait longer than ADMISSION_SHED_WAIT seconds
+admission = AdmissionMiddleware(
+    booking_tools={"create_rdv", "create_rdvs"},
+    read_rate=float(os.getenv("ADMISSION_READ_RATE", "50")),
+    read_burst=float(os.getenv("ADMISSION_READ_BURST", "100")),
+    booking_rate=float(os.getenv("ADMISSION_BOOKING_RATE", "2")),
+    booking_burst=float(os.getenv("ADMISSION_BOOKING_BURST", "10")),
+    shed_wait=float(os.getenv("ADMISSION_SHED_WAIT", "0.5")),
+    checkout_wait=_primary_checkout_wait,
+)
+mcp.add_middleware(admission)
+
+registry.register(StatsCollector(
+    "cache", "cache",
+    lambda: {
+        **db_service.hospital_cache_stats(),
+        "appointment": db_service.appointment_cache.stats(),
+        "auth_token": verifier.token_cache.stats(),
+    },
+    counters=["hits", "misses", "evictions"],
+))
+registry.register(StatsCollector(
+    "admission", "budget", admission.stats, counters=["rate_limited", "shed"],
+))
+registry.register(StatsCollector(
+    "singleflight", "group", lambda: {"db_read": db_service.read_flights.stats()},
+    counters=["calls", "shared", "cancelled"],
+))
+registry.register(StatsCollector(
+    "db_pool", "engine", pool_stats,
+    counters=[
+        "checkouts", "overflow_checkouts", "timeouts", "connects",
+        "invalidations", "preping_failures", "checkout_wait_total",
+    ],
+))
+
+
+@mcp.custom_route("/metrics", methods=["GET"])
+async def metrics(request: Request) -> Response:
+    """Prometheus metrics of the server."""
+    return Response(generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
+
+MAX_BULK_BOOKINGS = 50
+
+
+# Responses of the catalog tools when the client already has the latest version
+UNCHANGED_PAGE = Payload.of(HospitalPage(hospitals=[]))
+UNCHANGED_LIST = Payload.of([], wrap=True)
+
+
+async def _catalog_payload(
+    key: tuple, build: Callable[[], Awaitable[Any]], wrap: bool = False
+) -> Payload:
+    """The serialized response of a catalog query, cached until the catalog changes."""
+    key = (*key, db_service.catalog_version)
+    payload = db_service.hospital_payload_cache.get(key)
+    if payload is MISSING:
+        payload = Payload.of(await build(), wrap)
+        db_service.hospital_payload_cache.set(key, payload)
+    return payload
 
-    async with get_db() as session:
-        db_hospitals = await db_service.get_all_hospitals(session)
 
-        return [
-            Hospital(
-                id=h.id,  # type: ignore[arg-type]
-                name=h.name,  # type: ignore[arg-type]
-                city=h.city or "",  # type: ignore[arg-type]
-                distanceKm=h.distanceKm or 0.0,  # type: ignore[arg-type]
-            )
-            for h in db_hospitals
-        ]
+@mcp.tool
+async def list_hospitals(
+    cursor: Optional[str] = None, limit: int = 50, version: Optional[str] = None
+) -> HospitalPage:
+    """List hospitals available, one page at a time (at most 200 per page). Pass the returned
+    'next_cursor' as 'cursor' to get the next page; it is null on the last page. Pass the 'version'
+    from a previous response's _meta to get an empty response flagged 'unchanged' if that page did
+    not change.
+    """
+
+    async def build() -> HospitalPage:
+        hospitals, next_cursor = await db_service.shared_read(
+            db_service.get_hospitals_page, cursor, limit
+        )
+        return HospitalPage(hospitals=hospitals, next_cursor=next_cursor)
+
+    payload = await _catalog_payload(("list", cursor, limit), build)
+    return payload.result(UNCHANGED_PAGE, version)  # type: ignore[return-value]
 
 @mcp.tool
-async def search_hospitals(city: str) -> List[Hospital]:
-    """Search all nearby hospitals for a given city"""
+async def search_hospitals(city: str, version: Optional[str] = None) -> List[Hospital]:
+    """Search all nearby hospitals for a given city. Pass the 'version' from a previous response's
+    _meta to get an empty response flagged 'unchanged' if the results did not change.
+    """
 
-    # Fetch hospitals from database
-    async with get_db() as session:
-        db_hospitals = await db_service.get_hospitals_by_city(session, city)
+    # The match ignores case: one key, and one read, for every spelling of the city
+    city = city.lower()
 
-        # Convert ORM models to Pydantic models
-        hospitals = [
-            Hospital(
-                id=h.id,  # type: ignore[arg-type]
-                name=h.name,  # type: ignore[arg-type]
-                city=h.city or "",  # type: ignore[arg-type]
-                distanceKm=h.distanceKm or 0.0,  # type: ignore[arg-type]
-            )
-            for h in db_hospitals
-        ]
+    async def build() -> List[Hospital]:
+        return await db_service.shared_read(db_service.get_hospital_summaries_by_city, city)
 
-        return hospitals
+    payload = await _catalog_payload(("search", city), build, wrap=True)
+    return payload.result(UNCHANGED_LIST, version)  # type: ignore[return-value]
 
-@mcp.tool
-async def get_hospital_data(hospital_id: str) -> Hospital:
-    """Get hospital details including availability from hospital_id. The id can't be the name but the exact id in hospital list. If you don't have the correct id, use the tool 'list_hospitals'"""
+async def _hospitals_data(hospital_ids: List[str]) -> HospitalBatch:
+    """Fetch hospitals with their latest status, keeping the requested order."""
 
-    async with get_db() as session:
-        db_hospital = await db_service.get_hospital_by_id(session, hospital_id)
+    if len(hospital_ids) > db_service.MAX_PAGE_SIZE:
+        raise ValueError(f"At most {db_service.MAX_PAGE_SIZE} hospital ids per call")
 
-        if not db_hospital:
-            raise ValueError(f"Hospital with ID {hospital_id} not found")
+    found = await db_service.shared_read(db_service.get_hospitals_with_status, hospital_ids)
 
-        db_status = await db_service.get_hospital_status(session, hospital_id)
+    hospitals = []
+    not_found = []
+    for hospital_id in hospital_ids:
+        if hospital_id not in found:
+            not_found.append(hospital_id)
+            continue
 
-        return Hospital(
+        db_hospital, db_status = found[hospital_id]
+        hospitals.append(Hospital(
             id=db_hospital.id,  # type: ignore[arg-type]
             name=db_hospital.name,  # type: ignore[arg-type]
             city=db_hospital.city or "",  # type: ignore[arg-type]
@@ -76,7 +204,61 @@ async def get_hospital_data(hospital_id: str) -> Hospital:
             availableBeds=db_status.availableBeds or 0 if db_status else 0,  # type: ignore[arg-type]
             icuBeds=db_status.icuBeds or 0 if db_status else 0,  # type: ignore[arg-type]
             ventilators=db_status.ventilators or 0 if db_status else 0,  # type: ignore[arg-type]
-        )
+        ))
+
+    return HospitalBatch(hospitals=hospitals, not_found=not_found)
+
+@mcp.tool
+async def get_hospitals_data(hospital_ids: List[str]) -> HospitalBatch:
+    """Get details including availability for several hospitals at once (at most 200 ids). The ids
+    must be the exact ids from the hospital list, not names. Ids that do not exist are returned in
+    'not_found'.
+    """
+
+    return await _hospitals_data(hospital_ids)
+
+@mcp.tool
+async def get_hospital_data(hospital_id: str) -> Hospital:
+    """Get hospital details including availability from hospital_id. The id can't be the name but the exact id in hospital list. If you don't have the correct id, use the tool 'list_hospitals'"""
+
+    batch = await _hospitals_data([hospital_id])
+    if not batch.hospitals:
+        raise ValueError(f"Hospital with ID {hospital_id} not found")
+    return batch.hospitals[0]
+
+@mcp.tool
+async def find_nearest_hospitals(
+    latitude: float, longitude: float, k: int = 5, max_km: Optional[float] = None
+) -> List[Hospital]:
+    """Find the k hospitals closest to a position (latitude/longitude in degrees), closest first,
+    including availability. 'distanceKm' is the distance from that position. Use 'max_km' to ignore
+    hospitals farther than that.
+    """
+
+    if not -90 <= latitude <= 90 or not -180 <= longitude <= 180:
+        raise ValueError("Latitude must be within [-90, 90] and longitude within [-180, 180]")
+    if not 1 <= k <= db_service.MAX_PAGE_SIZE:
+        raise ValueError(f"k must be between 1 and {db_service.MAX_PAGE_SIZE}")
+    if max_km is not None and max_km < 0:
+        raise ValueError("max_km must be positive")
+
+    async with get_db(readonly=True) as session:
+        nearest = await db_service.find_nearest_hospitals(session, latitude, longitude, k, max_km)
+
+        return [
+            Hospital(
+                id=db_hospital.id,  # type: ignore[arg-type]
+                name=db_hospital.name,  # type: ignore[arg-type]
+                city=db_hospital.city or "",  # type: ignore[arg-type]
+                distanceKm=round(distance, 3),
+                latitude=db_hospital.latitude,  # type: ignore[arg-type]
+                longitude=db_hospital.longitude,  # type: ignore[arg-type]
+                availableBeds=db_status.availableBeds or 0 if db_status else 0,  # type: ignore[arg-type]
+                icuBeds=db_status.icuBeds or 0 if db_status else 0,  # type: ignore[arg-type]
+                ventilators=db_status.ventilators or 0 if db_status else 0,  # type: ignore[arg-type]
+            )
+            for db_hospital, db_status, distance in nearest
+        ]
 
 @mcp.tool
 async def create_rdv(request: AppointmentRequest) -> str:
@@ -88,15 +270,15 @@ async def create_rdv(request: AppointmentRequest) -> str:
 
     user_id = token.client_id
 
-    async with get_db() as session:
-        hospital_identifier = request.hospital_name
-        hospital = await db_service.get_hospital_by_name(session, hospital_identifier)
+    hospital_identifier = request.hospital_name
+    async with get_db(readonly=True, user_id=user_id) as session:
+        resolved_hospital_id = await db_service.resolve_hospital_id(session, hospital_identifier)
 
-        if not hospital:
-            raise ValueError(f"Hospital with name '{hospital_identifier}' not found")
-
-        resolved_hospital_id: str = str(hospital.id)
+    if not resolved_hospital_id:
+        raise ValueError(f"Hospital with name '{hospital_identifier}' not found")
 
+    # A fresh session: the slot's seats are created before it takes a connection
+    async with get_db(user_id=user_id) as session:
         appointment = await db_service.create_appointment(
             session=session,
             user_id=user_id,
@@ -108,25 +290,107 @@ async def create_rdv(request: AppointmentRequest) -> str:
         return f"Appointment confirmed: {appointment.id}"  # type: ignore[arg-type]
 
 @mcp.tool
-async def list_rdvs() -> List[dict]:
-    """List all appointments for the authenticated user."""
+async def create_rdvs(requests: List[AppointmentRequest]) -> List[dict]:
+    """Create several appointments at once (at most 50), e.g. a series of follow-up sessions.
+    Returns one result per request, in order, with either the appointment id or the reason it
+    failed.
+    """
 
     token = fastmcp.server.dependencies.get_access_token()
     if not token:
         raise ValueError("Not authenticated")
 
-    async with get_db() as session:
-        appointments = await db_service.get_user_appointments(session, token.client_id)
+    if len(requests) > MAX_BULK_BOOKINGS:
+        raise ValueError(f"At most {MAX_BULK_BOOKINGS} appointments per call")
 
-        return [
+    async with get_db(readonly=True, user_id=token.client_id) as session:
+        hospital_ids = await db_service.resolve_hospital_ids(
+            session, [r.hospital_name for r in requests]
+        )
+
+    results: List[dict] = [
+        {"hospital_name": r.hospital_name, "appointmentDateTime": r.appointmentDateTime}
+        for r in requests
+    ]
+    bookable = []
+    for result, r in zip(results, requests):
+        if hospital_ids[r.hospital_name] is None:
+            result["status"] = "failed"
+            result["error"] = f"Hospital with name '{r.hospital_name}' not found"
+        else:
+            bookable.append(result)
+
+    # A fresh session: the slots' seats are created before it takes a connection
+    async with get_db(user_id=token.client_id) as session:
+        outcomes = await db_service.create_appointments(
+            session=session,
+            user_id=token.client_id,
+            bookings=[
+                (hospital_ids[r["hospital_name"]], r["appointmentDateTime"]) for r in bookable
+            ],
+            description="Appointment created via MCP",
+        )
+    for result, (appointment_id, error) in zip(bookable, outcomes):
+        if error is None:
+            result["status"] = "confirmed"
+            result["appointment_id"] = appointment_id
+        else:
+            result["status"] = "failed"
+            result["error"] = error
+
+    return results
+
+@mcp.tool
+async def list_rdvs(cursor: Optional[str] = None, limit: int = 50) -> dict:
+    """List appointments for the authenticated user, newest first, one page at a time (at most 200
+    per page). Pass the returned 'next_cursor' as 'cursor' to get the next page; it is null on the
+    last page.
+    """
+
+    token = fastmcp.server.dependencies.get_access_token()
+    if not token:
+        raise ValueError("Not authenticated")
+
+    appointments, next_cursor = await db_service.get_cached_user_appointments_page(
+        token.client_id, cursor, limit
+    )
+
+    return {
+        "appointments": [
             {
-                "appointment_id": a.id,  # type: ignore[dict-item]
-                "status": a.status or "Unknown",  # type: ignore[dict-item]
-                "appointmentDateTime": a.appointmentDateTime,  # type: ignore[dict-item]
-                "hospital_id": a.hospitalId,  # type: ignore[dict-item]
+                "appointment_id": a.id,
+                "status": a.status or "Unknown",
+                "appointmentDateTime": a.appointmentDateTime,
+                "hospital_id": a.hospitalId,
             }
             for a in appointments
-        ]
+        ],
+        "next_cursor": next_cursor,
+    }
+
+def _appointment_status(appointment_id: str, found: dict) -> dict:
+    """Status of an appointment among the results of ``db_service.find_user_appointments``."""
+    if appointment_id not in found:
+        return {
+            "appointment_id": appointment_id,
+            "status": "Not Found",
+            "error": "Appointment does not exist",
+        }
+
+    appointment = found[appointment_id]
+    if appointment is None:
+        return {
+            "appointment_id": appointment_id,
+            "status": "Access Denied",
+            "error": "You do not have access to this appointment",
+        }
+
+    return {
+        "appointment_id": appointment.id,
+        "status": appointment.status or "Unknown",
+        "appointmentDateTime": appointment.appointmentDateTime,
+        "hospital_id": appointment.hospitalId,
+    }
 
 @mcp.tool
 async def get_appointment_status(appointment_id: str) -> dict:
@@ -136,31 +400,25 @@ async def get_appointment_status(appointment_id: str) -> dict:
     if not token:
         raise ValueError("Not authenticated")
 
-    # Fetch appointment from database
-    async with get_db() as session:
-        appointment = await db_service.get_appointment_by_id(session, appointment_id)
+    found = await db_service.find_user_appointments(token.client_id, [appointment_id])
+    return _appointment_status(appointment_id, found)
 
-        if not appointment:
-            return {
-                "appointment_id": appointment_id,
-                "status": "Not Found",
-                "error": "Appointment does not exist",
-            }
+@mcp.tool
+async def get_appointment_statuses(appointment_ids: List[str]) -> List[dict]:
+    """Get the status of several appointments of the authenticated user at once (at most 200 ids).
+    Returns one result per id, in order: the appointment's status, or 'Not Found' or 'Access Denied'
+    with an error.
+    """
 
-        # Verify the appointment belongs to the authenticated user
-        if str(appointment.userId) != token.client_id:
-            return {
-                "appointment_id": appointment_id,
-                "status": "Access Denied",
-                "error": "You do not have access to this appointment",
-            }
+    token = fastmcp.server.dependencies.get_access_token()
+    if not token:
+        raise ValueError("Not authenticated")
 
-        return {
-            "appointment_id": appointment.id,  # type: ignore[dict-item]
-            "status": appointment.status or "Unknown",  # type: ignore[dict-item]
-            "appointmentDateTime": appointment.appointmentDateTime,  # type: ignore[dict-item]
-            "hospital_id": appointment.hospitalId,  # type: ignore[dict-item]
-        }
+    if len(appointment_ids) > db_service.MAX_PAGE_SIZE:
+        raise ValueError(f"At most {db_service.MAX_PAGE_SIZE} appointment ids per call")
+
+    found = await db_service.find_user_appointments(token.client_id, appointment_ids)
+    return [_appointment_status(appointment_id, found) for appointment_id in appointment_ids]
 
 
 @mcp.tool
@@ -173,7 +431,7 @@ async def get_profile(ctx: Context) -> dict:
     logger.info(f"Access token for user: {token}")
 
     # Try to get user from database by email (client_id is usually email)
-    async with get_db() as session:
+    async with get_db(readonly=True, user_id=token.client_id) as session:
         user = await db_service.get_user_by_id(session, token.client_id)
 
         if user:
@@ -199,13 +457,26 @@ async def get_profile(ctx: Context) -> dict:
                 "message": "User authenticated but profile not found in database",
             }
 
-if __name__ == "__main__":
-    import asyncio
 
-    async def _startup():
-        await init_db()
-        await engine.dispose()
+async def startup() -> asyncio.Task:
+    """Get the database ready to serve; returns the task loading the hospital indexes.
+
+    The schema check is a single query once the schema is current (see
+    init_db). The indexes load in the background: the tools that need them
+    (bookings, nearest hospitals) wait for them, the others don't.
+    """
+    await init_db()
+    return asyncio.create_task(db_service.load_hospital_indexes())
+
+
+if __name__ == "__main__":
+    async def _main():
+        # Serve from the loop that started up, so its database connections stay warm
+        indexes = await startup()
+        try:
+            await mcp.run_async(transport="http", port=8080)
+        finally:
+            indexes.cancel()
 
     logger.info("Starting Carestral MCP Server...")
-    asyncio.run(_startup())
-    mcp.run(transport="http", port=8080)
+    asyncio.run(_main())
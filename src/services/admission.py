@@ -0,0 +1,124 @@
+"""Admission control of MCP tool calls: per-client rate limits and load shedding."""
+
+import math
+import time
+from typing import Callable, Collection, Optional
+
+import fastmcp.server.dependencies
+from fastmcp.exceptions import ToolError
+from fastmcp.server.middleware import Middleware
+
+from services.cache import MISSING, TTLCache
+
+READ = "read"
+BOOKING = "booking"
+
+
+class RateLimitError(ToolError):
+    """The client used up its budget of calls."""
+
+
+class OverloadedError(ToolError):
+    """The call was shed to keep the database responsive."""
+
+
+class TokenBucket:
+    """``rate`` calls per second on average, in bursts of at most ``burst``."""
+
+    __slots__ = ("rate", "burst", "tokens", "updated")
+
+    def __init__(self, rate: float, burst: float, now: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = now
+
+    def take(self, cost: float, now: float) -> float:
+        """Take ``cost`` tokens; returns 0, or the seconds until they are available."""
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= cost:
+            self.tokens -= cost
+            return 0.0
+        return (cost - self.tokens) / self.rate
+
+
+class AdmissionMiddleware(Middleware):
+    """Rate-limit tool calls per client and shed reads when the database is congested.
+
+    Every tool call is a read, except the tools in ``booking_tools`` whose
+    calls cost one booking per appointment requested. Each ``client_id``
+    (from the access token) has a token bucket for reads and another one for
+    bookings; a rate of 0 disables that limit. While ``checkout_wait()``
+    (seconds, see ``PoolMetrics.recent_wait``) is over ``shed_wait``, reads
+    are refused outright, so the connections left serve bookings. Refused
+    calls fail with a hint of when to retry.
+    """
+
+    def __init__(
+        self,
+        booking_tools: Collection[str],
+        read_rate: float,
+        read_burst: float,
+        booking_rate: float,
+        booking_burst: float,
+        shed_wait: float,
+        checkout_wait: Callable[[], float],
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.booking_tools = set(booking_tools)
+        self.limits = {READ: (read_rate, read_burst), BOOKING: (booking_rate, booking_burst)}
+        self.shed_wait = shed_wait
+        self.checkout_wait = checkout_wait
+        self._clock = clock
+        # Buckets are kept an hour, then start over full
+        self.buckets = TTLCache(maxsize=100000, ttl=3600, clock=clock)
+        self.rate_limited = {READ: 0, BOOKING: 0}
+        self.shed = 0
+
+    def _cost(self, tool: str, arguments: Optional[dict]) -> tuple:
+        if tool not in self.booking_tools:
+            return READ, 1
+        requests = (arguments or {}).get("requests")
+        return BOOKING, len(requests) if isinstance(requests, list) and requests else 1
+
+    def admit(self, client_id: str, tool: str, arguments: Optional[dict] = None) -> None:
+        """Raise ``OverloadedError`` or ``RateLimitError`` if the call must be refused."""
+        budget, cost = self._cost(tool, arguments)
+        if budget == READ and self.shed_wait > 0:
+            wait = self.checkout_wait()
+            if wait > self.shed_wait:
+                self.shed += 1
+                raise OverloadedError(
+                    f"Server busy, retry after {math.ceil(wait)} s (bookings are served first)"
+                )
+
+        rate, burst = self.limits[budget]
+        if rate <= 0:
+            return
+        key = (client_id, budget)
+        now = self._clock()
+        bucket = self.buckets.get(key)
+        if bucket is MISSING:
+            bucket = TokenBucket(rate, burst, now)
+            self.buckets.set(key, bucket)
+        # A bulk call larger than the burst is allowed once the bucket is full
+        retry_after = bucket.take(min(cost, burst), now)
+        if retry_after:
+            self.rate_limited[budget] += 1
+            raise RateLimitError(
+                f"Too many {budget} calls, retry after {math.ceil(retry_after)} s"
+            )
+
+    async def on_call_tool(self, context, call_next):
+        token = fastmcp.server.dependencies.get_access_token()
+        client_id = token.client_id if token is not None else "anonymous"
+        self.admit(client_id, context.message.name, context.message.arguments)
+        return await call_next(context)
+
+    def stats(self) -> dict:
+        """Refused calls, by reason."""
+        return {
+            "read": {"rate_limited": self.rate_limited[READ], "shed": self.shed},
+            "booking": {"rate_limited": self.rate_limited[BOOKING], "shed": 0},
+        }
@@ -0,0 +1,142 @@
+"""Per-user cache of appointments, kept current by the writes that change them."""
+
+import time
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from services.cache import MISSING, TTLCache
+
+
+class CachedAppointment(NamedTuple):
+    """The appointment columns the tools return, named as on the ORM model."""
+
+    id: str
+    userId: str  # noqa: N815
+    hospitalId: str  # noqa: N815
+    appointmentDateTime: datetime  # noqa: N815
+    status: Optional[str]
+    createdAt: Optional[datetime]  # noqa: N815
+
+
+def _newest_first(appointment: CachedAppointment) -> tuple:
+    # Sorted in reverse, as ORDER BY "createdAt" DESC, id DESC (NULLs first)
+    created_at = appointment.createdAt
+    return created_at is None, created_at or datetime.min, appointment.id
+
+
+class UserAppointments:
+    """All the appointments of one user, newest first."""
+
+    __slots__ = ("items", "by_id")
+
+    def __init__(self, appointments: Iterable[CachedAppointment]):
+        self.by_id = {a.id: a for a in appointments}
+        self.items = sorted(self.by_id.values(), key=_newest_first, reverse=True)
+
+    def add(self, appointments: Iterable[CachedAppointment]) -> None:
+        self.by_id.update((a.id, a) for a in appointments)
+        self.items = sorted(self.by_id.values(), key=_newest_first, reverse=True)
+
+    def page(
+        self, after: Optional[Tuple[datetime, str]], limit: int
+    ) -> List[CachedAppointment]:
+        """Up to ``limit`` appointments older than the ``(createdAt, id)`` keyset ``after``."""
+        start = 0
+        if after is not None:
+            # A keyset comparison with a NULL "createdAt" is never true in SQL either
+            start = next(
+                (i for i, a in enumerate(self.items)
+                 if a.createdAt is not None and (a.createdAt, a.id) < after),
+                len(self.items),
+            )
+        return self.items[start:start + limit]
+
+
+class _Load:
+    __slots__ = ("stale",)
+
+    def __init__(self):
+        self.stale = False
+
+
+class AppointmentCache:
+    """The appointments of recently active users, by user id.
+
+    An entry holds every appointment of its user, so that pages and lookups
+    by id need no query. Users with more than ``max_per_user`` appointments
+    are remembered as such (``get`` returns None) and read from the database.
+    Past ``maxsize`` users the least recently used are evicted, and entries
+    expire after ``ttl`` seconds, which bounds how stale a change nobody told
+    the cache about can be.
+
+    Writes keep entries current: ``add`` records appointments once committed
+    (write-through) and ``invalidate`` drops a user changed elsewhere. A load
+    overlapping either may predate the write: it is returned, not cached.
+
+    Like ``TTLCache``, it is meant to be used from a single event loop.
+    """
+
+    def __init__(self, maxsize: int, ttl: float, max_per_user: int,
+                 clock: Callable[[], float] = time.monotonic):
+        self.entries = TTLCache(maxsize=maxsize, ttl=ttl, clock=clock)
+        self.max_per_user = max_per_user
+        self._loads: Dict[str, List[_Load]] = {}
+
+    async def get(
+        self, user_id: str, load: Callable[[], Awaitable[List[CachedAppointment]]]
+    ) -> Optional[UserAppointments]:
+        """The user's appointments, from ``load()`` on a miss; None if they have too many.
+
+        ``load`` returns the user's appointments, or at least ``max_per_user + 1``
+        of them when they have more.
+        """
+        entry = self.entries.get(user_id)
+        if entry is not MISSING:
+            return entry
+
+        marker = _Load()
+        self._loads.setdefault(user_id, []).append(marker)
+        try:
+            appointments = await load()
+        finally:
+            loads = self._loads[user_id]
+            loads.remove(marker)
+            if not loads:
+                del self._loads[user_id]
+
+        entry = (
+            UserAppointments(appointments) if len(appointments) <= self.max_per_user else None
+        )
+        if not marker.stale:
+            self.entries.set(user_id, entry)
+        return entry
+
+    def add(self, user_id: str, appointments: List[CachedAppointment]) -> None:
+        """Record appointments of ``user_id`` that were just committed."""
+        self._mark_stale(user_id)
+        entry = self.entries.peek(user_id)
+        if entry is not MISSING and entry is not None:
+            if len(entry.by_id) + len(appointments) > self.max_per_user:
+                self.entries.invalidate(user_id)
+            else:
+                entry.add(appointments)
+
+    def invalidate(self, user_id: str) -> None:
+        """Forget the appointments of ``user_id``."""
+        self._mark_stale(user_id)
+        self.entries.invalidate(user_id)
+
+    def clear(self) -> None:
+        """Forget every user's appointments."""
+        for loads in self._loads.values():
+            for marker in loads:
+                marker.stale = True
+        self.entries.clear()
+
+    def _mark_stale(self, user_id: str) -> None:
+        for marker in self._loads.get(user_id, ()):
+            marker.stale = True
+
+    def stats(self) -> dict:
+        """Hit/miss counters of the cached users."""
+        return self.entries.stats()
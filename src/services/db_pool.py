@@ -0,0 +1,235 @@
+"""Instrumented connection pool: checkout waits, usage, overflow and pre-ping failures."""
+
+import asyncio
+import collections
+import itertools
+import logging
+import math
+import time
+from typing import Deque, Dict, List, Optional
+
+from sqlalchemy import event, exc
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from sqlalchemy.util import greenlet_spawn
+
+logger = logging.getLogger(__name__)
+
+
+class PoolMetrics:
+    """Counters and gauges of one engine's connection pool.
+
+    Fed by ``InstrumentedPool`` (checkout waits) and SQLAlchemy pool events
+    (everything else). The last ``WAIT_SAMPLES`` checkout waits are kept for
+    percentiles, and the peak of connections in use since the last
+    ``take_peak_in_use()`` drives the adaptive sizing.
+
+    ``recent_wait()`` tracks how long checkouts wait right now, for load
+    shedding: a moving average of the waits that fades when no checkout
+    waits, or the age of the oldest checkout still waiting if longer.
+    """
+
+    WAIT_SAMPLES = 1024
+    # Weight of each new wait in the moving average, and how fast it fades (seconds)
+    RECENT_WEIGHT = 0.2
+    RECENT_DECAY = 5.0
+
+    def __init__(self, name: str):
+        self.name = name
+        self.pool: Optional["InstrumentedPool"] = None
+        self.checkouts = 0
+        self.overflow_checkouts = 0
+        self.timeouts = 0
+        self.connects = 0
+        self.invalidations = 0
+        self.preping_failures = 0
+        self.checkout_wait_total = 0.0
+        self.checkout_wait_max = 0.0
+        self._waits: Deque[float] = collections.deque(maxlen=self.WAIT_SAMPLES)
+        self._peak_in_use = 0
+        self._recent_wait = 0.0
+        self._recent_at = time.perf_counter()
+        # Start times of the checkouts in progress, oldest first
+        self._waiting: Dict[int, float] = {}
+        self._waiting_ids = itertools.count()
+
+    def start_wait(self) -> int:
+        """Record a checkout starting; returns the id to pass to ``observe_wait``."""
+        wait_id = next(self._waiting_ids)
+        self._waiting[wait_id] = time.perf_counter()
+        return wait_id
+
+    def observe_wait(self, seconds: float, wait_id: Optional[int] = None) -> None:
+        self.checkouts += 1
+        self.checkout_wait_total += seconds
+        self.checkout_wait_max = max(self.checkout_wait_max, seconds)
+        self._waits.append(seconds)
+        if wait_id is not None:
+            self._waiting.pop(wait_id, None)
+        now = time.perf_counter()
+        self._recent_wait = (
+            self._faded_wait(now) * (1 - self.RECENT_WEIGHT) + seconds * self.RECENT_WEIGHT
+        )
+        self._recent_at = now
+
+    def _faded_wait(self, now: float) -> float:
+        return self._recent_wait * math.exp((self._recent_at - now) / self.RECENT_DECAY)
+
+    def recent_wait(self) -> float:
+        """Seconds checkouts currently wait for a connection (see the class docstring)."""
+        now = time.perf_counter()
+        oldest = now - next(iter(self._waiting.values()), now)
+        return max(self._faded_wait(now), oldest)
+
+    def take_peak_in_use(self) -> int:
+        """Peak number of connections in use since the previous call."""
+        peak = self._peak_in_use
+        self._peak_in_use = self.pool.checkedout() if self.pool is not None else 0
+        return peak
+
+    def snapshot(self) -> dict:
+        """Current values, as plain numbers."""
+        pool = self.pool
+        waits = sorted(self._waits)
+
+        def percentile(q: float) -> float:
+            return waits[min(len(waits) - 1, int(q * len(waits)))] if waits else 0.0
+
+        return {
+            "pool_size": pool.size() if pool is not None else 0,
+            "max_overflow": pool._max_overflow if pool is not None else 0,
+            "in_use": pool.checkedout() if pool is not None else 0,
+            "idle": pool.checkedin() if pool is not None else 0,
+            "overflow": max(0, pool.overflow()) if pool is not None else 0,
+            "checkouts": self.checkouts,
+            "overflow_checkouts": self.overflow_checkouts,
+            "timeouts": self.timeouts,
+            "connects": self.connects,
+            "invalidations": self.invalidations,
+            "preping_failures": self.preping_failures,
+            "checkout_wait_total": self.checkout_wait_total,
+            "checkout_wait_max": self.checkout_wait_max,
+            "checkout_wait_p50": percentile(0.50),
+            "checkout_wait_p95": percentile(0.95),
+            "checkout_wait_p99": percentile(0.99),
+            "checkout_wait_recent": self.recent_wait(),
+            "checkouts_waiting": len(self._waiting),
+        }
+
+
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool timing every checkout into its ``metrics``."""
+
+    metrics: Optional[PoolMetrics] = None
+
+    def connect(self):
+        start = time.perf_counter()
+        wait_id = self.metrics.start_wait() if self.metrics is not None else None
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            if self.metrics is not None:
+                self.metrics.timeouts += 1
+            logger.warning(f"Connection pool exhausted: {self.status()}")
+            raise
+        finally:
+            if self.metrics is not None:
+                self.metrics.observe_wait(time.perf_counter() - start, wait_id)
+
+    def resized(self, pool_size: int, max_overflow: int) -> "InstrumentedPool":
+        """A new, empty pool with the same settings and another size."""
+        pool = self.__class__(
+            self._creator,
+            pool_size=pool_size,
+            max_overflow=max_overflow,
+            pre_ping=self._pre_ping,
+            use_lifo=self._pool.use_lifo,
+            timeout=self._timeout,
+            recycle=self._recycle,
+            echo=self.echo,
+            logging_name=self._orig_logging_name,
+            reset_on_return=self._reset_on_return,
+            _dispatch=self.dispatch,
+            dialect=self._dialect,
+        )
+        pool.metrics = self.metrics
+        if self.metrics is not None:
+            self.metrics.pool = pool
+        return pool
+
+    def recreate(self) -> "InstrumentedPool":
+        self.logger.info("Pool recreating")
+        return self.resized(self.size(), self._max_overflow)
+
+
+def instrument(engine: AsyncEngine, name: str) -> PoolMetrics:
+    """Attach a ``PoolMetrics`` to an engine created with ``poolclass=InstrumentedPool``."""
+    metrics = PoolMetrics(name)
+    pool = engine.sync_engine.pool
+    pool.metrics = metrics
+    metrics.pool = pool
+
+    # Listeners are registered on the pool's dispatch, which recreated and
+    # resized pools share, so they keep feeding the same metrics.
+    @event.listens_for(pool, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        metrics.connects += 1
+
+    @event.listens_for(pool, "checkout")
+    def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+        current = metrics.pool
+        if current is not None:
+            in_use = current.checkedout()
+            metrics._peak_in_use = max(metrics._peak_in_use, in_use)
+            if in_use > current.size():
+                metrics.overflow_checkouts += 1
+
+    @event.listens_for(pool, "invalidate")
+    def _on_invalidate(dbapi_connection, connection_record, exception):
+        metrics.invalidations += 1
+        # pool_pre_ping reports a dead connection as a DisconnectionError
+        if isinstance(exception, exc.DisconnectionError):
+            metrics.preping_failures += 1
+
+    return metrics
+
+
+def adaptive_pool_size(peak_in_use: int, min_size: int, max_size: int,
+                       headroom: float = 1.25) -> int:
+    """Pool size for an observed peak of concurrent connections."""
+    return max(min_size, min(max_size, math.ceil(peak_in_use * headroom)))
+
+
+async def adapt_pool_size(engine: AsyncEngine, interval: float,
+                          min_size: int, max_size: int) -> None:
+    """Resize the engine's pool to the peak concurrency of each interval, until cancelled.
+
+    The pool is only replaced when the target size differs by at least 20%
+    (and 2 connections), so it does not churn on small variations. The old
+    pool stops serving checkouts at once; its idle connections are closed
+    now and the ones still in use when they come back, on later rounds.
+    """
+    retired: List[AsyncAdaptedQueuePool] = []
+    sync_engine = engine.sync_engine
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            for pool in retired:
+                await greenlet_spawn(pool.dispose)
+            # Connections can outlive a few rounds (e.g. long transactions)
+            del retired[:-10]
+
+            pool = sync_engine.pool
+            if getattr(pool, "metrics", None) is None:
+                continue
+            current = pool.size()
+            target = adaptive_pool_size(pool.metrics.take_peak_in_use(), min_size, max_size)
+            if abs(target - current) < max(2, current * 0.2):
+                continue
+
+            logger.info(f"Resizing {pool.metrics.name} connection pool from {current} to {target}")
+            sync_engine.pool = pool.resized(target, pool._max_overflow)
+            await greenlet_spawn(pool.dispose)
+            retired.append(pool)
+        except Exception:
+            logger.exception("Failed to resize the connection pool")
@@ -1,22 +1,276 @@
 """Database service layer for handling database operations."""
 
-from datetime import datetime
-from typing import List, Optional
+import asyncio
+import base64
+import json
+import logging
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Set, Tuple
 
-from sqlalchemy import func, select
+from sqlalchemy import (
+    ARRAY,
+    DateTime,
+    Text,
+    and_,
+    any_,
+    bindparam,
+    case,
+    cast,
+    delete,
+    event,
+    func,
+    insert,
+    select,
+    true,
+    tuple_,
+    update,
+)
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
 
-from models import orm_models
+from database import (
+    APPLICATION_NAME,
+    APPOINTMENT_CHANNEL,
+    HOSPITAL_CATALOG_CHANNEL,
+    SLOT_CAPACITY,
+    SLOT_MINUTES,
+    get_db,
+    get_engine,
+    stick_to_primary,
+)
+from models import db_models, orm_models
+from services.appointment_cache import AppointmentCache, CachedAppointment, UserAppointments
+from services.cache import MISSING, TTLCache
+from services.metrics import db_operation
+from services.name_index import HospitalNameIndex
+from services.singleflight import SingleFlight
+from services.spatial_index import HospitalSpatialIndex, KDTree
 
+logger = logging.getLogger(__name__)
 
+# Hospital rows change rarely: cache them for minutes. Status rows are fed by
+# capacity updates, so they only get a short TTL.
+hospital_cache = TTLCache(
+    maxsize=int(os.getenv("HOSPITAL_CACHE_MAXSIZE", "1024")),
+    ttl=float(os.getenv("HOSPITAL_CACHE_TTL", "300")),
+)
+hospital_status_cache = TTLCache(
+    maxsize=int(os.getenv("HOSPITAL_CACHE_MAXSIZE", "1024")),
+    ttl=float(os.getenv("HOSPITAL_STATUS_CACHE_TTL", "30")),
+)
+# Serialized responses of the catalog tools, keyed by query and catalog version
+hospital_payload_cache = TTLCache(
+    maxsize=int(os.getenv("HOSPITAL_CACHE_MAXSIZE", "1024")),
+    ttl=float(os.getenv("HOSPITAL_CACHE_TTL", "300")),
+)
+# Bumped on every invalidation, so a payload built from data read before one is never served
+catalog_version = 0
+
+hospital_name_index = HospitalNameIndex()
+hospital_spatial_index = HospitalSpatialIndex()
+# Identical concurrent reads share one query (see shared_read), and concurrent
+# callers share the first build of the hospital indexes
+read_flights = SingleFlight()
+# KD-tree build running in a worker thread, if any
+_spatial_build: Optional["asyncio.Future[None]"] = None
+# Set on catalog NOTIFYs, to refresh the indexes without waiting for the next period
+_catalog_changed: Optional[asyncio.Event] = None
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+# Rows fetched per round trip when streaming a whole table
+STREAM_BATCH_SIZE = 1000
+
+# Statements of the hottest lookups, built once: executing a prebuilt statement
+# skips building it and computing its cache key, and reuses its compiled form
+# and the connection's prepared statement
+_USER_BY_ID = select(orm_models.User).where(orm_models.User.id == bindparam("id"))
+_HOSPITAL_BY_ID = select(orm_models.Hospital).where(orm_models.Hospital.id == bindparam("id"))
+_APPOINTMENT_BY_ID = select(orm_models.Appointment).where(
+    orm_models.Appointment.id == bindparam("id")
+)
+
+# Appointments of recently active users, so that agents polling list_rdvs and
+# get_appointment_status after booking are served without a query
+appointment_cache = AppointmentCache(
+    maxsize=int(os.getenv("APPOINTMENT_CACHE_MAXSIZE", "10000")),
+    ttl=float(os.getenv("APPOINTMENT_CACHE_TTL", "60")),
+    max_per_user=int(os.getenv("APPOINTMENT_CACHE_MAX_PER_USER", "500")),
+)
+_USER_APPOINTMENTS = (
+    select(*(getattr(orm_models.Appointment, column) for column in CachedAppointment._fields))
+    .where(orm_models.Appointment.userId == bindparam("user_id"))
+    .limit(bindparam("limit"))
+)
+# Appointments by id, with their columns only when they belong to the user. The
+# ownership check runs in SQL on the row the primary key index finds, so an
+# ("id", "userId") index would only duplicate it
+_owned = orm_models.Appointment.userId == bindparam("user_id")
+_USER_APPOINTMENTS_BY_ID = select(
+    orm_models.Appointment.id,
+    *(
+        case((_owned, getattr(orm_models.Appointment, column))).label(column)
+        for column in CachedAppointment._fields[1:]
+    ),
+).where(orm_models.Appointment.id == any_(bindparam("ids", type_=ARRAY(Text))))
+# session.info key of the appointments to cache once the session commits
+_NEW_APPOINTMENTS = "new_appointments"
+
+# LISTEN connections are pinged this often (seconds); a lost one is replaced,
+# waiting from LISTEN_RETRY_MIN to LISTEN_RETRY_MAX seconds between attempts
+LISTEN_PING_INTERVAL = float(os.getenv("DATABASE_LISTEN_PING_INTERVAL", "30"))
+LISTEN_RETRY_MIN = 1.0
+LISTEN_RETRY_MAX = 30.0
+
+# Slots whose seat rows are known to exist, so booking can skip creating them
+seated_slots = TTLCache(maxsize=10000, ttl=3600)
+# Seat creations in flight, by slot
+_seating: Dict[Tuple[str, datetime], "asyncio.Future[None]"] = {}
+
+
+def invalidate_hospital_cache() -> None:
+    """Drop every cached hospital, hospital status and tool payload.
+
+    The name and spatial indexes are kept, and brought up to date by an
+    incremental refresh (see ``refresh_hospital_indexes_periodically``).
+    """
+    global catalog_version
+    catalog_version += 1
+    hospital_cache.clear()
+    hospital_status_cache.clear()
+    hospital_payload_cache.clear()
+
+
+def hospital_cache_stats() -> dict:
+    """Hit/miss counters of the hospital caches."""
+    return {
+        "hospital": hospital_cache.stats(),
+        "hospital_status": hospital_status_cache.stats(),
+        "hospital_payload": hospital_payload_cache.stats(),
+    }
+
+
+async def shared_read(fn: Callable[..., Awaitable[Any]], *args) -> Any:
+    """Run ``fn(session, *args)`` in a read-only session, once for concurrent identical calls.
+
+    Callers asking for the same function and arguments while it runs wait for
+    its result instead of each taking a pool connection for the same query.
+    ``fn`` must only read; lists among ``args`` are keyed as tuples.
+    """
+
+    async def read():
+        async with get_db(readonly=True) as session:
+            return await fn(session, *args)
+
+    key = (fn.__name__, *(tuple(arg) if isinstance(arg, list) else arg for arg in args))
+    return await read_flights.do(key, read)
+
+
+async def _listen(
+    channel: str, on_notify: Callable[[str], None], reset: Callable[[], None]
+) -> None:
+    """Call ``on_notify(payload)`` on every NOTIFY of ``channel``, until cancelled.
+
+    ``reset`` runs every time listening starts: changes made while not
+    listening are unknown. The connection is pinged every
+    ``LISTEN_PING_INTERVAL`` seconds; when it is lost (restart, failover,
+    idle kill) it is replaced, with exponential backoff between attempts.
+    """
+
+    def _on_notify(connection, pid, channel, payload):
+        on_notify(payload)
+
+    delay = LISTEN_RETRY_MIN
+    while True:
+        try:
+            async with get_engine().connect() as conn:
+                raw = await conn.get_raw_connection()
+                driver = raw.driver_connection
+                lost = asyncio.get_running_loop().create_future()
+
+                def _on_terminate(connection, lost=lost):
+                    if not lost.done():
+                        lost.set_result(None)
+
+                driver.add_termination_listener(_on_terminate)
+                try:
+                    await driver.add_listener(channel, _on_notify)
+                    reset()
+                    delay = LISTEN_RETRY_MIN
+                    while True:
+                        done, _ = await asyncio.wait({lost}, timeout=LISTEN_PING_INTERVAL)
+                        if done:
+                            raise ConnectionError("connection closed")
+                        await asyncio.wait_for(
+                            driver.execute("SELECT 1"), timeout=LISTEN_PING_INTERVAL
+                        )
+                except asyncio.CancelledError:
+                    if not driver.is_closed():
+                        await driver.remove_listener(channel, _on_notify)
+                    raise
+                except Exception:
+                    # Never hand a broken connection back to the pool
+                    await conn.invalidate()
+                    raise
+                finally:
+                    driver.remove_termination_listener(_on_terminate)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"Lost LISTEN {channel} ({e!r}), reconnecting in {delay:.0f} s")
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, LISTEN_RETRY_MAX)
+
+
+async def listen_for_catalog_changes() -> None:
+    """Invalidate the hospital caches on every catalog NOTIFY, until cancelled."""
+
+    def catalog_changed() -> None:
+        invalidate_hospital_cache()
+        if _catalog_changed is not None:
+            _catalog_changed.set()
+
+    def on_notify(payload: str) -> None:
+        logger.info(f"Hospital catalog changed ({payload}), invalidating cache")
+        catalog_changed()
+
+    await _listen(HOSPITAL_CATALOG_CHANNEL, on_notify, catalog_changed)
+
+
+def appointments_changed(payload: str) -> None:
+    """Apply an appointment NOTIFY (see database.SCHEMA_DDL) to the appointment cache.
+
+    Changes made by this process are in the cache already (write-through).
+    Other changes drop the user's appointments, and their next reads go to
+    the primary, which has the change when replicas may not yet.
+    """
+    change = json.loads(payload)
+    if change.get("origin") == APPLICATION_NAME:
+        return
+    user_id = change.get("user")
+    if user_id is None:
+        appointment_cache.clear()
+    else:
+        stick_to_primary(user_id)
+        appointment_cache.invalidate(user_id)
+
+
+async def listen_for_appointment_changes() -> None:
+    """Keep the appointment cache coherent with the other processes, until cancelled."""
+    await _listen(APPOINTMENT_CHANNEL, appointments_changed, appointment_cache.clear)
+
+
+@db_operation
 async def get_user_by_id(session: AsyncSession, user_id: str) -> Optional[orm_models.User]:
     """Get user by ID."""
-    result = await session.execute(
-        select(orm_models.User).where(orm_models.User.id == user_id)
-    )
+    result = await session.execute(_USER_BY_ID, {"id": user_id})
     return result.scalar_one_or_none()
 
 
+@db_operation
 async def get_user_by_email(session: AsyncSession, email: str) -> Optional[orm_models.User]:
     """Get user by email."""
     result = await session.execute(
@@ -25,57 +279,644 @@ async def get_user_by_email(session: AsyncSession, email: str) -> Optional[orm_m
     return result.scalar_one_or_none()
 
 
+def _fuzzy_match(column, value, max_distance: int):
+    """Build a levenshtein match on ``lower(column)`` with a trigram pre-filter.
+
+    Returns ``(predicate, distance)``. The pg_trgm ``%`` operator is served by
+    the GIN trigram indexes created in ``init_db`` and narrows the candidate
+    rows, so levenshtein only runs on those instead of on the whole table.
+    Its similarity threshold is set on every connection (see
+    ``database.TRGM_SIMILARITY_THRESHOLD``), low enough for one typo in a
+    four-letter name ("Lion" and "Lyon" score 0.25).
+    """
+    lowered = func.lower(column)
+    distance = func.levenshtein(lowered, func.lower(value))
+    predicate = and_(lowered.op("%")(func.lower(value)), distance <= max_distance)
+    return predicate, distance
+
+
+def encode_cursor(*values) -> str:
+    """Encode keyset values into an opaque pagination cursor."""
+    payload = json.dumps([v.isoformat() if isinstance(v, datetime) else v for v in values])
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, *types: type) -> list:
+    """Decode a cursor built by ``encode_cursor`` holding values of ``types``."""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (TypeError, ValueError) as e:
+        raise ValueError("Invalid pagination cursor") from e
+    if (
+        not isinstance(values, list)
+        or len(values) != len(types)
+        or not all(isinstance(v, t) for v, t in zip(values, types))
+    ):
+        raise ValueError("Invalid pagination cursor")
+    return values
+
+
+def _page_size(limit: int) -> int:
+    return max(1, min(limit, MAX_PAGE_SIZE))
+
+
+def _detach(session: AsyncSession, instances: list) -> None:
+    """Expunge instances before caching so a later rollback cannot expire them."""
+    for instance in instances:
+        if instance is not None:
+            session.expunge(instance)
+
+
+@db_operation
 async def get_all_hospitals(session: AsyncSession) -> List[orm_models.Hospital]:
-    """Get all hospitals."""
+    """Get all hospitals (cached)."""
+    cached = hospital_cache.get(("all",))
+    if cached is not MISSING:
+        return list(cached)
+
     result = await session.execute(select(orm_models.Hospital))
-    return list(result.scalars().all())
+    hospitals = list(result.scalars().all())
+    _detach(session, hospitals)
+    hospital_cache.set(("all",), hospitals)
+    return list(hospitals)
 
 
+# Columns of the hospitals returned by the list and search tools
+_SUMMARY_COLUMNS = (
+    orm_models.Hospital.id,
+    orm_models.Hospital.name,
+    orm_models.Hospital.city,
+    orm_models.Hospital.distanceKm,
+)
+
+
+def _hospital_summaries(rows: Iterable) -> List[db_models.Hospital]:
+    """Response models of ``_SUMMARY_COLUMNS`` rows.
+
+    Rows are plain tuples, so no ORM entity is built. The models are built by
+    pydantic-core: in pydantic 2 that is faster than ``model_construct``,
+    which fills the unset fields in Python.
+    """
+    return [
+        db_models.Hospital(id=id, name=name, city=city or "", distanceKm=distance_km or 0.0)
+        for id, name, city, distance_km in rows
+    ]
+
+
+@db_operation
+async def get_hospitals_page(
+    session: AsyncSession, cursor: Optional[str] = None, limit: int = DEFAULT_PAGE_SIZE
+) -> Tuple[List[db_models.Hospital], Optional[str]]:
+    """Get one page of hospitals ordered by id (keyset pagination).
+
+    Returns the hospitals, with the list tool's columns only, and the cursor
+    of the next page (None on the last one). Not cached: the list tool caches
+    the serialized page instead.
+    """
+    limit = _page_size(limit)
+    query = select(*_SUMMARY_COLUMNS).order_by(orm_models.Hospital.id).limit(limit + 1)
+    if cursor is not None:
+        (after_id,) = decode_cursor(cursor, str)
+        query = query.where(orm_models.Hospital.id > after_id)
+
+    result = await session.execute(query)
+    hospitals = _hospital_summaries(result.tuples())
+    next_cursor = None
+    if len(hospitals) > limit:
+        hospitals = hospitals[:limit]
+        next_cursor = encode_cursor(hospitals[-1].id)
+    return hospitals, next_cursor
+
+
+def _city_query(city: str, *columns):
+    """Select ``columns`` of the hospitals matching ``city``, closest first."""
+    predicate, distance = _fuzzy_match(orm_models.Hospital.city, city, 5)
+    return select(*columns).where(predicate).order_by(distance)
+
+
+@db_operation
 async def get_hospitals_by_city(session: AsyncSession, city: str) -> List[orm_models.Hospital]:
-    """Get hospitals by city (fuzzy match using levenshtein)."""
-    distance = func.levenshtein(func.lower(orm_models.Hospital.city), func.lower(city))
-    result = await session.execute(
-        select(orm_models.Hospital)
-        .where(distance <= 5)
-        .order_by(distance)
-    )
-    return list(result.scalars().all())
+    """Get hospitals by city (fuzzy match using levenshtein, cached)."""
+    key = ("city", city.lower())
+    cached = hospital_cache.get(key)
+    if cached is not MISSING:
+        return list(cached)
+
+    result = await session.execute(_city_query(city, orm_models.Hospital))
+    hospitals = list(result.scalars().all())
+    _detach(session, hospitals)
+    hospital_cache.set(key, hospitals)
+    return list(hospitals)
+
+
+@db_operation
+async def get_hospital_summaries_by_city(
+    session: AsyncSession, city: str
+) -> List[db_models.Hospital]:
+    """Get hospitals by city like ``get_hospitals_by_city``, with the search tool's columns only.
 
+    Not cached: the search tool caches the serialized results instead.
+    """
+    result = await session.execute(_city_query(city, *_SUMMARY_COLUMNS))
+    return _hospital_summaries(result.tuples())
 
+
+@db_operation
 async def get_hospital_by_id(session: AsyncSession, hospital_id: str
                              ) -> Optional[orm_models.Hospital]:
-    """Get hospital by ID."""
-    result = await session.execute(
-        select(orm_models.Hospital).where(orm_models.Hospital.id == hospital_id)
-    )
-    return result.scalar_one_or_none()
+    """Get hospital by ID (cached)."""
+    key = ("id", hospital_id)
+    cached = hospital_cache.get(key)
+    if cached is not MISSING:
+        return cached
+
+    result = await session.execute(_HOSPITAL_BY_ID, {"id": hospital_id})
+    hospital = result.scalar_one_or_none()
+    if hospital is not None:
+        _detach(session, [hospital])
+        hospital_cache.set(key, hospital)
+    return hospital
 
 
+@db_operation
 async def get_hospital_by_name(session: AsyncSession, hospital_name: str
                                 ) -> Optional[orm_models.Hospital]:
     """Get closest hospital by name (fuzzy match using levenshtein)."""
-    distance = func.levenshtein(func.lower(orm_models.Hospital.name), func.lower(hospital_name))
+    predicate, distance = _fuzzy_match(orm_models.Hospital.name, hospital_name, 10)
     result = await session.execute(
         select(orm_models.Hospital)
-        .where(distance <= 10)
+        .where(predicate)
         .order_by(distance)
         .limit(1)
     )
     return result.scalar_one_or_none()
 
 
+# Columns of the hospitals in the name and spatial indexes
+_INDEX_COLUMNS = (
+    orm_models.Hospital.id,
+    orm_models.Hospital.name,
+    orm_models.Hospital.updatedAt,
+    orm_models.Hospital.latitude,
+    orm_models.Hospital.longitude,
+)
+
+
+async def _index_hospitals(
+    names: HospitalNameIndex, points: HospitalSpatialIndex, rows: list
+) -> None:
+    # Every insertion computes levenshtein distances: keep them off the event loop
+    await asyncio.to_thread(names.update, [(row.id, row.name, row.updatedAt) for row in rows])
+    for row in rows:
+        points.upsert(row.id, row.latitude, row.longitude)
+
+
+@db_operation
+async def refresh_hospital_indexes(session: AsyncSession, full: bool = False) -> None:
+    """Load the hospitals changed since the last refresh into the name and spatial indexes.
+
+    A full refresh builds new indexes from a server-side cursor and swaps them
+    in, so lookups keep using the previous ones meanwhile. An incremental one
+    also compares the indexed ids with the table's: deleted hospitals are
+    removed, and those inserted with an older ``updatedAt`` than the last
+    refresh saw (backdated or bulk-loaded rows) are added.
+    """
+    global hospital_name_index, hospital_spatial_index
+    query = select(*_INDEX_COLUMNS).execution_options(yield_per=STREAM_BATCH_SIZE)
+    incremental = not full and hospital_name_index.loaded and hospital_name_index.watermark
+    if incremental:
+        query = query.where(orm_models.Hospital.updatedAt >= hospital_name_index.watermark)
+
+    names = hospital_name_index if incremental else HospitalNameIndex()
+    points = hospital_spatial_index if incremental else HospitalSpatialIndex()
+    result = await session.stream(query)
+    async for rows in result.partitions():
+        await _index_hospitals(names, points, rows)
+    if incremental:
+        ids = set()
+        result = await session.stream_scalars(
+            select(orm_models.Hospital.id).execution_options(yield_per=STREAM_BATCH_SIZE)
+        )
+        async for partition in result.partitions():
+            ids.update(partition)
+        indexed = names.ids()
+        for hospital_id in indexed - ids:
+            names.remove(hospital_id)
+            points.remove(hospital_id)
+        missed = list(ids - indexed)
+        for i in range(0, len(missed), STREAM_BATCH_SIZE):
+            result = await session.execute(
+                select(*_INDEX_COLUMNS)
+                .where(orm_models.Hospital.id.in_(missed[i:i + STREAM_BATCH_SIZE]))
+            )
+            await _index_hospitals(names, points, result.all())
+    names.loaded = True
+    if not incremental:
+        # Build the new tree before swapping, so queries never wait for it
+        await _build_spatial_tree(points)
+        hospital_name_index = names
+        hospital_spatial_index = points
+
+
+async def refresh_hospital_indexes_periodically(interval: float) -> None:
+    """Refresh the hospital indexes every ``interval`` seconds, until cancelled.
+
+    Catalog NOTIFYs (see ``listen_for_catalog_changes``) trigger a refresh
+    right away; those arriving during a refresh trigger another one.
+    """
+    global _catalog_changed
+    changed = _catalog_changed = asyncio.Event()
+    while True:
+        try:
+            await asyncio.wait_for(changed.wait(), interval)
+        except asyncio.TimeoutError:
+            pass
+        changed.clear()
+        try:
+            async with get_db() as session:
+                await refresh_hospital_indexes(session)
+        except Exception:
+            logger.exception("Failed to refresh the hospital indexes")
+
+
+async def load_hospital_indexes() -> None:
+    """Build the hospital indexes ahead of the first booking (logs failures)."""
+    try:
+        await _load_hospital_indexes()
+    except Exception:
+        logger.exception("Failed to load the hospital indexes")
+
+
+async def _load_hospital_indexes() -> None:
+    """Build the hospital indexes if they are not loaded yet, once for concurrent callers."""
+
+    async def load():
+        async with get_db() as session:
+            if not hospital_name_index.loaded:
+                await refresh_hospital_indexes(session, full=True)
+
+    if not hospital_name_index.loaded:
+        await read_flights.do(("hospital_indexes",), load)
+
+
+async def _build_spatial_tree(index: HospitalSpatialIndex) -> None:
+    """Build the KD-tree of ``index`` in a worker thread and install it."""
+    # The snapshot converts every point too: also in the worker thread
+    tree = await asyncio.to_thread(lambda: KDTree(*index.snapshot()))
+    index.install(tree)
+
+
+def _refresh_spatial_tree() -> Optional["asyncio.Future[None]"]:
+    """Start rebuilding the KD-tree if coordinates changed; returns the build in flight."""
+    global _spatial_build
+    if _spatial_build is None and hospital_spatial_index.stale:
+        _spatial_build = asyncio.ensure_future(_build_spatial_tree(hospital_spatial_index))
+
+        def _done(build):
+            global _spatial_build
+            _spatial_build = None
+            if not build.cancelled() and build.exception() is not None:
+                logger.error(
+                    "Failed to build the hospital spatial index", exc_info=build.exception()
+                )
+
+        _spatial_build.add_done_callback(_done)
+    return _spatial_build
+
+
+@db_operation
+async def find_nearest_hospitals(
+    session: AsyncSession,
+    latitude: float,
+    longitude: float,
+    k: int,
+    max_km: Optional[float] = None,
+) -> List[Tuple[orm_models.Hospital, Optional[orm_models.HospitalCurrentStatus], float]]:
+    """Get the ``k`` hospitals closest to a point, with their latest status.
+
+    Served by the in-memory KD-tree; the database is only queried for the
+    hospital rows that are not cached. After coordinates change the tree is
+    rebuilt in the background and queries are answered by the previous one,
+    except the very first which waits for it. Returns
+    ``(hospital, status, distance in km)`` tuples, closest first.
+    """
+    await _load_hospital_indexes()
+    index = hospital_spatial_index
+    build = _refresh_spatial_tree()
+    if not index.has_tree and build is not None:
+        await asyncio.shield(build)
+
+    nearest = index.nearest(latitude, longitude, k, max_km)
+    found = await get_hospitals_with_status(session, [hospital_id for hospital_id, _ in nearest])
+    return [
+        (*found[hospital_id], distance)
+        for hospital_id, distance in nearest
+        if hospital_id in found
+    ]
+
+
+@db_operation
+async def get_hospitals_by_names(
+    session: AsyncSession, hospital_names: List[str]
+) -> Dict[str, Optional[Tuple[str, str]]]:
+    """Get the closest hospital of several names in one query.
+
+    Same matching as ``get_hospital_by_name``, run for every name through a
+    LATERAL join. Returns a mapping of name to ``(id, name)`` or None.
+    """
+    names = (
+        func.unnest(cast(list(hospital_names), ARRAY(Text)))
+        .table_valued("name")
+        .render_derived()
+    )
+    predicate, distance = _fuzzy_match(orm_models.Hospital.name, names.c.name, 10)
+    closest = (
+        select(orm_models.Hospital.id, orm_models.Hospital.name)
+        .where(predicate)
+        .order_by(distance)
+        .limit(1)
+        .lateral("closest")
+    )
+    result = await session.execute(
+        select(names.c.name, closest.c.id, closest.c.name.label("hospital_name"))
+        .select_from(names)
+        .outerjoin(closest, true())
+    )
+    return {
+        row.name: (row.id, row.hospital_name) if row.id is not None else None
+        for row in result.all()
+    }
+
+
+@db_operation
+async def resolve_hospital_ids(
+    session: AsyncSession, hospital_names: List[str]
+) -> Dict[str, Optional[str]]:
+    """Resolve hospital names to ids with the in-memory name index.
+
+    Same semantics as ``get_hospital_by_name`` (closest name within distance
+    10). Exact names are answered by the index. The others are looked up in
+    the database in one query: a hospital added since the last refresh would
+    otherwise resolve to a similarly named one ("Hopital Sud" to "Hopital
+    Nord"). The index only answers the names the database finds no match for.
+    """
+    await _load_hospital_indexes()
+    index = hospital_name_index
+
+    resolved = index.resolve_exact(hospital_names)
+    inexact = [name for name, hospital_id in resolved.items() if hospital_id is None]
+    if inexact:
+        found, unmatched = [], []
+        for name, match in (await get_hospitals_by_names(session, inexact)).items():
+            if match is None:
+                unmatched.append(name)
+            else:
+                hospital_id, hospital_name = match
+                found.append((hospital_id, hospital_name, None))
+                resolved[name] = hospital_id
+        if found:
+            await asyncio.to_thread(index.update, found)
+        if unmatched:
+            # Names sharing too few trigrams with their match, such as short
+            # ones; a fuzzy lookup may compare the name to thousands of others
+            resolved.update(await asyncio.to_thread(index.resolve_all, unmatched, 10))
+    return resolved
+
+
+@db_operation
+async def resolve_hospital_id(session: AsyncSession, hospital_name: str) -> Optional[str]:
+    """Resolve a single hospital name to its id, see ``resolve_hospital_ids``."""
+    resolved = await resolve_hospital_ids(session, [hospital_name])
+    return resolved[hospital_name]
+
+
+@db_operation
 async def get_hospital_status(
     session: AsyncSession, hospital_id: str
-) -> Optional[orm_models.HospitalStatus]:
-    """Get the latest hospital status."""
+) -> Optional[orm_models.HospitalCurrentStatus]:
+    """Get the latest hospital status (cached for a short TTL).
+
+    Reads the one-row-per-hospital projection, so the cost does not depend on
+    how much status history has piled up.
+    """
+    cached = hospital_status_cache.get(hospital_id)
+    if cached is not MISSING:
+        return cached
+
+    status = await session.get(orm_models.HospitalCurrentStatus, hospital_id)
+    _detach(session, [status])
+    hospital_status_cache.set(hospital_id, status)
+    return status
+
+
+@db_operation
+async def get_hospitals_with_status(
+    session: AsyncSession, hospital_ids: List[str]
+) -> Dict[str, Tuple[orm_models.Hospital, Optional[orm_models.HospitalCurrentStatus]]]:
+    """Get hospitals with their latest status in a single query (cached).
+
+    Returns a mapping of hospital id to ``(hospital, latest status or None)``;
+    unknown ids are left out.
+    """
+    found = {}
+    missing = []
+    for hospital_id in dict.fromkeys(hospital_ids):
+        hospital = hospital_cache.get(("id", hospital_id))
+        status = hospital_status_cache.get(hospital_id)
+        if hospital is MISSING or status is MISSING:
+            missing.append(hospital_id)
+        else:
+            found[hospital_id] = (hospital, status)
+
+    if missing:
+        result = await session.execute(
+            select(orm_models.Hospital, orm_models.HospitalCurrentStatus)
+            .outerjoin(orm_models.Hospital.current_status)
+            .where(orm_models.Hospital.id.in_(missing))
+        )
+        for hospital, status in result.all():
+            _detach(session, [hospital, status])
+            hospital_cache.set(("id", hospital.id), hospital)
+            hospital_status_cache.set(hospital.id, status)
+            found[hospital.id] = (hospital, status)
+
+    return found
+
+
+def slot_start(appointment_date_time: datetime) -> datetime:
+    """Start of the time slot holding ``appointment_date_time``."""
+    minutes = appointment_date_time.hour * 60 + appointment_date_time.minute
+    minutes -= minutes % SLOT_MINUTES
+    return appointment_date_time.replace(
+        hour=minutes // 60, minute=minutes % 60, second=0, microsecond=0
+    )
+
+
+async def _create_slot_seats(slots: List[Tuple[str, datetime]]) -> None:
+    seat = orm_models.SlotSeat
+    appointment = orm_models.Appointment
+    wanted = func.unnest(
+        cast([h for h, _ in slots], ARRAY(Text)),
+        cast([s for _, s in slots], ARRAY(DateTime)),
+    ).table_valued("hospital_id", "slot_start").render_derived()
+    seat_numbers = func.generate_series(1, SLOT_CAPACITY).table_valued("seat_no").render_derived()
+    existing = select(seat.seatNo).where(
+        seat.hospitalId == wanted.c.hospital_id, seat.slotStart == wanted.c.slot_start
+    )
+    # Appointments the slot already holds take its first seats, oldest first
+    booked = (
+        select(
+            appointment.id,
+            func.row_number()
+            .over(order_by=(appointment.createdAt, appointment.id))
+            .label("seat_no"),
+        )
+        .where(
+            appointment.hospitalId == wanted.c.hospital_id,
+            appointment.appointmentDateTime >= wanted.c.slot_start,
+            appointment.appointmentDateTime
+            < wanted.c.slot_start + timedelta(minutes=SLOT_MINUTES),
+        )
+        .lateral("booked")
+    )
+    rows = (
+        select(wanted.c.hospital_id, wanted.c.slot_start, seat_numbers.c.seat_no, booked.c.id)
+        .join(orm_models.Hospital, orm_models.Hospital.id == wanted.c.hospital_id)
+        .join(seat_numbers, true())
+        .outerjoin(booked, booked.c.seat_no == seat_numbers.c.seat_no)
+        .where(~existing.exists())
+    )
+    async with get_engine().begin() as conn:
+        await conn.execute(
+            pg_insert(seat)
+            .from_select([seat.hospitalId, seat.slotStart, seat.seatNo, seat.appointmentId], rows)
+            .on_conflict_do_nothing()
+        )
+        # Slots of unknown hospitals get no seats, and are not remembered
+        seated = await conn.execute(
+            select(seat.hospitalId, seat.slotStart)
+            .where(tuple_(seat.hospitalId, seat.slotStart).in_(slots))
+            .distinct()
+        )
+    for slot in seated:
+        seated_slots.set(tuple(slot), True)
+
+
+@db_operation
+async def ensure_slot_seats(slots: Iterable[Tuple[str, datetime]]) -> None:
+    """Create the seats of the ``(hospital_id, slot start)`` slots that have none.
+
+    Runs in its own short transaction so bookings never wait on each other's
+    uncommitted seat rows, and concurrent callers share the one in flight for
+    a slot. Slots that already have seats (possibly a custom number of them)
+    are left untouched.
+
+    The transaction takes a pool connection: call it before the booking
+    session takes one, so that a booking never holds two at once.
+    """
+    missing = {slot for slot in slots if seated_slots.get(slot) is MISSING}
+    if not missing:
+        return
+
+    new = [slot for slot in missing if slot not in _seating]
+    if new:
+        task = asyncio.ensure_future(_create_slot_seats(new))
+        for slot in new:
+            _seating[slot] = task
+
+        def _forget(_, slots=new):
+            for slot in slots:
+                _seating.pop(slot, None)
+
+        task.add_done_callback(_forget)
+
+    # Shielded: a cancelled booking must not cancel the seats others wait for
+    tasks = {_seating[slot] for slot in missing}
+    await asyncio.gather(*(asyncio.shield(task) for task in tasks))
+
+
+@db_operation
+async def claim_slot_seats(
+    session: AsyncSession, appointments: List[Tuple[str, str, datetime]]
+) -> Set[str]:
+    """Give each ``(appointment_id, hospital_id, slot start)`` a free seat of its slot.
+
+    All seats are claimed in one statement, in the order of ``appointments``.
+    Returns the ids of the appointments that got one; the others found their
+    slot full. Seats locked by concurrent bookings are skipped rather than
+    waited on, so bookings of a busy slot never queue behind each other.
+    """
+    if not appointments:
+        return set()
+    seat = orm_models.SlotSeat
+    new = func.unnest(
+        cast([a for a, _, _ in appointments], ARRAY(Text)),
+        cast([h for _, h, _ in appointments], ARRAY(Text)),
+        cast([s for _, _, s in appointments], ARRAY(DateTime)),
+    ).table_valued("appointment_id", "hospital_id", "slot_start", with_ordinality="position")
+    new = new.render_derived()
+    slot = (new.c.hospital_id, new.c.slot_start)
+    wanted = select(
+        new.c.appointment_id,
+        *slot,
+        func.row_number().over(partition_by=slot, order_by=new.c.position).label("n"),
+    ).subquery("wanted")
+    # Row locks cannot be taken beside a window function: lock, then number
+    locked = (
+        select(seat.hospitalId, seat.slotStart, seat.seatNo)
+        .where(
+            tuple_(seat.hospitalId, seat.slotStart).in_(select(*slot)),
+            seat.appointmentId.is_(None),
+        )
+        .with_for_update(skip_locked=True)
+        .subquery("locked")
+    )
+    free = select(
+        locked,
+        func.row_number()
+        .over(partition_by=(locked.c.hospitalId, locked.c.slotStart), order_by=locked.c.seatNo)
+        .label("n"),
+    ).subquery("free")
     result = await session.execute(
-        select(orm_models.HospitalStatus)
-        .where(orm_models.HospitalStatus.hospitalId == hospital_id)
-        .order_by(orm_models.HospitalStatus.createdAt.desc())
+        update(seat)
+        .where(
+            seat.hospitalId == free.c.hospitalId,
+            seat.slotStart == free.c.slotStart,
+            seat.seatNo == free.c.seatNo,
+            free.c.hospitalId == wanted.c.hospital_id,
+            free.c.slotStart == wanted.c.slot_start,
+            free.c.n == wanted.c.n,
+        )
+        .values(appointmentId=wanted.c.appointment_id)
+        .returning(seat.appointmentId)
     )
-    return result.scalar_one_or_none()
+    return set(result.scalars())
+
+
+def _cache_on_commit(session: AsyncSession, appointments: List[CachedAppointment]) -> None:
+    """Add ``appointments`` to the appointment cache once ``session`` commits."""
+    session.info.setdefault(_NEW_APPOINTMENTS, []).extend(appointments)
+
 
+@event.listens_for(Session, "after_commit")
+def _cache_committed_appointments(session: Session) -> None:
+    # Also called when a savepoint is released: wait for the transaction
+    if session.get_nested_transaction() is not None:
+        return
+    by_user: Dict[str, List[CachedAppointment]] = {}
+    for appointment in session.info.pop(_NEW_APPOINTMENTS, ()):
+        by_user.setdefault(appointment.userId, []).append(appointment)
+    for user_id, appointments in by_user.items():
+        appointment_cache.add(user_id, appointments)
 
+
+@event.listens_for(Session, "after_rollback")
+def _forget_rolled_back_appointments(session: Session) -> None:
+    if session.get_nested_transaction() is None:
+        session.info.pop(_NEW_APPOINTMENTS, None)
+
+
+@db_operation
 async def create_appointment(
     session: AsyncSession,
     user_id: str,
@@ -98,11 +939,95 @@ async def create_appointment(
         description=description,
         status="pending",
     )
+    slot = slot_start(appointment_date_time)
+    # Before the session takes a connection (see ensure_slot_seats)
+    await ensure_slot_seats([(hospital_id, slot)])
+
     session.add(appointment)
     await session.flush()
+    if not await claim_slot_seats(session, [(str(appointment.id), hospital_id, slot)]):
+        raise ValueError("No capacity left in this time slot, please pick another time")
+    _cache_on_commit(session, [
+        CachedAppointment(*(getattr(appointment, f) for f in CachedAppointment._fields))
+    ])
     return appointment
 
 
+@db_operation
+async def create_appointments(
+    session: AsyncSession,
+    user_id: str,
+    bookings: List[Tuple[str, datetime]],
+    description: str | None = None,
+) -> List[Tuple[Optional[str], Optional[str]]]:
+    """Create several appointments with a single multi-row INSERT.
+
+    ``bookings`` are ``(hospital_id, appointment_date_time)`` pairs. Returns one
+    ``(appointment_id, error)`` pair per booking, in order. If the batch is
+    rejected, rows are retried one by one in savepoints to find the culprits.
+    The appointments then claim seats in their slots in one statement; those
+    that find their slot full are deleted again and reported as failed.
+    """
+    import uuid
+
+    rows = []
+    for hospital_id, appointment_date_time in bookings:
+        # Strip timezone info to match TIMESTAMP WITHOUT TIME ZONE columns
+        if appointment_date_time.tzinfo is not None:
+            appointment_date_time = appointment_date_time.replace(tzinfo=None)
+        rows.append({
+            "id": str(uuid.uuid4()),
+            "userId": user_id,
+            "hospitalId": hospital_id,
+            "appointmentDateTime": appointment_date_time,
+            "description": description,
+            "status": "pending",
+            "createdAt": datetime.utcnow(),
+        })
+    if not rows:
+        return []
+
+    # Before the session takes a connection (see ensure_slot_seats)
+    await ensure_slot_seats(
+        (row["hospitalId"], slot_start(row["appointmentDateTime"])) for row in rows
+    )
+
+    table = orm_models.Appointment.__table__
+    outcomes: List[Tuple[Optional[str], Optional[str]]] = []
+    try:
+        async with session.begin_nested():
+            await session.execute(insert(table).values(rows).returning(table.c.id))
+        outcomes = [(row["id"], None) for row in rows]
+    except IntegrityError:
+        for row in rows:
+            try:
+                async with session.begin_nested():
+                    await session.execute(insert(table).values(row))
+                outcomes.append((row["id"], None))
+            except IntegrityError as e:
+                logger.warning(f"Appointment {row['id']} rejected: {e.orig}")
+                outcomes.append((None, "Appointment rejected by the database"))
+
+    # Every inserted appointment needs a seat; drop the ones whose slot is full
+    seated = await claim_slot_seats(session, [
+        (appointment_id, row["hospitalId"], slot_start(row["appointmentDateTime"]))
+        for row, (appointment_id, _) in zip(rows, outcomes) if appointment_id is not None
+    ])
+    full = []
+    for i, (appointment_id, _) in enumerate(outcomes):
+        if appointment_id is not None and appointment_id not in seated:
+            full.append(appointment_id)
+            outcomes[i] = (None, "No capacity left in this time slot, please pick another time")
+    if full:
+        await session.execute(delete(table).where(table.c.id.in_(full)))
+    _cache_on_commit(session, [
+        CachedAppointment(*(row[f] for f in CachedAppointment._fields))
+        for row, (appointment_id, _) in zip(rows, outcomes) if appointment_id is not None
+    ])
+    return outcomes
+
+
+@db_operation
 async def get_user_appointments(
     session: AsyncSession, user_id: str
 ) -> List[orm_models.Appointment]:
@@ -115,11 +1040,135 @@ async def get_user_appointments(
     return list(result.scalars().all())
 
 
+def _appointment_keyset(cursor: str) -> Tuple[datetime, str]:
+    created_at, after_id = decode_cursor(cursor, str, str)
+    try:
+        created_at = datetime.fromisoformat(created_at)
+    except ValueError as e:
+        raise ValueError("Invalid pagination cursor") from e
+    # "createdAt" is a naive UTC timestamp: so must the keyset be to compare with it
+    if created_at.tzinfo is not None:
+        created_at = created_at.astimezone(timezone.utc).replace(tzinfo=None)
+    return created_at, after_id
+
+
+@db_operation
+async def get_user_appointments_page(
+    session: AsyncSession, user_id: str, cursor: Optional[str] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+) -> Tuple[List[orm_models.Appointment], Optional[str]]:
+    """Get one page of a user's appointments, newest first (keyset pagination).
+
+    Returns the appointments and the cursor of the next page (None on the last one).
+    """
+    limit = _page_size(limit)
+    keyset = tuple_(orm_models.Appointment.createdAt, orm_models.Appointment.id)
+    query = (
+        select(orm_models.Appointment)
+        .where(orm_models.Appointment.userId == user_id)
+        .order_by(orm_models.Appointment.createdAt.desc(), orm_models.Appointment.id.desc())
+        .limit(limit + 1)
+    )
+    if cursor is not None:
+        query = query.where(keyset < tuple_(*_appointment_keyset(cursor)))
+
+    result = await session.execute(query)
+    appointments = list(result.scalars().all())
+    next_cursor = None
+    if len(appointments) > limit:
+        appointments = appointments[:limit]
+        last = appointments[-1]
+        next_cursor = encode_cursor(last.createdAt, last.id)
+    return appointments, next_cursor
+
+
+@db_operation
+async def get_user_appointment_rows(
+    session: AsyncSession, user_id: str
+) -> List[CachedAppointment]:
+    """A user's appointments, in no order, as cached: at most one more than a cache entry holds."""
+    result = await session.execute(
+        _USER_APPOINTMENTS, {"user_id": user_id, "limit": appointment_cache.max_per_user + 1}
+    )
+    return [CachedAppointment(*row) for row in result]
+
+
+async def cached_user_appointments(user_id: str) -> Optional[UserAppointments]:
+    """A user's appointments from the appointment cache, None if they have too many for it.
+
+    On a miss they are loaded once for concurrent callers.
+    """
+
+    async def read():
+        async with get_db(readonly=True, user_id=user_id) as session:
+            return await get_user_appointment_rows(session, user_id)
+
+    return await appointment_cache.get(
+        user_id, lambda: read_flights.do(("user_appointments", user_id), read)
+    )
+
+
+async def get_cached_user_appointments_page(
+    user_id: str, cursor: Optional[str] = None, limit: int = DEFAULT_PAGE_SIZE,
+) -> Tuple[List[Any], Optional[str]]:
+    """``get_user_appointments_page``, served from the appointment cache when it can be."""
+    limit = _page_size(limit)
+    after = _appointment_keyset(cursor) if cursor is not None else None
+    appointments = await cached_user_appointments(user_id)
+    if appointments is None:
+        async with get_db(readonly=True, user_id=user_id) as session:
+            return await get_user_appointments_page(session, user_id, cursor, limit)
+
+    page = appointments.page(after, limit + 1)
+    next_cursor = None
+    if len(page) > limit:
+        page = page[:limit]
+        next_cursor = encode_cursor(page[-1].createdAt, page[-1].id)
+    return page, next_cursor
+
+
+@db_operation
+async def get_user_appointments_by_ids(
+    session: AsyncSession, user_id: str, appointment_ids: List[str]
+) -> Dict[str, Optional[CachedAppointment]]:
+    """Look up appointments by id on behalf of ``user_id``, in one query.
+
+    Maps every id that exists to its appointment, or to None when it belongs
+    to another user: ownership is checked in SQL, so the columns of other
+    users' appointments never leave the database. Ids left out do not exist.
+    """
+    result = await session.execute(
+        _USER_APPOINTMENTS_BY_ID, {"user_id": user_id, "ids": list(appointment_ids)}
+    )
+    return {
+        row.id: CachedAppointment(*row) if row.userId is not None else None
+        for row in result
+    }
+
+
+async def find_user_appointments(
+    user_id: str, appointment_ids: List[str]
+) -> Dict[str, Optional[CachedAppointment]]:
+    """``get_user_appointments_by_ids``, with the user's cached appointments answered first.
+
+    Only the ids missing from the appointment cache are queried.
+    """
+    appointments = await cached_user_appointments(user_id)
+    cached = appointments.by_id if appointments is not None else {}
+    found: Dict[str, Optional[CachedAppointment]] = {
+        i: cached[i] for i in appointment_ids if i in cached
+    }
+    missing = [i for i in dict.fromkeys(appointment_ids) if i not in found]
+    if missing:
+        async with get_db(readonly=True, user_id=user_id) as session:
+            found.update(await get_user_appointments_by_ids(session, user_id, missing))
+    return found
+
+
+@db_operation
 async def get_appointment_by_id(
     session: AsyncSession, appointment_id: str
 ) -> Optional[orm_models.Appointment]:
     """Get appointment by ID."""
-    result = await session.execute(
-        select(orm_models.Appointment).where(orm_models.Appointment.id == appointment_id)
-    )
+    result = await session.execute(_APPOINTMENT_BY_ID, {"id": appointment_id})
     return result.scalar_one_or_none()
@@ -0,0 +1,125 @@
+"""Prometheus metrics: MCP tool latencies, db_service and SQL timings, cache and pool gauges."""
+
+import contextvars
+import functools
+import time
+from typing import Callable, Iterable
+
+from fastmcp.server.middleware import Middleware
+from prometheus_client import CollectorRegistry, Counter, Histogram
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from services.tracing import start_span
+
+# Our own registry, so only these metrics are exported (no process defaults)
+registry = CollectorRegistry()
+
+# Latency buckets in seconds, from a cache hit to a slow remote transaction
+LATENCY_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+tool_latency = Histogram(
+    "mcp_tool_duration_seconds", "MCP tool call latency", ["tool"],
+    buckets=LATENCY_BUCKETS, registry=registry,
+)
+tool_errors = Counter(
+    "mcp_tool_errors", "MCP tool calls that raised", ["tool", "error"], registry=registry,
+)
+db_operation_latency = Histogram(
+    "db_service_duration_seconds", "Latency of db_service functions", ["operation"],
+    buckets=LATENCY_BUCKETS, registry=registry,
+)
+db_query_latency = Histogram(
+    "db_query_duration_seconds", "SQL statement latency, by db_service function", ["operation"],
+    buckets=LATENCY_BUCKETS, registry=registry,
+)
+
+# db_service function the current SQL statements run for
+current_operation: contextvars.ContextVar[str] = contextvars.ContextVar(
+    "current_operation", default="other"
+)
+
+
+def db_operation(fn: Callable) -> Callable:
+    """Time and trace a db_service coroutine, and label the SQL it runs with its name."""
+    name = fn.__name__
+
+    @functools.wraps(fn)
+    async def wrapper(*args, **kwargs):
+        token = current_operation.set(name)
+        start = time.perf_counter()
+        try:
+            with start_span(f"db_service.{name}"):
+                return await fn(*args, **kwargs)
+        finally:
+            db_operation_latency.labels(name).observe(time.perf_counter() - start)
+            current_operation.reset(token)
+
+    return wrapper
+
+
+def instrument_engine(engine: AsyncEngine) -> None:
+    """Time every SQL statement run through ``engine``."""
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine.sync_engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        start = conn.info["query_start"].pop()
+        db_query_latency.labels(current_operation.get()).observe(time.perf_counter() - start)
+
+    @event.listens_for(engine.sync_engine, "handle_error")
+    def _error(context):
+        # Failed statements never reach after_cursor_execute
+        starts = context.connection.info.get("query_start") if context.connection else None
+        if starts:
+            elapsed = time.perf_counter() - starts.pop()
+            db_query_latency.labels(current_operation.get()).observe(elapsed)
+
+
+class ToolMetricsMiddleware(Middleware):
+    """Record the latency of every MCP tool call, and count the ones that fail."""
+
+    async def on_call_tool(self, context, call_next):
+        tool = context.message.name
+        start = time.perf_counter()
+        try:
+            return await call_next(context)
+        except Exception as e:
+            # fastmcp wraps what the tool raised in a ToolError
+            tool_errors.labels(tool, type(e.__cause__ or e).__name__).inc()
+            raise
+        finally:
+            tool_latency.labels(tool).observe(time.perf_counter() - start)
+
+
+class StatsCollector:
+    """Export stats dicts read at scrape time as gauges and counters.
+
+    ``source`` returns ``{name: stats}`` (e.g. ``database.pool_stats``);
+    keys in ``counters`` are exported as counters, the others as gauges,
+    as ``<prefix>_<key>{<label>="<name>"}``.
+    """
+
+    def __init__(self, prefix: str, label: str, source: Callable[[], dict],
+                 counters: Iterable[str] = ()):
+        self.prefix = prefix
+        self.label = label
+        self.source = source
+        self.counters = set(counters)
+
+    def collect(self):
+        families = {}
+        for name, stats in self.source().items():
+            for key, value in stats.items():
+                if key not in families:
+                    metric_name = f"{self.prefix}_{key}"
+                    family = CounterMetricFamily if key in self.counters else GaugeMetricFamily
+                    families[key] = family(metric_name, f"{self.prefix} {key}", labels=[self.label])
+                families[key].add_metric([name], value)
+        return families.values()
@@ -0,0 +1,221 @@
+"""In-memory fuzzy hospital name index (BK-tree over levenshtein distance)."""
+
+import threading
+from datetime import datetime
+from typing import Container, Dict, Iterable, List, Optional, Set, Tuple
+
+
+def levenshtein(a: str, b: str) -> int:
+    """Levenshtein distance between two strings (same metric as fuzzystrmatch).
+
+    Bit-parallel algorithm (Myers 1999, Hyyro 2001): one pass over ``a`` with
+    a handful of integer operations per character instead of a full DP row.
+    """
+    if a == b:
+        return 0
+    if len(a) < len(b):
+        a, b = b, a
+    if not b:
+        return len(a)
+
+    # Bitmask of the positions of every character of the pattern ``b``
+    peq: Dict[str, int] = {}
+    for i, char in enumerate(b):
+        peq[char] = peq.get(char, 0) | (1 << i)
+
+    mask = (1 << len(b)) - 1
+    last = 1 << (len(b) - 1)
+    pv, mv, score = mask, 0, len(b)
+    for char in a:
+        eq = peq.get(char, 0)
+        xv = eq | mv
+        xh = (((eq & pv) + pv) ^ pv) | eq
+        ph = mv | ~(xh | pv)
+        mh = pv & xh
+        if ph & last:
+            score += 1
+        elif mh & last:
+            score -= 1
+        ph = (ph << 1) | 1
+        mh <<= 1
+        pv = (mh | ~(xv | ph)) & mask
+        mv = ph & xv & mask
+    return score
+
+
+class BKTree:
+    """Burkhard-Keller tree of strings under the levenshtein metric.
+
+    Nodes are ``[key, {distance: child}]`` lists. Keys are never removed:
+    callers keep track of which keys are still alive.
+    """
+
+    def __init__(self):
+        self._root: Optional[list] = None
+        self.size = 0
+
+    def add(self, key: str) -> None:
+        """Insert ``key`` (no-op if already present)."""
+        if self._root is None:
+            self._root = [key, {}]
+            self.size = 1
+            return
+
+        node = self._root
+        while True:
+            d = levenshtein(key, node[0])
+            if d == 0:
+                return
+            child = node[1].get(d)
+            if child is None:
+                node[1][d] = [key, {}]
+                self.size += 1
+                return
+            node = child
+
+    def nearest(self, query: str, max_distance: int,
+                alive: Optional[Container[str]] = None) -> Tuple[int, List[str]]:
+        """Return ``(distance, keys)`` of the closest keys within ``max_distance``.
+
+        The search radius shrinks to the best distance found so far, so typo'd
+        queries only visit a small part of the tree. Keys not in ``alive``
+        (when given) are skipped but still used for navigation.
+        """
+        best_distance = max_distance
+        best: List[str] = []
+        if self._root is None:
+            return best_distance, best
+
+        # Entries are (node, slack) where slack = |edge - parent distance| is a
+        # lower bound of the distance between the query and anything below.
+        stack = [(self._root, 0)]
+        while stack:
+            node, slack = stack.pop()
+            if slack > best_distance:
+                continue
+            key, children = node
+            d = levenshtein(query, key)
+            if d <= best_distance and (alive is None or key in alive):
+                if d < best_distance or not best:
+                    best_distance = d
+                    best = [key]
+                else:
+                    best.append(key)
+            # Push the most promising children last so they are visited first
+            candidates = [
+                (abs(k - d), child) for k, child in children.items()
+                if abs(k - d) <= best_distance
+            ]
+            candidates.sort(key=lambda item: item[0], reverse=True)
+            stack.extend((child, child_slack) for child_slack, child in candidates)
+
+        return best_distance, best
+
+
+class HospitalNameIndex:
+    """Resolve a hospital name to its id without a database round trip.
+
+    Names are normalized with ``lower()`` like the SQL lookup in
+    ``db_service.get_hospital_by_name``, and resolution returns the closest
+    name within ``max_distance``. Ties are broken on (name, id) so results
+    are deterministic.
+
+    Lookups and changes hold a lock, so that they can run in worker threads:
+    a fuzzy lookup may visit thousands of names.
+    """
+
+    MAX_MEMO = 4096
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.reset()
+
+    def reset(self) -> None:
+        """Forget every hospital; the next lookup has to reload the catalog."""
+        self._tree = BKTree()
+        self._ids_by_name: Dict[str, Set[str]] = {}
+        self._name_by_id: Dict[str, str] = {}
+        # Fuzzy resolutions already computed, dropped on every catalog change
+        self._resolved: Dict[Tuple[str, int], Optional[str]] = {}
+        self.loaded = False
+        self.watermark: Optional[datetime] = None
+
+    def __len__(self) -> int:
+        return len(self._name_by_id)
+
+    def ids(self) -> Set[str]:
+        """Ids of the indexed hospitals."""
+        with self._lock:
+            return set(self._name_by_id)
+
+    def load(self, rows: Iterable[Tuple[str, str, Optional[datetime]]]) -> None:
+        """Rebuild the index from ``(id, name, updatedAt)`` rows."""
+        self.reset()
+        self.update(rows)
+        self.loaded = True
+
+    def update(self, rows: Iterable[Tuple[str, str, Optional[datetime]]]) -> None:
+        """Insert or rename the hospitals in ``(id, name, updatedAt)`` rows."""
+        with self._lock:
+            for hospital_id, name, updated_at in rows:
+                self.upsert(hospital_id, name)
+                if updated_at is not None and (
+                    self.watermark is None or updated_at > self.watermark
+                ):
+                    self.watermark = updated_at
+
+    def upsert(self, hospital_id: str, name: str) -> None:
+        """Index ``hospital_id`` under ``name``, replacing any previous name."""
+        with self._lock:
+            self.remove(hospital_id)
+            self._resolved.clear()
+            key = name.lower()
+            self._tree.add(key)
+            self._ids_by_name.setdefault(key, set()).add(hospital_id)
+            self._name_by_id[hospital_id] = key
+
+    def remove(self, hospital_id: str) -> None:
+        """Drop ``hospital_id`` from the index."""
+        with self._lock:
+            key = self._name_by_id.pop(hospital_id, None)
+            if key is None:
+                return
+            self._resolved.clear()
+            ids = self._ids_by_name[key]
+            ids.discard(hospital_id)
+            if not ids:
+                del self._ids_by_name[key]
+
+    def resolve(self, name: str, max_distance: int = 10) -> Optional[str]:
+        """Return the id of the closest hospital within ``max_distance``, if any."""
+        key = name.lower()
+        with self._lock:
+            ids = self._ids_by_name.get(key)
+            if ids:
+                return min(ids)
+
+            memo_key = (key, max_distance)
+            if memo_key in self._resolved:
+                return self._resolved[memo_key]
+
+            _, keys = self._tree.nearest(key, max_distance, alive=self._ids_by_name.keys())
+            hospital_id = min(self._ids_by_name[min(keys)]) if keys else None
+            if len(self._resolved) >= self.MAX_MEMO:
+                self._resolved.clear()
+            self._resolved[memo_key] = hospital_id
+            return hospital_id
+
+    def resolve_exact(self, names: Iterable[str]) -> Dict[str, Optional[str]]:
+        """The id of the hospital named exactly (ignoring case) as each name, if any."""
+        with self._lock:
+            return {
+                name: min(ids) if (ids := self._ids_by_name.get(name.lower())) else None
+                for name in names
+            }
+
+    def resolve_all(
+        self, names: Iterable[str], max_distance: int = 10
+    ) -> Dict[str, Optional[str]]:
+        """``resolve`` every name, holding the lock once."""
+        with self._lock:
+            return {name: self.resolve(name, max_distance) for name in names}
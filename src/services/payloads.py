@@ -0,0 +1,55 @@
+"""Pre-serialized tool responses, reused while the data behind them is unchanged."""
+
+import hashlib
+from dataclasses import dataclass
+from typing import Any, Optional
+
+import pydantic_core
+from fastmcp.tools.tool import ToolResult
+from mcp.types import TextContent
+
+
+class PayloadResult(ToolResult):
+    """ToolResult of an already serialized response.
+
+    The JSON text is reused as the text content instead of being dumped
+    again; and as ``meta`` is always set, the MCP server sends the result as
+    is instead of validating it against the tool's output schema (it was
+    built from validated models).
+    """
+
+    def __init__(self, structured: dict, text: str, meta: dict):
+        super().__init__(
+            content=[TextContent(type="text", text=text)],
+            structured_content=structured,
+            meta=meta,
+        )
+
+
+@dataclass(frozen=True)
+class Payload:
+    """A tool response serialized once, with the version token clients revalidate with."""
+
+    structured: dict
+    text: str
+    version: str
+
+    @classmethod
+    def of(cls, response: Any, wrap: bool = False) -> "Payload":
+        """Serialize ``response``; ``wrap`` it in ``{"result": ...}`` for non-object outputs.
+
+        ``version`` is a hash of the JSON, so it only changes with the
+        response, across cache expiries and server processes alike.
+        """
+        value = pydantic_core.to_jsonable_python(response)
+        text = pydantic_core.to_json(value).decode()
+        version = hashlib.blake2b(text.encode(), digest_size=12).hexdigest()
+        return cls({"result": value} if wrap else value, text, version)
+
+    def result(self, unchanged: "Payload", client_version: Optional[str] = None) -> ToolResult:
+        """The tool result: ``unchanged`` if the client already has this version."""
+        if client_version == self.version:
+            return PayloadResult(
+                unchanged.structured, unchanged.text, {"version": self.version, "unchanged": True}
+            )
+        return PayloadResult(self.structured, self.text, {"version": self.version})
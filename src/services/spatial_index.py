@@ -0,0 +1,189 @@
+"""In-memory nearest-hospital index (KD-tree over points on the unit sphere)."""
+
+import heapq
+import math
+from typing import Dict, List, Optional, Tuple
+
+EARTH_RADIUS_KM = 6371.0088
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle distance in kilometers between two (lat, lon) points in degrees."""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def _to_xyz(lat: float, lon: float) -> Tuple[float, float, float]:
+    phi, lam = math.radians(lat), math.radians(lon)
+    return (math.cos(phi) * math.cos(lam), math.cos(phi) * math.sin(lam), math.sin(phi))
+
+
+def _chord_from_km(km: float) -> float:
+    """Straight-line distance on the unit sphere matching a great-circle distance."""
+    return 2 * math.sin(min(km / EARTH_RADIUS_KM, math.pi) / 2)
+
+
+def _km_from_chord(chord: float) -> float:
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, chord / 2))
+
+
+class KDTree:
+    """Static 3-d KD-tree.
+
+    Points are mapped to unit vectors, where euclidean (chord) distance grows
+    with great-circle distance, so a plain euclidean k-NN search gives the
+    exact haversine nearest neighbours. The tree is implicit: node ``mid`` of
+    a range splits it into ``[lo, mid)`` and ``(mid, hi)``, and ranges of at
+    most ``LEAF_SIZE`` points are scanned linearly.
+    """
+
+    LEAF_SIZE = 16
+
+    def __init__(self, ids: List[str], xyz: List[Tuple[float, float, float]]):
+        order = list(range(len(ids)))
+        self._axis = [0] * len(ids)
+        self._build(order, [list(c) for c in zip(*xyz)] if xyz else [[], [], []])
+        self._ids = [ids[i] for i in order]
+        self._xyz = [xyz[i] for i in order]
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def _build(self, order: List[int], coords: List[List[float]]) -> None:
+        stack = [(0, len(order))]
+        while stack:
+            lo, hi = stack.pop()
+            if hi - lo <= self.LEAF_SIZE:
+                continue
+            sub = order[lo:hi]
+            # Split on the axis with the largest spread, estimated on a sample
+            sample = sub[::max(1, len(sub) // 64)]
+            spreads = [
+                max(map(values.__getitem__, sample)) - min(map(values.__getitem__, sample))
+                for values in coords
+            ]
+            axis = spreads.index(max(spreads))
+            sub.sort(key=coords[axis].__getitem__)
+            order[lo:hi] = sub
+            mid = (lo + hi) // 2
+            self._axis[mid] = axis
+            stack.append((lo, mid))
+            stack.append((mid + 1, hi))
+
+    def nearest(self, xyz: Tuple[float, float, float], k: int,
+                max_chord: Optional[float] = None) -> List[Tuple[float, str]]:
+        """Return up to ``k`` ``(chord distance, id)`` pairs, closest first."""
+        qx, qy, qz = xyz
+        q = xyz
+        points, ids, axes = self._xyz, self._ids, self._axis
+        bound = math.inf if max_chord is None else max_chord * max_chord
+        heap: List[Tuple[float, int]] = []  # max-heap of (-squared distance, position)
+
+        leaf_size = self.LEAF_SIZE
+
+        def consider(pos: int) -> None:
+            nonlocal bound
+            px, py, pz = points[pos]
+            d2 = (px - qx) ** 2 + (py - qy) ** 2 + (pz - qz) ** 2
+            if d2 <= bound:
+                if len(heap) < k:
+                    heapq.heappush(heap, (-d2, pos))
+                elif d2 < -heap[0][0]:
+                    heapq.heapreplace(heap, (-d2, pos))
+                if len(heap) == k:
+                    bound = min(bound, -heap[0][0])
+
+        def visit(lo: int, hi: int) -> None:
+            if hi - lo <= leaf_size:
+                for pos in range(lo, hi):
+                    consider(pos)
+                return
+
+            mid = (lo + hi) // 2
+            consider(mid)
+            axis = axes[mid]
+            diff = q[axis] - points[mid][axis]
+            if diff < 0:
+                visit(lo, mid)
+                if diff * diff <= bound:
+                    visit(mid + 1, hi)
+            else:
+                visit(mid + 1, hi)
+                if diff * diff <= bound:
+                    visit(lo, mid)
+
+        if k > 0:
+            visit(0, len(points))
+        return sorted((math.sqrt(-d2), ids[pos]) for d2, pos in heap)
+
+
+class HospitalSpatialIndex:
+    """k-nearest hospitals of a (lat, lon) point, by haversine distance.
+
+    Coordinates are updated incrementally. The KD-tree is static: after a
+    change ``stale`` is set and the caller builds a new tree from
+    ``snapshot()`` (possibly in a worker thread) and installs it, while
+    queries keep using the previous tree.
+    """
+
+    def __init__(self):
+        self._points: Dict[str, Tuple[float, float]] = {}
+        self._tree: Optional[KDTree] = None
+        self.stale = True
+
+    def __len__(self) -> int:
+        return len(self._points)
+
+    @property
+    def has_tree(self) -> bool:
+        return self._tree is not None
+
+    def upsert(self, hospital_id: str, latitude: Optional[float],
+               longitude: Optional[float]) -> None:
+        """Set the coordinates of a hospital (None removes it from the index)."""
+        if latitude is None or longitude is None:
+            self.remove(hospital_id)
+            return
+        if self._points.get(hospital_id) != (latitude, longitude):
+            self._points[hospital_id] = (latitude, longitude)
+            self.stale = True
+
+    def remove(self, hospital_id: str) -> None:
+        """Drop a hospital from the index."""
+        if self._points.pop(hospital_id, None) is not None:
+            self.stale = True
+
+    def snapshot(self) -> Tuple[List[str], List[Tuple[float, float, float]]]:
+        """Ids and unit vectors of the current points, to build a tree from.
+
+        Safe to call from a worker thread while the event loop updates the
+        index: the points are copied in one step, atomic under the GIL.
+        """
+        self.stale = False
+        points = list(self._points.items())
+        return [i for i, _ in points], [_to_xyz(*point) for _, point in points]
+
+    def install(self, tree: KDTree) -> None:
+        """Start answering queries with ``tree``."""
+        self._tree = tree
+
+    def rebuild(self) -> None:
+        """Build and install a tree synchronously."""
+        self.install(KDTree(*self.snapshot()))
+
+    def nearest(self, latitude: float, longitude: float, k: int,
+                max_km: Optional[float] = None) -> List[Tuple[str, float]]:
+        """Return up to ``k`` ``(hospital id, distance km)`` pairs, closest first."""
+        if self._tree is None:
+            self.rebuild()
+
+        max_chord = None if max_km is None else _chord_from_km(max_km)
+        return [
+            (hospital_id, _km_from_chord(chord))
+            for chord, hospital_id in self._tree.nearest(
+                _to_xyz(latitude, longitude), k, max_chord
+            )
+        ]
@@ -0,0 +1,112 @@
+"""Request tracing: spans for MCP tools, db_service calls, SQL statements and JWT checks.
+
+Tracing is off until ``configure_tracing`` installs an exporter; spans are
+then no-ops. ``TRACING_EXPORTER`` selects the production exporter:
+``stdout``, or ``otlp`` (OTLP over HTTP, configured by the standard
+``OTEL_EXPORTER_OTLP_*`` variables).
+"""
+
+import os
+from typing import Optional
+
+from fastmcp.server.middleware import Middleware
+from opentelemetry import trace
+from opentelemetry.sdk.resources import Resource
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import (
+    BatchSpanProcessor,
+    ConsoleSpanExporter,
+    SimpleSpanProcessor,
+    SpanExporter,
+)
+from opentelemetry.trace import Status, StatusCode
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+TRACING_EXPORTER = os.getenv("TRACING_EXPORTER", "").lower()
+# Longest SQL text recorded on a span
+MAX_STATEMENT_LENGTH = 2000
+
+provider: Optional[TracerProvider] = None
+tracer: trace.Tracer = trace.NoOpTracer()
+
+
+def configure_tracing(exporter: SpanExporter, batch: bool = True) -> TracerProvider:
+    """Start recording spans and send them to ``exporter``.
+
+    ``batch=False`` exports every span as soon as it ends, for tests.
+    """
+    global provider, tracer
+    if provider is None:
+        provider = TracerProvider(resource=Resource.create({"service.name": "mcp-carestral"}))
+        tracer = provider.get_tracer("carestral")
+    processor = BatchSpanProcessor(exporter) if batch else SimpleSpanProcessor(exporter)
+    provider.add_span_processor(processor)
+    return provider
+
+
+def configure_tracing_from_env() -> None:
+    """Install the exporter selected by ``TRACING_EXPORTER``, if any."""
+    if not TRACING_EXPORTER:
+        return
+    if TRACING_EXPORTER == "stdout":
+        configure_tracing(ConsoleSpanExporter())
+    elif TRACING_EXPORTER == "otlp":
+        # Imported on use: it loads protobuf, which nothing else needs
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+
+        configure_tracing(OTLPSpanExporter())
+    else:
+        raise ValueError(f"Unknown TRACING_EXPORTER '{TRACING_EXPORTER}' (expected stdout or otlp)")
+
+
+def shutdown_tracing() -> None:
+    """Flush the spans not exported yet."""
+    if provider is not None:
+        provider.shutdown()
+
+
+def start_span(name: str, **attributes):
+    """Context manager opening a child span of the current one."""
+    return tracer.start_as_current_span(name, attributes=attributes or None)
+
+
+class ToolTracingMiddleware(Middleware):
+    """Open a span around every MCP tool call."""
+
+    async def on_call_tool(self, context, call_next):
+        with start_span(f"tool {context.message.name}", **{"mcp.tool.name": context.message.name}):
+            return await call_next(context)
+
+
+def instrument_engine(engine: AsyncEngine) -> None:
+    """Record a span for every SQL statement run through ``engine``, with its row count."""
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        span = tracer.start_span(
+            statement.split(None, 1)[0].upper() if statement else "SQL",
+            kind=trace.SpanKind.CLIENT,
+            attributes={
+                "db.system": "postgresql",
+                "db.statement": statement[:MAX_STATEMENT_LENGTH],
+            },
+        )
+        conn.info.setdefault("trace_spans", []).append(span)
+
+    @event.listens_for(engine.sync_engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        span = conn.info["trace_spans"].pop()
+        if cursor.rowcount is not None and cursor.rowcount >= 0:
+            span.set_attribute("db.rows", cursor.rowcount)
+        span.end()
+
+    @event.listens_for(engine.sync_engine, "handle_error")
+    def _error(context):
+        spans = context.connection.info.get("trace_spans") if context.connection else None
+        if spans:
+            span = spans.pop()
+            span.record_exception(context.original_exception)
+            span.set_status(Status(StatusCode.ERROR, str(context.original_exception)))
+            span.end()
+
@@ -1,6 +1,11 @@
 """Pytest configuration and shared fixtures for all tests."""
 
+import uuid
+
+import fastmcp.server.dependencies
 import pytest
+import pytest_asyncio
+from sqlalchemy import delete
 
 
 @pytest.fixture(scope="session", autouse=True)
@@ -11,3 +16,39 @@ def setup_event_loop_policy():
 
     if sys.platform == "win32":
         asyncio.set_event_loop_policy(asyncio.WindowsProactorEventLoopPolicy())
+
+
+@pytest_asyncio.fixture
+async def booking_target(monkeypatch):
+    """A throw-away user and hospital, removed with their appointments afterwards."""
+    from database import get_db
+    from models import orm_models
+
+    user_id = f"stress-{uuid.uuid4()}"
+    hospital_id = f"stress-{uuid.uuid4()}"
+    hospital_name = f"Stress Test Hospital {hospital_id[-12:]}"
+    async with get_db() as session:
+        session.add(orm_models.User(id=user_id, email=f"{user_id}@example.com", password="x"))
+        session.add(orm_models.Hospital(id=hospital_id, name=hospital_name, city="Nowhere"))
+
+    class Token:
+        client_id = user_id
+        claims: dict = {}
+
+    monkeypatch.setattr(fastmcp.server.dependencies, "get_access_token", lambda: Token())
+    # All the bookings come from one client: lift its booking budget
+    from server import admission
+    monkeypatch.setitem(admission.limits, "booking", (0, 0))
+    yield hospital_id, hospital_name
+
+    async with get_db() as session:
+        await session.execute(
+            delete(orm_models.SlotSeat).where(orm_models.SlotSeat.hospitalId == hospital_id)
+        )
+        await session.execute(
+            delete(orm_models.Appointment).where(orm_models.Appointment.userId == user_id)
+        )
+        await session.execute(
+            delete(orm_models.Hospital).where(orm_models.Hospital.id == hospital_id)
+        )
+        await session.execute(delete(orm_models.User).where(orm_models.User.id == user_id))
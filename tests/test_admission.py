@@ -0,0 +1,79 @@
+"""Tests for per-client rate limits and load shedding."""
+
+import pytest
+
+from services.admission import (
+    AdmissionMiddleware,
+    OverloadedError,
+    RateLimitError,
+    TokenBucket,
+)
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_admission(clock, checkout_wait=0.0, **limits):
+    settings = dict(read_rate=2, read_burst=4, booking_rate=0.5, booking_burst=2, shed_wait=0.5)
+    settings.update(limits)
+    return AdmissionMiddleware(
+        booking_tools={"create_rdv", "create_rdvs"},
+        checkout_wait=lambda: checkout_wait,
+        clock=clock,
+        **settings,
+    )
+
+
+def test_token_bucket_refills_at_rate():
+    bucket = TokenBucket(rate=2, burst=4, now=0)
+    assert [bucket.take(1, 0) for _ in range(4)] == [0, 0, 0, 0]
+    assert bucket.take(1, 0) == pytest.approx(0.5)
+    assert bucket.take(1, 0.5) == 0
+    assert bucket.take(1, 100) == 0
+    assert bucket.tokens == 3  # never more than the burst
+
+
+def test_clients_and_budgets_are_limited_separately():
+    clock = Clock()
+    admission = make_admission(clock)
+    for _ in range(4):
+        admission.admit("alice", "list_rdvs")
+    with pytest.raises(RateLimitError, match="Too many read calls, retry after 1 s"):
+        admission.admit("alice", "list_rdvs")
+
+    admission.admit("bob", "list_rdvs")
+    admission.admit("alice", "create_rdv")
+    clock.now = 0.5
+    admission.admit("alice", "list_rdvs")
+    assert admission.stats()["read"] == {"rate_limited": 1, "shed": 0}
+
+
+def test_bulk_bookings_cost_one_per_appointment():
+    clock = Clock()
+    admission = make_admission(clock)
+    admission.admit("alice", "create_rdvs", {"requests": [{}, {}]})
+    with pytest.raises(RateLimitError, match="Too many booking calls, retry after 2 s"):
+        admission.admit("alice", "create_rdv")
+
+    # Bulk calls larger than the burst go through on a full bucket
+    clock.now = 10
+    admission.admit("alice", "create_rdvs", {"requests": [{}] * 50})
+
+
+def test_zero_rate_disables_the_limit():
+    admission = make_admission(Clock(), booking_rate=0)
+    for _ in range(100):
+        admission.admit("alice", "create_rdv")
+
+
+def test_reads_are_shed_under_pool_pressure_but_not_bookings():
+    admission = make_admission(Clock(), checkout_wait=1.2)
+    with pytest.raises(OverloadedError, match="retry after 2 s"):
+        admission.admit("alice", "list_hospitals")
+    admission.admit("alice", "create_rdv")
+    assert admission.stats()["read"] == {"rate_limited": 0, "shed": 1}
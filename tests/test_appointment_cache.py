@@ -0,0 +1,151 @@
+"""Tests for the per-user appointment cache and its write-through."""
+
+import asyncio
+import json
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy.orm import Session
+
+from database import APPLICATION_NAME
+from services import db_service
+from services.appointment_cache import AppointmentCache, CachedAppointment
+from services.cache import MISSING
+
+T0 = datetime(2026, 3, 1, 9, 0)
+
+
+def appointment(i: int, user_id: str = "alice") -> CachedAppointment:
+    return CachedAppointment(
+        id=f"a{i}", userId=user_id, hospitalId="h1",
+        appointmentDateTime=T0 + timedelta(days=i), status="pending",
+        createdAt=T0 + timedelta(minutes=i),
+    )
+
+
+def loader(*appointments):
+    calls = []
+
+    async def load():
+        calls.append(1)
+        return list(appointments)
+
+    return load, calls
+
+
+@pytest.mark.asyncio
+async def test_entries_are_loaded_once_and_paged_newest_first():
+    cache = AppointmentCache(maxsize=10, ttl=60, max_per_user=10)
+    load, calls = loader(appointment(1), appointment(3), appointment(2))
+
+    entry = await cache.get("alice", load)
+    assert [a.id for a in entry.page(None, 2)] == ["a3", "a2"]
+    last = entry.page(None, 2)[-1]
+    assert [a.id for a in entry.page((last.createdAt, last.id), 2)] == ["a1"]
+
+    assert await cache.get("alice", load) is entry
+    assert len(calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_committed_appointments_are_added_to_cached_users():
+    cache = AppointmentCache(maxsize=10, ttl=60, max_per_user=10)
+    load, calls = loader(appointment(1))
+    await cache.get("alice", load)
+
+    cache.add("alice", [appointment(2)])
+    cache.add("bob", [appointment(3, "bob")])
+
+    entry = await cache.get("alice", load)
+    assert [a.id for a in entry.items] == ["a2", "a1"]
+    assert cache.entries.peek("bob") is MISSING
+    assert len(calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_load_overlapping_a_write_is_not_cached():
+    cache = AppointmentCache(maxsize=10, ttl=60, max_per_user=10)
+    started, release = asyncio.Event(), asyncio.Event()
+
+    async def slow_load():
+        started.set()
+        await release.wait()
+        return [appointment(1)]
+
+    reader = asyncio.create_task(cache.get("alice", slow_load))
+    await started.wait()
+    # Committed after the load read its snapshot: the load does not have it
+    cache.add("alice", [appointment(2)])
+    release.set()
+
+    assert [a.id for a in (await reader).items] == ["a1"]
+    load, calls = loader(appointment(1), appointment(2))
+    assert len((await cache.get("alice", load)).items) == 2
+    assert len(calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_users_with_too_many_appointments_are_not_cached():
+    cache = AppointmentCache(maxsize=10, ttl=60, max_per_user=2)
+    load, calls = loader(appointment(1), appointment(2), appointment(3))
+
+    assert await cache.get("alice", load) is None
+    assert await cache.get("alice", load) is None
+    assert len(calls) == 1
+
+    # An entry growing past the limit is dropped
+    load, _ = loader(appointment(1), appointment(2))
+    await cache.get("bob", load)
+    cache.add("bob", [appointment(4, "bob")])
+    assert cache.entries.peek("bob") is MISSING
+
+
+@pytest.mark.asyncio
+async def test_least_recently_used_users_are_evicted():
+    cache = AppointmentCache(maxsize=2, ttl=60, max_per_user=10)
+    for user_id in ["alice", "bob"]:
+        await cache.get(user_id, loader(appointment(1, user_id))[0])
+    await cache.get("alice", loader()[0])
+    await cache.get("carol", loader()[0])
+
+    assert cache.entries.peek("bob") is MISSING
+    assert cache.entries.peek("alice") is not MISSING
+    assert cache.stats()["evictions"] == 1
+
+
+@pytest.mark.asyncio
+async def test_commit_hook_writes_through_and_skips_rollbacks(monkeypatch):
+    cache = AppointmentCache(maxsize=10, ttl=60, max_per_user=10)
+    monkeypatch.setattr(db_service, "appointment_cache", cache)
+    await cache.get("alice", loader()[0])
+
+    session = Session()
+    session.info[db_service._NEW_APPOINTMENTS] = [appointment(1)]
+    session.rollback()
+    session.info[db_service._NEW_APPOINTMENTS] = [appointment(2)]
+    with session.begin_nested():
+        pass
+    assert cache.entries.peek("alice").items == []
+
+    session.commit()
+    assert [a.id for a in cache.entries.peek("alice").items] == ["a2"]
+    assert db_service._NEW_APPOINTMENTS not in session.info
+
+
+@pytest.mark.asyncio
+async def test_notifications_of_other_processes_invalidate(monkeypatch):
+    cache = AppointmentCache(maxsize=10, ttl=60, max_per_user=10)
+    monkeypatch.setattr(db_service, "appointment_cache", cache)
+    for user_id in ["alice", "bob"]:
+        await cache.get(user_id, loader()[0])
+
+    db_service.appointments_changed(json.dumps({"user": "alice", "origin": APPLICATION_NAME}))
+    assert cache.entries.peek("alice") is not MISSING
+
+    db_service.appointments_changed(json.dumps({"user": "alice", "origin": "worker-2"}))
+    assert cache.entries.peek("alice") is MISSING
+    assert cache.entries.peek("bob") is not MISSING
+
+    # TRUNCATE
+    db_service.appointments_changed(json.dumps({"origin": "worker-2"}))
+    assert len(cache.entries) == 0
@@ -0,0 +1,96 @@
+"""Tests for the ownership-checked, batched appointment status lookups."""
+
+import sys
+import uuid
+from contextlib import asynccontextmanager
+from datetime import datetime
+
+import fastmcp.server.dependencies
+import pytest
+from fastmcp.client import Client, FastMCPTransport
+from sqlalchemy import delete
+
+from database import get_db
+from models import orm_models
+from services import db_service
+from services.appointment_cache import AppointmentCache, CachedAppointment, UserAppointments
+
+T0 = datetime(2026, 3, 1, 9, 0)
+
+
+class Token:
+    client_id = "alice"
+    claims: dict = {}
+
+
+@pytest.mark.asyncio
+async def test_statuses_query_only_uncached_ids(monkeypatch):
+    import server
+
+    cached = CachedAppointment("a1", "alice", "h1", T0, "confirmed", T0)
+    queried = CachedAppointment("a2", "alice", "h1", T0, "pending", T0)
+    cache = AppointmentCache(maxsize=10, ttl=60, max_per_user=10)
+    cache.entries.set("alice", UserAppointments([cached]))
+    lookups = []
+
+    async def get_user_appointments_by_ids(session, user_id, appointment_ids):
+        lookups.append((user_id, appointment_ids))
+        return {"a2": queried, "b1": None}
+
+    @asynccontextmanager
+    async def get_db(readonly=False, user_id=None):
+        yield None
+
+    monkeypatch.setattr(fastmcp.server.dependencies, "get_access_token", lambda: Token())
+    monkeypatch.setattr(db_service, "appointment_cache", cache)
+    monkeypatch.setattr(db_service, "get_user_appointments_by_ids", get_user_appointments_by_ids)
+    monkeypatch.setattr(db_service, "get_db", get_db)
+
+    async with Client(FastMCPTransport(server.mcp)) as client:
+        result = await client.call_tool(
+            "get_appointment_statuses", {"appointment_ids": ["a1", "b1", "nope", "a2", "b1"]}
+        )
+
+    assert [r["status"] for r in result.structured_content["result"]] == [
+        "confirmed", "Access Denied", "Not Found", "pending", "Access Denied",
+    ]
+    assert "appointmentDateTime" not in result.structured_content["result"][1]
+    assert lookups == [("alice", ["b1", "nope", "a2"])]
+
+
+@pytest.mark.asyncio
+@pytest.mark.integration
+@pytest.mark.skipif(sys.platform == "win32", reason="Event loop issues on Windows")
+async def test_ownership_is_checked_in_sql():
+    users = [f"status-{uuid.uuid4()}" for _ in range(2)]
+    hospital_id = f"status-{uuid.uuid4()}"
+    appointment_ids = [str(uuid.uuid4()) for _ in users]
+    async with get_db() as session:
+        for user_id in users:
+            session.add(orm_models.User(id=user_id, email=f"{user_id}@example.com", password="x"))
+        session.add(orm_models.Hospital(id=hospital_id, name=hospital_id, city="Nowhere"))
+        await session.flush()
+        for user_id, appointment_id in zip(users, appointment_ids):
+            session.add(orm_models.Appointment(
+                id=appointment_id, userId=user_id, hospitalId=hospital_id,
+                appointmentDateTime=T0, status="pending",
+            ))
+
+    try:
+        async with get_db(readonly=True) as session:
+            found = await db_service.get_user_appointments_by_ids(
+                session, users[0], [*appointment_ids, "nope"]
+            )
+        assert found[appointment_ids[0]].status == "pending"
+        assert found[appointment_ids[0]].userId == users[0]
+        assert found[appointment_ids[1]] is None
+        assert "nope" not in found
+    finally:
+        async with get_db() as session:
+            await session.execute(
+                delete(orm_models.Appointment).where(orm_models.Appointment.userId.in_(users))
+            )
+            await session.execute(
+                delete(orm_models.Hospital).where(orm_models.Hospital.id == hospital_id)
+            )
+            await session.execute(delete(orm_models.User).where(orm_models.User.id.in_(users)))
@@ -0,0 +1,162 @@
+"""Tests for the caching JWT verifier, against a local JWKS stand-in server."""
+
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from authlib.jose import JsonWebKey
+from fastmcp.server.auth.providers.jwt import RSAKeyPair
+
+ISSUER = "hospiai-api"
+AUDIENCE = "hospiai-mcp"
+
+
+class JWKSServer:
+    """Serves ``/.well-known/jwks.json`` from ``keys`` ({kid: RSAKeyPair}) and counts fetches."""
+
+    def __init__(self):
+        self.keys = {}
+        self.fetches = 0
+        self.available = True
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                server.fetches += 1
+                if not server.available:
+                    self.send_response(503)
+                    self.end_headers()
+                    return
+                body = json.dumps({"keys": [
+                    {**JsonWebKey.import_key(pair.public_key, {"kty": "RSA"}).as_dict(), "kid": kid}
+                    for kid, pair in server.keys.items()
+                ]}).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self._httpd.server_address[1]}/.well-known/jwks.json"
+        threading.Thread(target=self._httpd.serve_forever, daemon=True).start()
+
+    def close(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+
+@pytest.fixture(scope="module")
+def key_pairs():
+    return {"k1": RSAKeyPair.generate(), "k2": RSAKeyPair.generate()}
+
+
+@pytest.fixture
+def jwks_server():
+    server = JWKSServer()
+    yield server
+    server.close()
+
+
+def make_verifier(jwks_server, **kwargs):
+    from auth import CachingJWTVerifier
+
+    return CachingJWTVerifier(
+        jwks_uri=jwks_server.url,
+        issuer=ISSUER,
+        audience=AUDIENCE,
+        algorithm="RS256",
+        required_scopes=["read:data"],
+        **kwargs,
+    )
+
+
+def make_token(pair, kid, expires_in_seconds=3600):
+    return pair.create_token(
+        subject="alice", issuer=ISSUER, audience=AUDIENCE, scopes=["read:data"],
+        expires_in_seconds=expires_in_seconds, kid=kid,
+    )
+
+
+@pytest.mark.asyncio
+async def test_verified_tokens_are_cached(jwks_server, key_pairs):
+    jwks_server.keys = {"k1": key_pairs["k1"]}
+    verifier = make_verifier(jwks_server)
+    token = make_token(key_pairs["k1"], "k1")
+
+    results = [await verifier.verify_token(token) for _ in range(20)]
+    assert all(r is not None and r.client_id == "alice" for r in results)
+    assert verifier.token_cache.stats()["hits"] == 19
+    assert jwks_server.fetches == 1
+
+    # A token signed by another key is not accepted because it is cached
+    forged = make_token(key_pairs["k2"], "k1")
+    assert await verifier.verify_token(forged) is None
+
+
+@pytest.mark.asyncio
+async def test_cached_token_expires_with_exp(jwks_server, key_pairs, monkeypatch):
+    jwks_server.keys = {"k1": key_pairs["k1"]}
+    verifier = make_verifier(jwks_server)
+    token = make_token(key_pairs["k1"], "k1", expires_in_seconds=60)
+
+    verified = await verifier.verify_token(token)
+    assert verified is not None
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 30)
+    assert await verifier.verify_token(token) is verified
+    monkeypatch.setattr(time, "time", lambda: verified.expires_at + 1)
+    assert await verifier.verify_token(token) is None
+
+
+@pytest.mark.asyncio
+async def test_key_rotation(jwks_server, key_pairs):
+    jwks_server.keys = {"k1": key_pairs["k1"]}
+    verifier = make_verifier(jwks_server, jwks_min_refresh=0)
+    old_token = make_token(key_pairs["k1"], "k1")
+    new_token = make_token(key_pairs["k2"], "k2")
+    assert await verifier.verify_token(old_token) is not None
+
+    # A new key id triggers one fetch, shared by concurrent requests
+    jwks_server.keys = {"k1": key_pairs["k1"], "k2": key_pairs["k2"]}
+    results = await asyncio.gather(*[verifier.verify_token(new_token) for _ in range(10)])
+    assert all(r is not None for r in results)
+    assert jwks_server.fetches == 2
+
+    # Once k1 is retired, tokens it signed are verified again and rejected
+    jwks_server.keys = {"k2": key_pairs["k2"]}
+    await verifier._refresh_jwks()
+    assert await verifier.verify_token(old_token) is None
+    assert await verifier.verify_token(new_token) is not None
+
+
+@pytest.mark.asyncio
+async def test_stale_keys_are_served_while_refreshing(jwks_server, key_pairs):
+    jwks_server.keys = {"k1": key_pairs["k1"]}
+    verifier = make_verifier(jwks_server, jwks_refresh=0.05)
+    assert await verifier.verify_token(make_token(key_pairs["k1"], "k1", 3000)) is not None
+
+    await asyncio.sleep(0.1)
+    jwks_server.available = False
+    # Keys are stale and the JWKS endpoint is down: verification still succeeds
+    assert await verifier.verify_token(make_token(key_pairs["k1"], "k1", 3001)) is not None
+    await asyncio.sleep(0.1)
+    assert jwks_server.fetches == 2
+    assert await verifier.verify_token(make_token(key_pairs["k1"], "k1", 3002)) is not None
+
+
+@pytest.mark.asyncio
+async def test_malformed_tokens_are_rejected(jwks_server, key_pairs):
+    jwks_server.keys = {"k1": key_pairs["k1"]}
+    verifier = make_verifier(jwks_server)
+
+    assert await verifier.verify_token("not-a-jwt") is None
+    assert await verifier.verify_token("e30.e30.") is None
+    assert jwks_server.fetches == 1
+    # Without a kid, the single key of the JWKS is used
+    assert await verifier.verify_token(make_token(key_pairs["k1"], None)) is not None
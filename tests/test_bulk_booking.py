@@ -0,0 +1,161 @@
+"""Tests for bulk booking: create_rdvs and the create_appointments batch behind it."""
+
+import sys
+import uuid
+from contextlib import asynccontextmanager, contextmanager
+from datetime import datetime, timedelta
+
+import fastmcp.server.dependencies
+import pytest
+from fastmcp.client import Client, FastMCPTransport
+from fastmcp.exceptions import ToolError
+from sqlalchemy import event, func, select
+
+WHEN = datetime(2031, 5, 5, 10, 0)
+
+
+def request(hospital_name: str, when: datetime = WHEN) -> dict:
+    return {"hospital_name": hospital_name, "appointmentDateTime": when.isoformat()}
+
+
+@pytest.fixture
+def client_token(monkeypatch):
+    class Token:
+        client_id = "alice"
+        claims: dict = {}
+
+    monkeypatch.setattr(fastmcp.server.dependencies, "get_access_token", lambda: Token())
+    from server import admission
+    monkeypatch.setitem(admission.limits, "booking", (0, 0))
+
+
+@contextmanager
+def appointment_inserts():
+    """Record the INSERT statements sent for appointments."""
+    from database import get_engine
+
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith('INSERT INTO "Appointment"'):
+            statements.append(parameters)
+
+    engine = get_engine().sync_engine
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+
+@pytest.mark.asyncio
+async def test_more_than_max_bulk_bookings_are_refused(client_token, monkeypatch):
+    import server
+    from services import db_service
+
+    async def create_appointments(**kwargs):
+        raise AssertionError("nothing may be booked")
+
+    monkeypatch.setattr(db_service, "create_appointments", create_appointments)
+
+    async with Client(FastMCPTransport(server.mcp)) as client:
+        with pytest.raises(ToolError, match=f"At most {server.MAX_BULK_BOOKINGS} appointments"):
+            await client.call_tool(
+                "create_rdvs", {"requests": [request("Nord")] * (server.MAX_BULK_BOOKINGS + 1)}
+            )
+
+
+@pytest.mark.asyncio
+async def test_each_request_reports_its_own_outcome(client_token, monkeypatch):
+    import server
+    from services import db_service
+
+    booked = []
+
+    async def resolve_hospital_ids(session, names):
+        return {name: None if name == "Nowhere" else f"id-{name}" for name in names}
+
+    async def create_appointments(session, user_id, bookings, description=None):
+        booked.append(bookings)
+        return [("a1", None), (None, "No capacity left in this time slot")]
+
+    @asynccontextmanager
+    async def get_db(readonly=False, user_id=None):
+        yield None
+
+    monkeypatch.setattr(db_service, "resolve_hospital_ids", resolve_hospital_ids)
+    monkeypatch.setattr(db_service, "create_appointments", create_appointments)
+    monkeypatch.setattr(server, "get_db", get_db)
+
+    async with Client(FastMCPTransport(server.mcp)) as client:
+        result = await client.call_tool("create_rdvs", {"requests": [
+            request("Nord"), request("Nowhere"), request("Sud"),
+        ]})
+
+    # Unknown hospitals fail alone and are not sent to the database
+    assert booked == [[("id-Nord", WHEN), ("id-Sud", WHEN)]]
+    assert [
+        (r["hospital_name"], r["status"], r.get("appointment_id"), r.get("error"))
+        for r in result.structured_content["result"]
+    ] == [
+        ("Nord", "confirmed", "a1", None),
+        ("Nowhere", "failed", None, "Hospital with name 'Nowhere' not found"),
+        ("Sud", "failed", None, "No capacity left in this time slot"),
+    ]
+
+
+@pytest.mark.asyncio
+@pytest.mark.integration
+@pytest.mark.skipif(sys.platform == "win32", reason="Event loop issues on Windows")
+async def test_bookings_go_in_one_insert(booking_target):
+    from database import get_db
+    from models import orm_models
+    from server import mcp
+
+    hospital_id, hospital_name = booking_target
+    requests = [request(hospital_name, WHEN + timedelta(hours=i)) for i in range(3)]
+    with appointment_inserts() as inserts:
+        async with Client(FastMCPTransport(mcp)) as client:
+            result = await client.call_tool("create_rdvs", {"requests": requests})
+
+    results = result.structured_content["result"]
+    assert [r["status"] for r in results] == ["confirmed"] * 3
+    assert len(inserts) == 1
+    async with get_db(readonly=True) as session:
+        stored = await session.scalar(
+            select(func.count())
+            .select_from(orm_models.Appointment)
+            .where(orm_models.Appointment.id.in_([r["appointment_id"] for r in results]))
+        )
+    assert stored == 3
+
+
+@pytest.mark.asyncio
+@pytest.mark.integration
+@pytest.mark.skipif(sys.platform == "win32", reason="Event loop issues on Windows")
+async def test_rejected_batches_are_retried_row_by_row(booking_target):
+    from database import get_db
+    from models import orm_models
+    from services import db_service
+
+    hospital_id, _ = booking_target
+    user_id = fastmcp.server.dependencies.get_access_token().client_id
+    # A hospital that does not exist breaks the foreign key of its row only
+    bookings = [
+        (hospital_id, WHEN),
+        (f"missing-{uuid.uuid4()}", WHEN),
+        (hospital_id, WHEN + timedelta(hours=1)),
+    ]
+    with appointment_inserts() as inserts:
+        async with get_db(user_id=user_id) as session:
+            outcomes = await db_service.create_appointments(session, user_id, bookings)
+
+    assert len(inserts) == 1 + len(bookings)
+    assert [error for _, error in outcomes] == [
+        None, "Appointment rejected by the database", None
+    ]
+    async with get_db(readonly=True) as session:
+        stored = await session.scalars(
+            select(orm_models.Appointment.id).where(orm_models.Appointment.userId == user_id)
+        )
+        assert set(stored) == {outcomes[0][0], outcomes[2][0]}
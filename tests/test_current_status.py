@@ -0,0 +1,71 @@
+"""Tests for the HospitalCurrentStatus projection kept by a trigger."""
+
+import sys
+import uuid
+from datetime import datetime
+
+import pytest
+from sqlalchemy import delete, select, update
+
+from database import get_db
+from models import orm_models
+
+
+async def current_status_id(hospital_id: str):
+    async with get_db() as session:
+        return await session.scalar(
+            select(orm_models.HospitalCurrentStatus.statusId)
+            .where(orm_models.HospitalCurrentStatus.hospitalId == hospital_id)
+        )
+
+
+@pytest.mark.asyncio
+@pytest.mark.integration
+@pytest.mark.skipif(sys.platform == "win32", reason="Event loop issues on Windows")
+async def test_removed_statuses_fall_back_to_the_latest_remaining():
+    hospitals = [f"current-{uuid.uuid4()}" for _ in range(2)]
+    statuses = [f"current-{uuid.uuid4()}" for _ in range(3)]
+    async with get_db() as session:
+        for hospital_id in hospitals:
+            session.add(orm_models.Hospital(id=hospital_id, name=hospital_id))
+        await session.flush()
+        for day, status_id in enumerate(statuses, 1):
+            session.add(orm_models.HospitalStatus(
+                id=status_id, hospitalId=hospitals[0], availableBeds=day,
+                createdAt=datetime(2026, 3, day),
+            ))
+
+    try:
+        assert await current_status_id(hospitals[0]) == statuses[2]
+        async with get_db() as session:
+            await session.execute(
+                delete(orm_models.HospitalStatus)
+                .where(orm_models.HospitalStatus.id == statuses[2])
+            )
+        assert await current_status_id(hospitals[0]) == statuses[1]
+
+        # Moved to another hospital
+        async with get_db() as session:
+            await session.execute(
+                update(orm_models.HospitalStatus)
+                .where(orm_models.HospitalStatus.id == statuses[1])
+                .values(hospitalId=hospitals[1])
+            )
+        assert await current_status_id(hospitals[0]) == statuses[0]
+        assert await current_status_id(hospitals[1]) == statuses[1]
+
+        async with get_db() as session:
+            await session.execute(
+                delete(orm_models.HospitalStatus)
+                .where(orm_models.HospitalStatus.id == statuses[0])
+            )
+        assert await current_status_id(hospitals[0]) is None
+    finally:
+        async with get_db() as session:
+            await session.execute(
+                delete(orm_models.HospitalStatus)
+                .where(orm_models.HospitalStatus.hospitalId.in_(hospitals))
+            )
+            await session.execute(
+                delete(orm_models.Hospital).where(orm_models.Hospital.id.in_(hospitals))
+            )
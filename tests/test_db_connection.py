@@ -65,3 +65,19 @@ async def test_queries():
         result = await session.execute(text("SELECT COUNT(*) FROM \"Appointment\""))
         appointment_count = result.scalar()
         assert appointment_count is not None
+
+
+@pytest.mark.asyncio
+@pytest.mark.integration
+@pytest.mark.skipif(sys.platform == "win32", reason="Event loop issues on Windows")
+async def test_readonly_session_has_no_transaction():
+    """Read-only sessions run each statement on its own, without BEGIN/COMMIT."""
+    async with get_db() as session:
+        first = await session.scalar(text("SELECT txid_current()"))
+        second = await session.scalar(text("SELECT txid_current()"))
+        assert first == second
+
+    async with get_db(readonly=True) as session:
+        first = await session.scalar(text("SELECT txid_current()"))
+        second = await session.scalar(text("SELECT txid_current()"))
+        assert first != second
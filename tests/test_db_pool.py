@@ -0,0 +1,98 @@
+"""Tests for the instrumented connection pool."""
+
+import asyncio
+import math
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import exc
+from sqlalchemy.util import greenlet_spawn
+
+from services.db_pool import InstrumentedPool, adaptive_pool_size, instrument
+
+
+class FakeConnection:
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def make_engine(**kwargs):
+    """Stand-in engine whose pool hands out fake DBAPI connections."""
+    pool = InstrumentedPool(FakeConnection, **kwargs)
+    return SimpleNamespace(sync_engine=SimpleNamespace(pool=pool))
+
+
+def test_adaptive_pool_size():
+    assert adaptive_pool_size(0, 2, 50) == 2
+    assert adaptive_pool_size(8, 2, 50) == 10
+    assert adaptive_pool_size(100, 2, 50) == 50
+
+
+@pytest.mark.asyncio
+async def test_pool_metrics():
+    engine = make_engine(pool_size=2, max_overflow=1, timeout=0.05)
+    metrics = instrument(engine, "primary")
+    pool = engine.sync_engine.pool
+
+    held = [await greenlet_spawn(pool.connect) for _ in range(3)]
+    with pytest.raises(exc.TimeoutError):
+        await greenlet_spawn(pool.connect)
+
+    stats = metrics.snapshot()
+    assert stats["in_use"] == 3
+    assert stats["overflow"] == 1
+    assert stats["checkouts"] == 4
+    assert stats["overflow_checkouts"] == 1
+    assert stats["timeouts"] == 1
+    assert stats["connects"] == 3
+    assert stats["checkout_wait_max"] >= 0.05
+
+    for connection in held:
+        await greenlet_spawn(connection.close)
+    assert metrics.snapshot()["in_use"] == 0
+    assert metrics.take_peak_in_use() == 3
+    assert metrics.take_peak_in_use() == 0
+
+
+@pytest.mark.asyncio
+async def test_resized_pool_keeps_metrics():
+    engine = make_engine(pool_size=2, max_overflow=1)
+    metrics = instrument(engine, "primary")
+    pool = engine.sync_engine.pool
+
+    resized = pool.resized(5, 3)
+    engine.sync_engine.pool = resized
+    connection = await greenlet_spawn(resized.connect)
+    await greenlet_spawn(connection.close)
+
+    stats = metrics.snapshot()
+    assert stats["pool_size"] == 5
+    assert stats["max_overflow"] == 3
+    assert stats["checkouts"] == 1
+    assert stats["connects"] == 1
+
+
+@pytest.mark.asyncio
+async def test_recent_wait_follows_waiting_checkouts():
+    engine = make_engine(pool_size=1, max_overflow=0, timeout=5)
+    metrics = instrument(engine, "primary")
+    pool = engine.sync_engine.pool
+
+    held = await greenlet_spawn(pool.connect)
+    waiter = asyncio.ensure_future(greenlet_spawn(pool.connect))
+    await asyncio.sleep(0.2)
+    assert metrics.snapshot()["checkouts_waiting"] == 1
+    assert metrics.recent_wait() >= 0.2
+
+    await greenlet_spawn(held.close)
+    connection = await waiter
+    assert metrics.snapshot()["checkouts_waiting"] == 0
+    # The moving average remembers the wait, then fades
+    waited = metrics.recent_wait()
+    assert 0 < waited < 0.2
+    metrics._recent_at -= metrics.RECENT_DECAY
+    assert metrics.recent_wait() == pytest.approx(waited / math.e, rel=0.01)
+    await greenlet_spawn(connection.close)
@@ -0,0 +1,76 @@
+"""Tests for the levenshtein lookups and their trigram pre-filter."""
+
+import sys
+import uuid
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import delete
+from sqlalchemy.dialects import postgresql
+
+from database import get_db
+from models import orm_models
+from services import db_service
+
+
+class TrigramSession:
+    """Runs queries through ``rows(params)`` instead of Postgres, recording them."""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.queries = []
+
+    async def execute(self, statement):
+        compiled = statement.compile(dialect=postgresql.dialect())
+        self.queries.append(str(compiled))
+        rows = self.rows(compiled.params)
+        return SimpleNamespace(
+            all=lambda: rows,
+            scalars=lambda: SimpleNamespace(all=lambda: [row[0] for row in rows]),
+            scalar_one_or_none=lambda: rows[0][0] if rows else None,
+            tuples=lambda: rows,
+        )
+
+    def expunge(self, instance):
+        pass
+
+
+@pytest.mark.asyncio
+async def test_misses_never_scan_without_the_trigram_filter():
+    def nothing(params):
+        # The batch lookup returns one row per name it is given
+        names = next((value for value in params.values() if isinstance(value, list)), [])
+        return [SimpleNamespace(name=name, id=None, hospital_name=None) for name in names]
+
+    session = TrigramSession(nothing)
+    db_service.hospital_cache.clear()
+
+    assert await db_service.get_hospital_by_name(session, "xq") is None
+    assert await db_service.get_hospitals_by_city(session, "xq") == []
+    assert await db_service.get_hospital_summaries_by_city(session, "xq") == []
+    assert await db_service.get_hospitals_by_names(session, ["xq", "zw"]) == {
+        "xq": None, "zw": None,
+    }
+    # One query per lookup, each pre-filtered by the trigram index
+    assert len(session.queries) == 4
+    assert all("%%" in query for query in session.queries)
+
+
+@pytest.mark.asyncio
+@pytest.mark.integration
+@pytest.mark.skipif(sys.platform == "win32", reason="Event loop issues on Windows")
+async def test_one_letter_typo_in_a_short_city():
+    hospital_id = f"fuzzy-{uuid.uuid4()}"
+    async with get_db() as session:
+        session.add(orm_models.Hospital(id=hospital_id, name=hospital_id, city="Qzxv"))
+
+    try:
+        db_service.hospital_cache.clear()
+        async with get_db(readonly=True) as session:
+            hospitals = await db_service.get_hospitals_by_city(session, "Qzyv")
+        assert hospitals[0].id == hospital_id
+    finally:
+        async with get_db() as session:
+            await session.execute(
+                delete(orm_models.Hospital).where(orm_models.Hospital.id == hospital_id)
+            )
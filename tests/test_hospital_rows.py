@@ -0,0 +1,33 @@
+"""Tests for the column-only hospital read path of the list and search tools."""
+
+import sys
+
+import pytest
+from sqlalchemy import select
+
+from database import get_db
+from models import db_models, orm_models
+from services import db_service
+
+
+def test_summaries_match_the_previous_response_models():
+    rows = [("h1", "Hôpital Nord", "Lyon", 2.5), ("h2", "Clinique Sud", None, None)]
+    assert [h.model_dump() for h in db_service._hospital_summaries(rows)] == [
+        db_models.Hospital(id="h1", name="Hôpital Nord", city="Lyon", distanceKm=2.5).model_dump(),
+        db_models.Hospital(id="h2", name="Clinique Sud", city="", distanceKm=0.0).model_dump(),
+    ]
+
+
+@pytest.mark.asyncio
+@pytest.mark.integration
+@pytest.mark.skipif(sys.platform == "win32", reason="Event loop issues on Windows")
+async def test_page_lists_the_same_hospitals_as_orm_entities():
+    db_service.hospital_cache.clear()
+    async with get_db(readonly=True) as session:
+        page, _ = await db_service.get_hospitals_page(session, None, 20)
+        entities = (await session.scalars(
+            select(orm_models.Hospital).order_by(orm_models.Hospital.id).limit(20)
+        )).all()
+    assert [(h.id, h.name, h.city, h.distanceKm) for h in page] == [
+        (h.id, h.name, h.city or "", h.distanceKm or 0.0) for h in entities
+    ]
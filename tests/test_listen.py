@@ -0,0 +1,130 @@
+"""Tests for the LISTEN connections feeding cache invalidation."""
+
+import asyncio
+from contextlib import asynccontextmanager
+
+import pytest
+
+from services import db_service
+
+
+class FakeDriver:
+    """The asyncpg connection side of a LISTEN connection."""
+
+    def __init__(self, ping_hangs: bool = False):
+        self.listeners = {}
+        self.terminations = []
+        self.closed = False
+        self.ping_hangs = ping_hangs
+
+    async def add_listener(self, channel, callback):
+        self.listeners[channel] = callback
+
+    async def remove_listener(self, channel, callback):
+        del self.listeners[channel]
+
+    def add_termination_listener(self, callback):
+        self.terminations.append(callback)
+
+    def remove_termination_listener(self, callback):
+        self.terminations.remove(callback)
+
+    async def execute(self, query):
+        if self.ping_hangs:
+            await asyncio.Future()
+
+    def is_closed(self):
+        return self.closed
+
+    def terminate(self):
+        self.closed = True
+        for callback in list(self.terminations):
+            callback(self)
+
+    def notify(self, channel, payload):
+        self.listeners[channel](self, 1234, channel, payload)
+
+
+class FakeEngine:
+    def __init__(self, drivers):
+        self.drivers = iter(drivers)
+        self.invalidated = []
+
+    @asynccontextmanager
+    async def connect(self):
+        driver = next(self.drivers)
+        engine = self
+
+        class Connection:
+            async def get_raw_connection(self):
+                return type("Raw", (), {"driver_connection": driver})()
+
+            async def invalidate(self):
+                engine.invalidated.append(driver)
+
+        yield Connection()
+
+
+async def until(predicate):
+    for _ in range(1000):
+        if predicate():
+            return
+        await asyncio.sleep(0.001)
+    raise AssertionError("timed out")
+
+
+@pytest.mark.asyncio
+async def test_lost_listen_connection_is_replaced(monkeypatch):
+    first, hung, third = FakeDriver(), FakeDriver(ping_hangs=True), FakeDriver()
+    engine = FakeEngine([first, hung, third])
+    monkeypatch.setattr(db_service, "get_engine", lambda: engine)
+    monkeypatch.setattr(db_service, "LISTEN_PING_INTERVAL", 0.01)
+    monkeypatch.setattr(db_service, "LISTEN_RETRY_MIN", 0.001)
+    notified, resets = [], []
+
+    listener = asyncio.create_task(
+        db_service._listen("changes", notified.append, lambda: resets.append(1))
+    )
+    try:
+        await until(lambda: "changes" in first.listeners)
+        first.notify("changes", "a")
+        # The server closes the connection, then the next one stops answering pings
+        first.terminate()
+        await until(lambda: "changes" in third.listeners)
+        third.notify("changes", "b")
+    finally:
+        listener.cancel()
+        await asyncio.gather(listener, return_exceptions=True)
+
+    assert notified == ["a", "b"]
+    # Changes may have been missed while reconnecting
+    assert len(resets) == 3
+    assert engine.invalidated == [first, hung]
+    assert third.listeners == {} and third.terminations == []
+
+
+@pytest.mark.asyncio
+async def test_server_listens_for_appointment_changes_by_default(monkeypatch):
+    import server
+
+    started = []
+
+    async def listen_for_appointment_changes():
+        started.append("appointments")
+        await asyncio.Future()
+
+    async def refresh_hospital_indexes_periodically(interval):
+        await asyncio.Future()
+
+    monkeypatch.delenv("APPOINTMENT_CACHE_LISTEN", raising=False)
+    monkeypatch.setattr(
+        db_service, "listen_for_appointment_changes", listen_for_appointment_changes
+    )
+    monkeypatch.setattr(
+        db_service, "refresh_hospital_indexes_periodically", refresh_hospital_indexes_periodically
+    )
+
+    async with server.lifespan(server.mcp):
+        await until(lambda: started)
+
+    assert started == ["appointments"]
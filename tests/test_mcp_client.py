@@ -23,3 +23,6 @@ async def test_list_tools(mcp_client):
     assert any(tool.name == "search_hospitals" for tool in tools)
     assert any(tool.name == "create_rdv" for tool in tools)
     assert any(tool.name == "list_rdvs" for tool in tools)
+    assert any(tool.name == "get_hospitals_data" for tool in tools)
+    assert any(tool.name == "create_rdvs" for tool in tools)
+    assert any(tool.name == "find_nearest_hospitals" for tool in tools)
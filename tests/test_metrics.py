@@ -0,0 +1,75 @@
+"""Tests for the Prometheus metrics."""
+
+import pytest
+from fastmcp import FastMCP
+from fastmcp.client import Client, FastMCPTransport
+from prometheus_client import CollectorRegistry, generate_latest
+
+from services.metrics import (
+    StatsCollector,
+    ToolMetricsMiddleware,
+    current_operation,
+    db_operation,
+    registry,
+)
+
+
+def sample(name, **labels):
+    return registry.get_sample_value(name, labels) or 0.0
+
+
+@pytest.mark.asyncio
+async def test_db_operation_labels_nested_calls():
+    seen = []
+
+    @db_operation
+    async def inner_lookup():
+        seen.append(current_operation.get())
+
+    @db_operation
+    async def outer_lookup():
+        seen.append(current_operation.get())
+        await inner_lookup()
+        seen.append(current_operation.get())
+
+    await outer_lookup()
+    assert seen == ["outer_lookup", "inner_lookup", "outer_lookup"]
+    assert current_operation.get() == "other"
+    assert sample("db_service_duration_seconds_count", operation="outer_lookup") == 1
+
+
+@pytest.mark.asyncio
+async def test_tool_latency_and_errors():
+    server = FastMCP("metrics-test")
+    server.add_middleware(ToolMetricsMiddleware())
+
+    @server.tool
+    async def metrics_ok() -> str:
+        return "ok"
+
+    @server.tool
+    async def metrics_fail() -> str:
+        raise ValueError("nope")
+
+    before = sample("mcp_tool_errors_total", tool="metrics_fail", error="ValueError")
+    async with Client(FastMCPTransport(server)) as client:
+        await client.call_tool("metrics_ok", {})
+        await client.call_tool("metrics_fail", {}, raise_on_error=False)
+
+    assert sample("mcp_tool_duration_seconds_count", tool="metrics_ok") == 1
+    assert sample("mcp_tool_duration_seconds_count", tool="metrics_fail") == 1
+    assert sample("mcp_tool_errors_total", tool="metrics_fail", error="ValueError") == before + 1
+    assert sample("mcp_tool_errors_total", tool="metrics_ok", error="ValueError") == 0
+
+
+def test_stats_collector():
+    test_registry = CollectorRegistry()
+    test_registry.register(StatsCollector(
+        "cache", "cache",
+        lambda: {"hospital": {"hits": 3, "size": 7}, "status": {"hits": 1, "size": 2}},
+        counters=["hits"],
+    ))
+    text = generate_latest(test_registry).decode()
+    assert 'cache_hits_total{cache="hospital"} 3.0' in text
+    assert 'cache_size{cache="status"} 2.0' in text
+    assert "# TYPE cache_size gauge" in text
@@ -0,0 +1,214 @@
+"""Tests for the in-memory hospital name index."""
+
+import asyncio
+import random
+import string
+import sys
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import pytest
+
+from services import db_service
+from services.name_index import BKTree, HospitalNameIndex, levenshtein
+
+
+def brute_force(names, query, max_distance):
+    """Reference resolution: what ORDER BY levenshtein LIMIT 1 would pick."""
+    scored = sorted(
+        (levenshtein(name.lower(), query.lower()), name.lower(), hospital_id)
+        for hospital_id, name in names.items()
+    )
+    if not scored or scored[0][0] > max_distance:
+        return None
+    return scored[0][2]
+
+
+def test_levenshtein():
+    assert levenshtein("kitten", "sitting") == 3
+    assert levenshtein("", "abc") == 3
+    assert levenshtein("abc", "abc") == 0
+    assert levenshtein("flaw", "lawn") == 2
+
+
+def test_bktree_nearest_returns_all_ties():
+    tree = BKTree()
+    for word in ["book", "books", "cake", "boo", "cape", "cart"]:
+        tree.add(word)
+    distance, keys = tree.nearest("bool", 2)
+    assert distance == 1
+    assert sorted(keys) == ["boo", "book"]
+
+
+def test_resolve_matches_brute_force():
+    rng = random.Random(42)
+    names = {
+        f"h{i}": "".join(rng.choices(string.ascii_lowercase + " ", k=rng.randint(5, 20)))
+        for i in range(300)
+    }
+    index = HospitalNameIndex()
+    index.load((hospital_id, name, None) for hospital_id, name in names.items())
+
+    queries = list(names.values())[:50] + [
+        "".join(rng.choices(string.ascii_lowercase, k=rng.randint(3, 15))) for _ in range(50)
+    ]
+    for query in queries:
+        for max_distance in (2, 10):
+            expected = brute_force(names, query, max_distance)
+            assert index.resolve(query, max_distance) == expected
+
+
+def test_resolve_is_case_insensitive():
+    index = HospitalNameIndex()
+    index.load([("h1", "Hopital Saint-Louis", None)])
+    assert index.resolve("HOPITAL SAINT LOUIS") == "h1"
+    assert index.resolve("Clinique du Parc Monceau Paris") is None
+
+
+def test_rename_and_remove():
+    index = HospitalNameIndex()
+    index.load([("h1", "Pitie Salpetriere", None), ("h2", "Necker", None)])
+    index.upsert("h1", "Hopital Pitie")
+    assert index.resolve("Pitie Salpetriere", 3) is None
+    assert index.resolve("Hopital Pitie") == "h1"
+    index.remove("h2")
+    assert index.resolve("Necker") is None
+    assert len(index) == 1
+
+
+def test_lookups_and_changes_from_several_threads():
+    rng = random.Random(3)
+    names = {
+        f"h{i}": "".join(rng.choices(string.ascii_lowercase, k=rng.randint(5, 20)))
+        for i in range(300)
+    }
+    index = HospitalNameIndex()
+    index.load((hospital_id, name, None) for hospital_id, name in list(names.items())[:150])
+
+    def add(hospital_id):
+        index.upsert(hospital_id, names[hospital_id])
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        lookups = pool.submit(lambda: [index.resolve_all(names.values()) for _ in range(5)])
+        list(pool.map(add, list(names)[150:]))
+        lookups.result()
+
+    assert index.resolve_all(names.values()) == {name: hospital_id
+                                                 for hospital_id, name in names.items()}
+
+
+@pytest.mark.asyncio
+async def test_only_exact_names_skip_the_database(monkeypatch):
+    index = HospitalNameIndex()
+    index.load([("h1", "Hopital Nord", None), ("h2", "Clinique Pasteur", None)])
+    lookups = []
+
+    async def get_hospitals_by_names(session, names):
+        lookups.append(names)
+        # "Hopital Sud" was added since the last refresh
+        return {name: ("h3", "Hopital Sud") if name == "hopital sud" else None
+                for name in names}
+
+    monkeypatch.setattr(db_service, "hospital_name_index", index)
+    monkeypatch.setattr(db_service, "get_hospitals_by_names", get_hospitals_by_names)
+
+    resolved = await db_service.resolve_hospital_ids(
+        None, ["HOPITAL NORD", "hopital sud", "Clinique Pastuer"]
+    )
+
+    assert resolved == {"HOPITAL NORD": "h1", "hopital sud": "h3", "Clinique Pastuer": "h2"}
+    assert lookups == [["hopital sud", "Clinique Pastuer"]]
+    assert index.resolve_exact(["Hopital Sud"]) == {"Hopital Sud": "h3"}
+
+
+def test_levenshtein_matches_dynamic_programming():
+    def reference(a, b):
+        previous = list(range(len(b) + 1))
+        for i, ca in enumerate(a, 1):
+            current = [i]
+            for j, cb in enumerate(b, 1):
+                current.append(min(previous[j] + 1, current[j - 1] + 1,
+                                   previous[j - 1] + (ca != cb)))
+            previous = current
+        return previous[-1]
+
+    rng = random.Random(7)
+    for _ in range(2000):
+        a = "".join(rng.choices("abcde", k=rng.randint(0, 70)))
+        b = "".join(rng.choices("abcde", k=rng.randint(0, 70)))
+        assert levenshtein(a, b) == reference(a, b)
+
+
+@pytest.mark.asyncio
+async def test_catalog_changes_refresh_the_loaded_index(monkeypatch):
+    from contextlib import asynccontextmanager
+
+    index = HospitalNameIndex()
+    index.load([("h1", "Hopital Nord", None)])
+    refreshed = asyncio.Event()
+
+    @asynccontextmanager
+    async def get_db():
+        yield None
+
+    async def refresh_hospital_indexes(session):
+        refreshed.set()
+
+    monkeypatch.setattr(db_service, "hospital_name_index", index)
+    monkeypatch.setattr(db_service, "get_db", get_db)
+    monkeypatch.setattr(db_service, "refresh_hospital_indexes", refresh_hospital_indexes)
+    refresher = asyncio.create_task(db_service.refresh_hospital_indexes_periodically(3600))
+    try:
+        await asyncio.sleep(0)
+        db_service.invalidate_hospital_cache()
+        db_service._catalog_changed.set()
+        await asyncio.wait_for(refreshed.wait(), 1)
+    finally:
+        refresher.cancel()
+        await asyncio.gather(refresher, return_exceptions=True)
+
+    # Kept, rather than rebuilt from scratch
+    assert db_service.hospital_name_index is index and index.loaded
+
+
+@pytest.mark.asyncio
+@pytest.mark.integration
+@pytest.mark.skipif(sys.platform == "win32", reason="Event loop issues on Windows")
+async def test_incremental_refresh_drops_deleted_and_adds_backdated_hospitals():
+    from sqlalchemy import delete
+
+    from database import get_db
+    from models import orm_models
+
+    kept, deleted, backdated = (f"index-{uuid.uuid4()}" for _ in range(3))
+    async with get_db() as session:
+        for hospital_id in (kept, deleted):
+            session.add(orm_models.Hospital(
+                id=hospital_id, name=hospital_id, latitude=48.8, longitude=2.3
+            ))
+
+    try:
+        async with get_db() as session:
+            await db_service.refresh_hospital_indexes(session, full=True)
+            await session.execute(
+                delete(orm_models.Hospital).where(orm_models.Hospital.id == deleted)
+            )
+            session.add(orm_models.Hospital(
+                id=backdated, name=backdated, latitude=48.8, longitude=2.3,
+                updatedAt=datetime(2000, 1, 1),
+            ))
+        async with get_db() as session:
+            await db_service.refresh_hospital_indexes(session)
+
+        ids = db_service.hospital_name_index.ids()
+        assert kept in ids and backdated in ids and deleted not in ids
+        db_service.hospital_spatial_index.rebuild()
+        nearest = db_service.hospital_spatial_index.nearest(48.8, 2.3, len(ids))
+        assert deleted not in {hospital_id for hospital_id, _ in nearest}
+    finally:
+        async with get_db() as session:
+            await session.execute(
+                delete(orm_models.Hospital)
+                .where(orm_models.Hospital.id.in_([kept, deleted, backdated]))
+            )
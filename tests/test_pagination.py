@@ -0,0 +1,123 @@
+"""Tests for the pagination cursors and the keyset pages built from them."""
+
+import base64
+import json
+import sys
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import delete
+
+from services import db_service
+from services.appointment_cache import CachedAppointment, UserAppointments
+
+T0 = datetime(2026, 3, 1, 9, 0)
+
+
+def raw_cursor(values) -> str:
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+
+def appointment(i: int, created_at: datetime = T0) -> CachedAppointment:
+    return CachedAppointment(
+        id=f"a{i}", userId="alice", hospitalId="h1",
+        appointmentDateTime=T0 + timedelta(days=i), status="pending", createdAt=created_at,
+    )
+
+
+def test_cursors_round_trip():
+    created_at = datetime(2026, 3, 1, 9, 30, 15, 123456)
+    assert db_service._appointment_keyset(db_service.encode_cursor(created_at, "a1")) == (
+        created_at, "a1"
+    )
+    assert db_service.decode_cursor(db_service.encode_cursor("h1"), str) == ["h1"]
+
+
+def test_aware_cursors_are_made_naive_utc():
+    paris = timezone(timedelta(hours=2))
+    cursor = db_service.encode_cursor(datetime(2026, 3, 1, 11, 0, tzinfo=paris), "a1")
+    assert db_service._appointment_keyset(cursor) == (datetime(2026, 3, 1, 9, 0), "a1")
+
+
+@pytest.mark.parametrize("cursor", [
+    "!!!",
+    base64.urlsafe_b64encode(b"\xff\xfe").decode(),
+    raw_cursor({"createdAt": "2026-03-01T09:00:00", "id": "a1"}),
+    raw_cursor(["2026-03-01T09:00:00"]),
+    raw_cursor(["2026-03-01T09:00:00", 7]),
+    raw_cursor([None, "a1"]),
+    raw_cursor(["yesterday", "a1"]),
+])
+def test_invalid_appointment_cursors_are_rejected(cursor):
+    with pytest.raises(ValueError, match="^Invalid pagination cursor$"):
+        db_service._appointment_keyset(cursor)
+
+
+@pytest.mark.parametrize("cursor", [raw_cursor([{"id": "h1"}]), raw_cursor([1]), 42])
+def test_invalid_hospital_cursors_are_rejected(cursor):
+    with pytest.raises(ValueError, match="^Invalid pagination cursor$"):
+        db_service.decode_cursor(cursor, str)
+
+
+@pytest.mark.asyncio
+async def test_cached_pages_split_equal_creation_times_and_end(monkeypatch):
+    appointments = UserAppointments([appointment(i) for i in range(5)])
+
+    async def cached_user_appointments(user_id):
+        return appointments
+
+    monkeypatch.setattr(db_service, "cached_user_appointments", cached_user_appointments)
+
+    pages, cursor = [], None
+    while True:
+        page, cursor = await db_service.get_cached_user_appointments_page("alice", cursor, 2)
+        pages.append([a.id for a in page])
+        if cursor is None:
+            break
+    assert pages == [["a4", "a3"], ["a2", "a1"], ["a0"]]
+
+    # A last page that is exactly full has no next page either
+    page, cursor = await db_service.get_cached_user_appointments_page("alice", None, 5)
+    assert len(page) == 5 and cursor is None
+
+
+@pytest.mark.asyncio
+@pytest.mark.integration
+@pytest.mark.skipif(sys.platform == "win32", reason="Event loop issues on Windows")
+async def test_database_pages_split_equal_creation_times_and_end():
+    from database import get_db
+    from models import orm_models
+
+    user_id = f"pages-{uuid.uuid4()}"
+    hospital_id = f"pages-{uuid.uuid4()}"
+    async with get_db() as session:
+        session.add(orm_models.User(id=user_id, email=f"{user_id}@example.com", password="x"))
+        session.add(orm_models.Hospital(id=hospital_id, name=hospital_id, city="Nowhere"))
+    try:
+        async with get_db() as session:
+            for i in range(5):
+                session.add(orm_models.Appointment(
+                    id=f"{user_id}-a{i}", userId=user_id, hospitalId=hospital_id,
+                    appointmentDateTime=T0, createdAt=T0,
+                ))
+
+        pages, cursor = [], None
+        while True:
+            async with get_db(readonly=True) as session:
+                page, cursor = await db_service.get_user_appointments_page(
+                    session, user_id, cursor, 2
+                )
+            pages.append([a.id.rsplit("-", 1)[1] for a in page])
+            if cursor is None:
+                break
+        assert pages == [["a4", "a3"], ["a2", "a1"], ["a0"]]
+    finally:
+        async with get_db() as session:
+            await session.execute(
+                delete(orm_models.Appointment).where(orm_models.Appointment.userId == user_id)
+            )
+            await session.execute(
+                delete(orm_models.Hospital).where(orm_models.Hospital.id == hospital_id)
+            )
+            await session.execute(delete(orm_models.User).where(orm_models.User.id == user_id))
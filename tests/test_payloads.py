@@ -0,0 +1,131 @@
+"""Tests for the pre-serialized catalog tool responses."""
+
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+
+import pytest
+from fastmcp.client import Client, FastMCPTransport
+
+from models.db_models import Hospital
+from services import db_service
+from services.payloads import Payload
+
+HOSPITALS = [Hospital(id="h1", name="Hôpital Nord", city="Lyon", distanceKm=2.5)]
+
+
+def test_version_follows_content():
+    assert Payload.of(HOSPITALS).version == Payload.of(list(HOSPITALS)).version
+    renamed = [HOSPITALS[0].model_copy(update={"name": "Hôpital Sud"})]
+    assert Payload.of(renamed).version != Payload.of(HOSPITALS).version
+
+
+def test_wrapped_payload():
+    payload = Payload.of(HOSPITALS, wrap=True)
+    assert payload.structured == {"result": [HOSPITALS[0].model_dump(mode="json")]}
+    assert payload.text == HOSPITALS[0].model_dump_json().join("[]")
+
+
+@pytest.mark.asyncio
+async def test_list_hospitals_revalidation(monkeypatch):
+    import server
+
+    pages = []
+
+    async def get_hospitals_page(session, cursor, limit):
+        pages.append(cursor)
+        return list(HOSPITALS), None
+
+    @asynccontextmanager
+    async def get_db(readonly=False, user_id=None):
+        yield None
+
+    monkeypatch.setattr(db_service, "get_hospitals_page", get_hospitals_page)
+    monkeypatch.setattr(db_service, "get_db", get_db)
+    db_service.invalidate_hospital_cache()
+
+    async with Client(FastMCPTransport(server.mcp)) as client:
+        first = await client.call_tool("list_hospitals", {})
+        version = first.meta["version"]
+        assert first.data.hospitals[0].id == "h1"
+
+        again = await client.call_tool("list_hospitals", {"version": version})
+        assert again.meta == {"version": version, "unchanged": True}
+        assert again.data.hospitals == []
+        assert pages == [None]
+
+        # An invalidated catalog is read again, but unchanged data keeps its version
+        db_service.invalidate_hospital_cache()
+        reread = await client.call_tool("list_hospitals", {"version": version})
+        assert reread.meta["unchanged"] is True
+        assert pages == [None, None]
+
+
+
+@pytest.mark.asyncio
+async def test_search_hospitals_keys_every_spelling_of_a_city_alike(monkeypatch):
+    import server
+
+    searches = []
+
+    async def search(session, city):
+        searches.append(city)
+        return list(HOSPITALS)
+
+    @asynccontextmanager
+    async def get_db(readonly=False, user_id=None):
+        yield None
+
+    monkeypatch.setattr(db_service, "get_hospital_summaries_by_city", search)
+    monkeypatch.setattr(db_service, "get_db", get_db)
+    db_service.invalidate_hospital_cache()
+
+    async with Client(FastMCPTransport(server.mcp)) as client:
+        first = await client.call_tool("search_hospitals", {"city": "Lyon"})
+        again = await client.call_tool("search_hospitals", {"city": "LYON"})
+
+    assert searches == ["lyon"]
+    assert again.meta == first.meta
+
+
+@pytest.mark.asyncio
+async def test_catalog_reads_are_not_cached_below_the_payloads():
+    class Session:
+        queries = 0
+
+        async def execute(self, query):
+            self.queries += 1
+            return SimpleNamespace(tuples=lambda: [("h1", "Hôpital Nord", "Lyon", 2.5)])
+
+    session = Session()
+    db_service.invalidate_hospital_cache()
+    for _ in range(2):
+        await db_service.get_hospitals_page(session, None, 10)
+        await db_service.get_hospital_summaries_by_city(session, "Lyon")
+    assert session.queries == 4
+
+
+@pytest.mark.asyncio
+async def test_payload_results_match_the_output_schema():
+    """Payload results go through FastMCP's own result handling, as the catalog tools' do."""
+    from typing import List
+
+    from fastmcp import FastMCP
+
+    payload = Payload.of(HOSPITALS, wrap=True)
+    unchanged = Payload.of([], wrap=True)
+    mcp = FastMCP("payloads")
+
+    @mcp.tool
+    async def hospitals(version: str = "") -> List[Hospital]:
+        return payload.result(unchanged, version)  # type: ignore[return-value]
+
+    assert mcp._tool_manager._tools["hospitals"].output_schema is not None
+    async with Client(FastMCPTransport(mcp)) as client:
+        result = await client.call_tool("hospitals", {})
+        again = await client.call_tool("hospitals", {"version": payload.version})
+
+    assert result.structured_content == payload.structured
+    assert result.content[0].text == payload.text
+    assert result.meta == {"version": payload.version}
+    assert result.data == payload.structured["result"]
+    assert again.data == [] and again.meta["unchanged"] is True
@@ -0,0 +1,118 @@
+"""Read/write routing tests: replicas for reads, primary for writes and fresh writers."""
+
+import sys
+import uuid
+from collections import Counter
+
+import fastmcp.server.dependencies
+import pytest
+from sqlalchemy import delete
+
+import database
+from services.cache import TTLCache
+
+
+class FakePool:
+    def __init__(self, checkedout):
+        self._checkedout = checkedout
+
+    def checkedout(self):
+        return self._checkedout
+
+
+class FakeEngine:
+    def __init__(self, name, checkedout=0):
+        self.name = name
+        self.pool = FakePool(checkedout)
+
+
+@pytest.fixture
+def replicas(monkeypatch):
+    engines = [FakeEngine("r1"), FakeEngine("r2"), FakeEngine("r3")]
+    monkeypatch.setattr(database, "read_engines", engines)
+    monkeypatch.setattr(database, "_recent_writers", TTLCache(maxsize=100, ttl=60))
+    return engines
+
+
+def test_writes_and_reads_without_replicas_use_primary(monkeypatch):
+    monkeypatch.setattr(database, "read_engines", [])
+    assert database.route_engine(readonly=True) is database.engine
+    assert database.route_engine(readonly=False) is database.engine
+
+
+def test_reads_round_robin_over_idle_replicas(replicas):
+    picks = Counter(database.route_engine(readonly=True).name for _ in range(300))
+    assert picks == {"r1": 100, "r2": 100, "r3": 100}
+    assert database.route_engine(readonly=False) is database.engine
+
+
+def test_reads_prefer_least_busy_replica(replicas):
+    replicas[0].pool._checkedout = 5
+    replicas[2].pool._checkedout = 2
+    assert {database.route_engine(readonly=True).name for _ in range(10)} == {"r2"}
+
+
+def test_recent_writer_reads_from_primary(replicas):
+    database._recent_writers.set("alice", True)
+    assert database.route_engine(readonly=True, user_id="alice") is database.engine
+    assert database.route_engine(readonly=True, user_id="bob") in replicas
+    database._recent_writers.clear()
+    assert database.route_engine(readonly=True, user_id="alice") in replicas
+
+
+@pytest.mark.asyncio
+async def test_readonly_sessions_connect_on_first_statement(monkeypatch):
+    """Reads answered from a cache never check out a connection."""
+    monkeypatch.setattr(database, "read_engines", [])
+    async with database.get_db(readonly=True) as session:
+        assert not session.in_transaction()
+        assert session.bind.pool is database.engine.pool
+        assert session.bind.get_execution_options()["isolation_level"] == "AUTOCOMMIT"
+    assert database.engine.pool.checkedout() == 0
+
+
+@pytest.mark.asyncio
+@pytest.mark.integration
+@pytest.mark.skipif(sys.platform == "win32", reason="Event loop issues on Windows")
+@pytest.mark.skipif(not database.read_engines, reason="DATABASE_READ_URL is not set")
+async def test_booking_is_listed_right_away(monkeypatch):
+    """A booking made on the primary shows in list_rdvs even if replicas lag."""
+    from fastmcp.client import Client, FastMCPTransport
+
+    from database import get_db
+    from models import orm_models
+    from server import mcp
+
+    user_id = f"replica-{uuid.uuid4()}"
+    hospital_id = f"replica-{uuid.uuid4()}"
+    hospital_name = f"Replica Test Hospital {hospital_id[-12:]}"
+    async with get_db() as session:
+        session.add(orm_models.User(id=user_id, email=f"{user_id}@example.com", password="x"))
+        session.add(orm_models.Hospital(id=hospital_id, name=hospital_name, city="Nowhere"))
+
+    class Token:
+        client_id = user_id
+        claims: dict = {}
+
+    monkeypatch.setattr(fastmcp.server.dependencies, "get_access_token", lambda: Token())
+    try:
+        async with Client(FastMCPTransport(mcp)) as client:
+            booked = await client.call_tool("create_rdv", {"request": {
+                "hospital_name": hospital_name, "appointmentDateTime": "2031-02-03T09:00:00",
+            }})
+            listed = await client.call_tool("list_rdvs", {})
+
+        appointment_id = booked.content[0].text.split(": ")[1]
+        assert [a["appointment_id"] for a in listed.data["appointments"]] == [appointment_id]
+    finally:
+        async with get_db() as session:
+            await session.execute(
+                delete(orm_models.SlotSeat).where(orm_models.SlotSeat.hospitalId == hospital_id)
+            )
+            await session.execute(
+                delete(orm_models.Appointment).where(orm_models.Appointment.userId == user_id)
+            )
+            await session.execute(
+                delete(orm_models.Hospital).where(orm_models.Hospital.id == hospital_id)
+            )
+            await session.execute(delete(orm_models.User).where(orm_models.User.id == user_id))
@@ -0,0 +1,65 @@
+"""Startup tests: schema fingerprint and lazily created engines."""
+
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+from sqlalchemy import text
+
+import database
+import models.orm_models  # noqa: F401  (registers the tables)
+
+SRC = Path(__file__).parent.parent / "src"
+
+
+def test_fingerprint_is_stable():
+    assert database.schema_fingerprint() == database.schema_fingerprint()
+
+
+def test_fingerprint_follows_ddl(monkeypatch):
+    before = database.schema_fingerprint()
+    monkeypatch.setattr(database, "SCHEMA_DDL", [*database.SCHEMA_DDL, "SELECT 1"])
+    assert database.schema_fingerprint() != before
+
+
+def test_fingerprint_follows_models(monkeypatch):
+    before = database.schema_fingerprint()
+    hospital = database.Base.metadata.tables["Hospital"]
+    column = hospital.c.city
+    monkeypatch.setattr(column, "nullable", False)
+    assert database.schema_fingerprint() != before
+
+
+def test_importing_server_creates_no_engine():
+    """Engines are only built on first use, not as an import side effect."""
+    check = (
+        "import database, server; "
+        "assert 'engine' not in vars(database) and 'read_engines' not in vars(database); "
+        "database.engine; assert 'engine' in vars(database)"
+    )
+    subprocess.run(
+        [sys.executable, "-c", check], cwd=SRC, check=True,
+        env={"DATABASE_URL": "postgresql://x@localhost/db", "PATH": ""},
+    )
+
+
+def test_missing_database_url_fails_on_first_use(monkeypatch):
+    monkeypatch.delitem(vars(database), "engine", raising=False)
+    monkeypatch.setattr(database, "DATABASE_URL", None)
+    with pytest.raises(ValueError, match="DATABASE_URL"):
+        database.get_engine()
+
+
+@pytest.mark.asyncio
+@pytest.mark.integration
+@pytest.mark.skipif(sys.platform == "win32", reason="Event loop issues on Windows")
+async def test_init_db_skips_current_schema():
+    await database.init_db(force=True)
+    assert await database.applied_schema_fingerprint() == database.schema_fingerprint()
+    assert await database.init_db() is False
+
+    async with database.get_engine().begin() as conn:
+        await conn.execute(text('UPDATE "SchemaFingerprint" SET fingerprint = \'outdated\''))
+    assert await database.init_db() is True
+    assert await database.applied_schema_fingerprint() == database.schema_fingerprint()
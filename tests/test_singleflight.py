@@ -0,0 +1,91 @@
+"""Tests for the coalescing of identical concurrent calls."""
+
+import asyncio
+
+import pytest
+
+from services.singleflight import SingleFlight
+
+
+class Call:
+    """A call that runs until released, counting how often it was started."""
+
+    def __init__(self):
+        self.started = 0
+        self.cancelled = 0
+        self.release = asyncio.Event()
+
+    async def __call__(self):
+        self.started += 1
+        try:
+            await self.release.wait()
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        return self.started
+
+
+@pytest.mark.asyncio
+async def test_concurrent_callers_share_one_call():
+    flights, call = SingleFlight(), Call()
+    waiters = [asyncio.ensure_future(flights.do("paris", call)) for _ in range(10)]
+    other = asyncio.ensure_future(flights.do("lyon", call))
+    await asyncio.sleep(0)
+    call.release.set()
+    assert await asyncio.gather(*waiters) == [1] * 10
+    assert await other == 2
+    assert call.started == 2
+    assert flights.stats() == {"in_flight": 0, "calls": 11, "shared": 9, "cancelled": 0}
+
+    # Finished calls are not reused
+    assert await flights.do("paris", call) == 3
+
+
+@pytest.mark.asyncio
+async def test_exception_reaches_every_caller():
+    flights = SingleFlight()
+
+    async def fail():
+        await asyncio.sleep(0)
+        raise ValueError("boom")
+
+    results = await asyncio.gather(
+        *(flights.do("key", fail) for _ in range(3)), return_exceptions=True
+    )
+    assert [str(r) for r in results] == ["boom"] * 3
+    assert len(flights) == 0
+
+
+@pytest.mark.asyncio
+async def test_cancelled_caller_leaves_the_call_to_the_others():
+    flights, call = SingleFlight(), Call()
+    first = asyncio.ensure_future(flights.do("key", call))
+    second = asyncio.ensure_future(flights.do("key", call))
+    await asyncio.sleep(0)
+
+    first.cancel()
+    await asyncio.sleep(0)
+    assert call.cancelled == 0
+    call.release.set()
+    assert await second == 1
+    with pytest.raises(asyncio.CancelledError):
+        await first
+
+
+@pytest.mark.asyncio
+async def test_call_is_cancelled_with_its_last_caller():
+    flights, call = SingleFlight(), Call()
+    waiters = [asyncio.ensure_future(flights.do("key", call)) for _ in range(2)]
+    await asyncio.sleep(0)
+    for waiter in waiters:
+        waiter.cancel()
+    await asyncio.gather(*waiters, return_exceptions=True)
+    await asyncio.sleep(0)
+    assert call.cancelled == 1
+    assert flights.stats()["cancelled"] == 1
+
+    # The next caller starts a new call instead of joining the cancelled one
+    retry = asyncio.ensure_future(flights.do("key", call))
+    await asyncio.sleep(0)
+    call.release.set()
+    assert await retry == 2
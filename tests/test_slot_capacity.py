@@ -0,0 +1,210 @@
+"""Slot capacity tests: concurrent create_rdv calls must never overbook a slot."""
+
+import asyncio
+import logging
+import os
+import sys
+import uuid
+from datetime import datetime
+
+import fastmcp.server.dependencies
+import pytest
+from fastmcp.client import Client, FastMCPTransport
+from sqlalchemy import func, select, text
+
+STRESS_BOOKINGS = int(os.getenv("STRESS_BOOKINGS", "1000"))
+
+
+def test_slot_start_floors_to_slot():
+    from services.db_service import SLOT_MINUTES, slot_start
+
+    start = slot_start(datetime(2026, 3, 2, 23, 59, 59, 999))
+    assert start.minute % SLOT_MINUTES == 0
+    assert start.second == 0 and start.microsecond == 0
+    assert 0 <= (datetime(2026, 3, 2, 23, 59, 59, 999) - start).total_seconds() < SLOT_MINUTES * 60
+
+
+@pytest.mark.asyncio
+@pytest.mark.integration
+@pytest.mark.skipif(sys.platform == "win32", reason="Event loop issues on Windows")
+async def test_concurrent_bookings_never_overbook(booking_target):
+    """Fire many create_rdv calls at one slot: exactly SLOT_CAPACITY succeed, none wait on locks."""
+    from database import engine, get_db
+    from models import orm_models
+    from server import mcp
+    from services.db_service import SLOT_CAPACITY
+
+    hospital_id, hospital_name = booking_target
+    request = {"hospital_name": hospital_name, "appointmentDateTime": "2031-01-15T10:05:00"}
+    lock_waits = []
+    done = asyncio.Event()
+
+    async def watch_lock_waits():
+        async with engine.connect() as conn:
+            while not done.is_set():
+                result = await conn.execute(text(
+                    "SELECT count(*) FROM pg_stat_activity "
+                    "WHERE datname = current_database() AND wait_event_type = 'Lock'"
+                ))
+                lock_waits.append(result.scalar())
+                await conn.commit()
+                await asyncio.sleep(0.01)
+
+    # Rejected bookings are expected: don't pay for formatting their tracebacks
+    logging.disable(logging.ERROR)
+    try:
+        async with Client(FastMCPTransport(mcp)) as client:
+            watcher = asyncio.create_task(watch_lock_waits())
+            results = await asyncio.gather(*[
+                client.call_tool("create_rdv", {"request": request}, raise_on_error=False)
+                for _ in range(STRESS_BOOKINGS)
+            ])
+            done.set()
+            await watcher
+    finally:
+        logging.disable(logging.NOTSET)
+
+    confirmed = [r for r in results if not r.is_error]
+    rejected = [r for r in results if r.is_error]
+    assert len(confirmed) == SLOT_CAPACITY
+    assert all("No capacity left" in r.content[0].text for r in rejected)
+    assert max(lock_waits) == 0
+
+    async with get_db() as session:
+        booked = await session.scalar(
+            select(func.count())
+            .select_from(orm_models.Appointment)
+            .where(orm_models.Appointment.hospitalId == hospital_id)
+        )
+    assert booked == SLOT_CAPACITY
+
+
+@pytest.mark.asyncio
+@pytest.mark.integration
+@pytest.mark.skipif(sys.platform == "win32", reason="Event loop issues on Windows")
+async def test_bookings_hold_one_connection_at_a_time(booking_target, monkeypatch):
+    """Seats are created on a connection of their own, never while the booking holds one."""
+    from sqlalchemy import event
+
+    from database import engine, get_db
+    from server import mcp
+    from services import db_service
+
+    hospital_id, hospital_name = booking_target
+    # The LISTEN connection of the appointment cache is held for the server's lifetime
+    monkeypatch.setenv("APPOINTMENT_CACHE_LISTEN", "false")
+    async with get_db() as session:
+        await db_service.refresh_hospital_indexes(session, full=True)
+    # Resolved in the database, as a hospital added since the last refresh
+    db_service.hospital_name_index.remove(hospital_id)
+
+    checked_out = peak = 0
+
+    def checkout(*args):
+        nonlocal checked_out, peak
+        checked_out += 1
+        peak = max(peak, checked_out)
+
+    def checkin(*args):
+        nonlocal checked_out
+        checked_out -= 1
+
+    pool = engine.sync_engine.pool
+    event.listen(pool, "checkout", checkout)
+    event.listen(pool, "checkin", checkin)
+    try:
+        async with Client(FastMCPTransport(mcp)) as client:
+            await client.call_tool("create_rdv", {"request": {
+                "hospital_name": hospital_name, "appointmentDateTime": "2031-02-03T10:05:00",
+            }})
+            await client.call_tool("create_rdvs", {"requests": [
+                {"hospital_name": hospital_name, "appointmentDateTime": "2031-02-04T10:05:00"},
+                {"hospital_name": hospital_name, "appointmentDateTime": "2031-02-05T10:05:00"},
+            ]})
+    finally:
+        event.remove(pool, "checkout", checkout)
+        event.remove(pool, "checkin", checkin)
+
+    assert peak == 1
+
+
+async def book_directly(user_id, hospital_id, when, count):
+    """Appointments inserted without claiming a seat, as booked before seats existed."""
+    from database import get_db
+    from models import orm_models
+
+    async with get_db() as session:
+        for i in range(count):
+            session.add(orm_models.Appointment(
+                id=str(uuid.uuid4()), userId=user_id, hospitalId=hospital_id,
+                appointmentDateTime=when, createdAt=datetime(2026, 1, 1, 0, i),
+            ))
+
+
+@pytest.mark.asyncio
+@pytest.mark.integration
+@pytest.mark.skipif(sys.platform == "win32", reason="Event loop issues on Windows")
+async def test_new_seats_go_to_the_appointments_a_slot_holds(booking_target):
+    from database import get_db
+    from models import orm_models
+    from server import mcp
+    from services import db_service
+
+    hospital_id, hospital_name = booking_target
+    user_id = fastmcp.server.dependencies.get_access_token().client_id
+    when = datetime(2031, 3, 3, 10, 5)
+    await book_directly(user_id, hospital_id, when, db_service.SLOT_CAPACITY - 1)
+
+    async with Client(FastMCPTransport(mcp)) as client:
+        result = await client.call_tool("create_rdvs", {"requests": [
+            {"hospital_name": hospital_name, "appointmentDateTime": when.isoformat()},
+            {"hospital_name": hospital_name, "appointmentDateTime": when.isoformat()},
+        ]})
+
+    assert [r["status"] for r in result.structured_content["result"]] == ["confirmed", "failed"]
+    async with get_db() as session:
+        free = await session.scalar(
+            select(func.count())
+            .select_from(orm_models.SlotSeat)
+            .where(orm_models.SlotSeat.hospitalId == hospital_id,
+                   orm_models.SlotSeat.appointmentId.is_(None))
+        )
+    assert free == 0
+
+    # Unknown hospitals get no seats, and are asked about again next time
+    slot = ("no-such-hospital", db_service.slot_start(when))
+    await db_service.ensure_slot_seats([slot])
+    assert db_service.seated_slots.get(slot) is db_service.MISSING
+
+
+@pytest.mark.asyncio
+@pytest.mark.integration
+@pytest.mark.skipif(sys.platform == "win32", reason="Event loop issues on Windows")
+async def test_schema_gives_seats_to_appointments_booked_before_them(booking_target):
+    from database import SCHEMA_DDL, get_db
+    from models import orm_models
+    from services import db_service
+
+    hospital_id, _ = booking_target
+    user_id = fastmcp.server.dependencies.get_access_token().client_id
+    when = datetime(2031, 3, 4, 10, 5)
+    await book_directly(user_id, hospital_id, when, 2)
+    # Seats created empty, as they were before the slot's appointments took them
+    async with get_db() as session:
+        for seat_no in range(1, db_service.SLOT_CAPACITY + 1):
+            session.add(orm_models.SlotSeat(
+                hospitalId=hospital_id, slotStart=db_service.slot_start(when), seatNo=seat_no
+            ))
+
+    backfill = next(statement for statement in SCHEMA_DDL if "unseated" in statement)
+    async with get_db() as session:
+        await session.execute(text(backfill))
+        await session.execute(text(backfill))
+        seats = (await session.execute(
+            select(orm_models.SlotSeat.seatNo, orm_models.Appointment.createdAt)
+            .join(orm_models.Appointment,
+                  orm_models.Appointment.id == orm_models.SlotSeat.appointmentId)
+            .where(orm_models.SlotSeat.hospitalId == hospital_id)
+            .order_by(orm_models.SlotSeat.seatNo)
+        )).all()
+    assert seats == [(1, datetime(2026, 1, 1, 0, 0)), (2, datetime(2026, 1, 1, 0, 1))]
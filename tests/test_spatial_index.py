@@ -0,0 +1,97 @@
+"""Tests for the in-memory nearest-hospital index."""
+
+import random
+import threading
+
+import pytest
+
+from services import db_service
+from services.spatial_index import HospitalSpatialIndex, haversine_km
+
+
+def brute_force(points, latitude, longitude, k, max_km=None):
+    """Reference k-NN: haversine distance to every point."""
+    scored = sorted(
+        (haversine_km(latitude, longitude, lat, lon), hospital_id)
+        for hospital_id, (lat, lon) in points.items()
+    )
+    if max_km is not None:
+        scored = [item for item in scored if item[0] <= max_km]
+    return [hospital_id for _, hospital_id in scored[:k]]
+
+
+def test_haversine_km():
+    # Paris - Lyon is about 392 km
+    assert haversine_km(48.8566, 2.3522, 45.7640, 4.8357) == pytest.approx(392, abs=2)
+    assert haversine_km(10, 20, 10, 20) == 0
+
+
+def test_nearest_matches_brute_force():
+    rng = random.Random(42)
+    points = {
+        f"h{i}": (rng.uniform(-90, 90), rng.uniform(-180, 180)) for i in range(2000)
+    }
+    # A dense cluster, like hospitals within a city
+    points.update({
+        f"c{i}": (48.85 + rng.uniform(-0.1, 0.1), 2.35 + rng.uniform(-0.1, 0.1))
+        for i in range(500)
+    })
+    index = HospitalSpatialIndex()
+    for hospital_id, (lat, lon) in points.items():
+        index.upsert(hospital_id, lat, lon)
+
+    queries = [(rng.uniform(-90, 90), rng.uniform(-180, 180)) for _ in range(100)]
+    queries += [(48.86, 2.34), (90, 0), (0, 180), (0, -180)]
+    for lat, lon in queries:
+        for k in (1, 5, 20):
+            found = index.nearest(lat, lon, k)
+            assert [hospital_id for hospital_id, _ in found] == brute_force(points, lat, lon, k)
+            for hospital_id, distance in found:
+                expected = haversine_km(lat, lon, *points[hospital_id])
+                assert distance == pytest.approx(expected, abs=1e-6)
+
+
+def test_nearest_max_km():
+    index = HospitalSpatialIndex()
+    index.upsert("paris", 48.8566, 2.3522)
+    index.upsert("versailles", 48.8049, 2.1204)
+    index.upsert("lyon", 45.7640, 4.8357)
+
+    assert [h for h, _ in index.nearest(48.8566, 2.3522, 5, max_km=50)] == ["paris", "versailles"]
+    assert [h for h, _ in index.nearest(48.8566, 2.3522, 5)] == ["paris", "versailles", "lyon"]
+    assert index.nearest(0, 0, 5, max_km=100) == []
+
+
+def test_upsert_move_and_remove():
+    index = HospitalSpatialIndex()
+    index.upsert("h1", 48.8566, 2.3522)
+    index.upsert("h2", 45.7640, 4.8357)
+    assert index.nearest(47.0, 3.0, 1)[0][0] == "h2"
+
+    index.upsert("h2", 43.2965, 5.3698)
+    assert index.stale
+    index.rebuild()
+    assert index.nearest(47.0, 3.0, 1)[0][0] == "h1"
+
+    index.upsert("h1", None, None)
+    index.rebuild()
+    assert len(index) == 1
+    assert [h for h, _ in index.nearest(47.0, 3.0, 5)] == ["h2"]
+
+
+@pytest.mark.asyncio
+async def test_tree_is_built_off_the_event_loop():
+    index = HospitalSpatialIndex()
+    index.upsert("h1", 48.8566, 2.3522)
+    snapshot = index.snapshot
+    threads = []
+
+    def record():
+        threads.append(threading.current_thread())
+        return snapshot()
+
+    index.snapshot = record
+    await db_service._build_spatial_tree(index)
+
+    assert threads and threads[0] is not threading.main_thread()
+    assert index.has_tree and not index.stale
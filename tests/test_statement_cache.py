@@ -0,0 +1,38 @@
+"""Tests for prebuilt lookup statements and prepared statement settings."""
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql
+
+import database
+from models import orm_models
+from services import db_service
+
+
+def test_statement_cache_args(monkeypatch):
+    monkeypatch.setattr(database, "PGBOUNCER", False)
+    monkeypatch.setattr(database, "STATEMENT_CACHE_SIZE", 250)
+    args = database._statement_cache_args()
+    assert args == {"statement_cache_size": 250, "prepared_statement_cache_size": 250}
+
+
+def test_pgbouncer_statements_are_never_reused(monkeypatch):
+    monkeypatch.setattr(database, "PGBOUNCER", True)
+    args = database._statement_cache_args()
+    assert args["statement_cache_size"] == 0
+    assert args["prepared_statement_cache_size"] == 0
+    names = {args["prepared_statement_name_func"]() for _ in range(100)}
+    assert len(names) == 100
+
+
+@pytest.mark.parametrize("model, prebuilt", [
+    (orm_models.User, db_service._USER_BY_ID),
+    (orm_models.Hospital, db_service._HOSPITAL_BY_ID),
+    (orm_models.Appointment, db_service._APPOINTMENT_BY_ID),
+])
+def test_prebuilt_lookup_matches_fresh_select(model, prebuilt):
+    dialect = postgresql.dialect()
+    fresh = select(model).where(model.id == "some-id").compile(dialect=dialect)
+    compiled = prebuilt.compile(dialect=dialect)
+    assert str(compiled).replace("%(id)s", "%(id_1)s") == str(fresh)
+    assert list(compiled.params) == ["id"]
@@ -0,0 +1,86 @@
+"""Tests for the tool / db_service / JWT tracing spans."""
+
+import pytest
+from fastmcp import FastMCP
+from fastmcp.client import Client, FastMCPTransport
+from fastmcp.server.auth.providers.jwt import RSAKeyPair
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+
+from services import tracing
+from services.metrics import db_operation
+
+
+@pytest.fixture(scope="module")
+def exporter():
+    exporter = InMemorySpanExporter()
+    tracing.configure_tracing(exporter, batch=False)
+    return exporter
+
+
+@pytest.fixture
+def spans(exporter):
+    exporter.clear()
+
+    def finished():
+        return {span.name: span for span in exporter.get_finished_spans()}
+
+    return finished
+
+
+@pytest.mark.asyncio
+async def test_tool_and_db_service_spans_nest(spans):
+    @db_operation
+    async def trace_inner():
+        return 1
+
+    @db_operation
+    async def trace_outer():
+        return await trace_inner()
+
+    server = FastMCP("tracing-test")
+    server.add_middleware(tracing.ToolTracingMiddleware())
+
+    @server.tool
+    async def traced_tool() -> int:
+        return await trace_outer()
+
+    async with Client(FastMCPTransport(server)) as client:
+        await client.call_tool("traced_tool", {})
+
+    finished = spans()
+    tool = finished["tool traced_tool"]
+    outer = finished["db_service.trace_outer"]
+    inner = finished["db_service.trace_inner"]
+    assert tool.attributes["mcp.tool.name"] == "traced_tool"
+    assert outer.parent.span_id == tool.context.span_id
+    assert inner.parent.span_id == outer.context.span_id
+    assert inner.context.trace_id == tool.context.trace_id
+
+
+@pytest.mark.asyncio
+async def test_failing_db_service_call_marks_span_as_error(spans):
+    @db_operation
+    async def trace_failure():
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError):
+        await trace_failure()
+    span = spans()["db_service.trace_failure"]
+    assert not span.status.is_ok
+    assert span.events[0].name == "exception"
+
+
+@pytest.mark.asyncio
+async def test_jwt_verification_span(spans):
+    from auth import CachingJWTVerifier
+
+    pair = RSAKeyPair.generate()
+    verifier = CachingJWTVerifier(public_key=pair.public_key, issuer="hospiai-api")
+    token = pair.create_token(issuer="hospiai-api")
+
+    await verifier.verify_token(token)
+    first = spans()["auth.verify_token"]
+    assert first.attributes == {"auth.cached": False, "auth.valid": True}
+
+    await verifier.verify_token(token)
+    assert spans()["auth.verify_token"].attributes == {"auth.cached": True}